@@ -23,7 +23,7 @@ class ExampleBot(HackathonBot):
         if self.map is None:
             self.map = TomaszMapWithHistory(game_state)
         else:
-            new_map = TomaszMap(game_state)
+            new_map = TomaszMap(game_state, self.map.static)
             self.map.update(new_map)
         t2 = time.perf_counter()
         print(f"Time to update map: {1e3*(t2 - t1):.2f} ms")
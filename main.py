@@ -1,3 +1,4 @@
+import os
 from typing import List
 
 from hackathon_bot import *
@@ -5,6 +6,8 @@ from tomasz.alignment import AlignmentSystem
 from tomasz.goap.goals.capture_zones import CaptureZonesGoal
 from tomasz.goap.goap_agent import GOAPAgent
 from tomasz.map import TomaszMap, TomaszAgent, TomaszMapWithHistory
+from tomasz.map.distance_table import start_distance_table
+from tomasz.map.static_layer import get_static_layer, load_saved_walls, save_static_layer
 from tomasz.modes.fight_mode import FightMode
 from tomasz.modes.mine_layer_mode import MineLayerMode
 from tomasz.modes.mode import Mode
@@ -19,6 +22,9 @@ log = logging.getLogger(__name__)
 log.disabled = False
 logging.basicConfig(level=logging.INFO)
 
+# directory to keep static map layers between matches, disabled when not set
+STATIC_LAYER_CACHE_DIR = os.environ.get("TOMASZ_STATIC_LAYER_CACHE_DIR")
+
 def use_item(item: SecondaryItemType) -> ResponseAction | None:
     if item == SecondaryItemType.DOUBLE_BULLET:
         return AbilityUse(Ability.FIRE_DOUBLE_BULLET)
@@ -34,6 +40,7 @@ class MyBot(HackathonBot):
     map: TomaszMapWithHistory = None
     modes: List[Mode]
     died: bool = False
+    seed: int | None = None
 
     def __init__(self):
         self.movement = None
@@ -50,7 +57,14 @@ class MyBot(HackathonBot):
         super().__init__()
 
     def on_lobby_data_received(self, lobby_data: LobbyData) -> None:
-        pass
+        self.seed = lobby_data.server_settings.seed
+
+    def on_game_starting(self) -> None:
+        # the walls of a map played before are known, its distance table can be ready for the first tick
+        if self.seed is not None and STATIC_LAYER_CACHE_DIR:
+            walls_arr = load_saved_walls(STATIC_LAYER_CACHE_DIR, self.seed)
+            if walls_arr is not None:
+                start_distance_table(walls_arr, STATIC_LAYER_CACHE_DIR)
 
     def next_move(self, game_state: GameState) -> ResponseAction:
         if game_state.my_agent.is_dead:
@@ -58,9 +72,11 @@ class MyBot(HackathonBot):
             return Pass()
 
         if self.map is None:
-            self.map = TomaszMapWithHistory(game_state)
+            static_layer = get_static_layer(game_state, self.seed, STATIC_LAYER_CACHE_DIR)
+            start_distance_table(static_layer.walls_arr, STATIC_LAYER_CACHE_DIR)
+            self.map = TomaszMapWithHistory(game_state, static_layer)
         else:
-            self.map.update(TomaszMap(game_state))
+            self.map.update(TomaszMap(game_state, self.map.static))
 
         if not self.movement:
             self.movement = MovementSystem(self.map)
@@ -68,13 +84,13 @@ class MyBot(HackathonBot):
         if not self.alignment:
             self.alignment = AlignmentSystem(self.map, self.movement)
 
-        if self.map.last_danger_map_change == 0:
+        if self.movement.is_outdated(self.map):
             #log.warning("Danger map updated")
             self.movement.update_map(self.map)
 
         if self.died and not game_state.my_agent.is_dead:
             log.info("Respawned")
-            self.movement.update_map(self.map)
+            self.movement.update_map(self.map, force_replan=True)
             self.died = False
 
         current_mode = self._get_best_mode()
@@ -95,7 +111,8 @@ class MyBot(HackathonBot):
         return action or Pass()
 
     def on_game_ended(self, game_result: GameResult) -> None:
-        pass
+        if self.map is not None and STATIC_LAYER_CACHE_DIR:
+            save_static_layer(self.map.static, STATIC_LAYER_CACHE_DIR)
 
     def on_warning_received(self, warning: WarningType, message: str | None) -> None:
         pass
@@ -1,6 +1,9 @@
+import heapq
 import math
+from array import array
 
 from tomasz.map import TomaszMapWithHistory
+from tomasz.map.walkable import compute_walkable_mask
 
 
 def euclidean_distance(point1: (int, int), point2: (int, int)):
@@ -24,6 +27,21 @@ def euclidean_distance(point1: (int, int), point2: (int, int)):
     return math.sqrt(dist2)
 
 
+class SearchStats:
+    """
+    Counters of the searches a path finder was given them to.
+
+    Attributes
+    ----------
+    expansions: int
+        Number of states taken from the open set and expanded.
+    """
+    __slots__ = ("expansions",)
+
+    def __init__(self):
+        self.expansions = 0
+
+
 def get_movements_4n():
     """
     Get all possible 4-connectivity movements.
@@ -64,33 +82,57 @@ def is_walkable(tomasz_map: TomaszMapWithHistory, tile_coordinates, danger_thres
     return True
 
 
-def _reconstruct_path(came_from, current):
+def get_walkable_mask(tomasz_map: TomaszMapWithHistory, danger_threshold=0.2) -> list:
+    """
+    Get the flat walkability list of the map for a danger threshold.
+
+    Maps with history cache it per danger map version, see
+    `TomaszMapWithHistory.walkable_mask`.
+
+    Returns
+    -------
+    list
+        True for walkable tiles, tile (x, y) is at index x * H + y.
+    """
+    if hasattr(tomasz_map, "walkable_mask"):
+        return tomasz_map.walkable_mask(danger_threshold)
+    return compute_walkable_mask(tomasz_map.walls_arr, tomasz_map.danger, danger_threshold)
+
+
+def _reconstruct_path(came_from, current, height):
     """
-    Reconstruct the path from the came_from dictionary.
+    Reconstruct the path from the came_from buffer.
 
     Parameters
     ----------
-    came_from: dict
-        The dictionary containing the path.
-    current: (int, int)
-        The current point.
+    came_from: array
+        Flat index of the previous tile of every tile, -1 if none.
+    current: int
+        Flat index of the last tile of the path.
+    height: int
+        Height of the map.
 
     Returns
     -------
     list
-        The path from the start to the current point.
+        The path from the start (excluded) to the current point.
     """
-    total_path = [current]
-    while current in came_from:
+    total_path = []
+    while came_from[current] != -1:
+        total_path.append(divmod(current, height))
         current = came_from[current]
-        total_path.append(current)
-    return total_path[:-1][::-1]
+    return total_path[::-1]
 
 
-def a_star(tomasz_map: TomaszMapWithHistory, start: (int, int), goal: (int, int), ignore_danger=False, heuristic=euclidean_distance):
+def a_star(tomasz_map: TomaszMapWithHistory, start: (int, int), goal: (int, int), ignore_danger=False, heuristic=euclidean_distance,
+           stats: SearchStats | None = None):
     """
     A* algorithm to find the shortest path between two points on the map.
 
+    The open set is a binary heap with lazy deletion: a tile may be pushed
+    several times and outdated entries are skipped when popped. Scores are
+    kept in flat buffers indexed by x * H + y.
+
     Parameters
     ----------
     ignore_danger
@@ -102,64 +144,60 @@ def a_star(tomasz_map: TomaszMapWithHistory, start: (int, int), goal: (int, int)
         The goal point, (x, y).
     heuristic: Callable[[int, int], float]
         The heuristic function to estimate the cost to reach the goal.
+    stats: SearchStats | None
+        Counters to add the expansions of the search to.
 
     Returns
     -------
     List
         Array of points to reach the goal.
     """
-    movements = get_movements_4n()
-
-    # The set of nodes already evaluated.
-    closed_set = set()
-
-    # The set of currently discovered nodes that are not evaluated yet.
-    # Initially, only the start node is known.
-    open_set = {start}
-
-    # For each node, which node it can most efficiently be reached from.
-    # If a node can be reached from many nodes, came_from will eventually contain the
-    # most efficient previous step.
-    came_from = {}
-
-    # For each node, the cost of getting from the start node to that node.
-    g_score = {start: 0.0}
-
-    # The cost of going from start to start is zero.
-    # For each node, the total cost of getting from the start node to the goal
-    # by passing by that node. That value is partly known, partly heuristic.
-    f_score = {start: heuristic(start, goal)}
+    width, height = tomasz_map.size
+    if start == goal:
+        return []
 
     danger_threshold = 0.2
     if ignore_danger:
         danger_threshold = 100.0
-
-    while open_set:
-        # Get the node in open_set having the lowest f_score[] value
-        current = min(open_set, key=lambda x: f_score[x])
-
-        if current == goal:
-            return _reconstruct_path(came_from, current)
-
-        open_set.remove(current)
-        closed_set.add(current)
-
-        for dx, dy, _ in movements:
-            neighbor = current[0] + dx, current[1] + dy
-
-            if not is_walkable(tomasz_map, neighbor, danger_threshold):
+    walkable = get_walkable_mask(tomasz_map, danger_threshold)
+
+    # (flat index offset, delta_x, delta_y) per movement
+    movements = [(dx * height + dy, dx, dy) for dx, dy, _ in get_movements_4n()]
+
+    size = width * height
+    g_score = array("d", [math.inf]) * size
+    came_from = array("l", [-1]) * size
+    closed = bytearray(size)
+
+    start_index = start[0] * height + start[1]
+    goal_index = goal[0] * height + goal[1]
+    g_score[start_index] = 0.0
+    # entries are (f_score, index), outdated entries of closed tiles are skipped
+    open_heap = [(heuristic(start, goal), start_index)]
+
+    while open_heap:
+        _, current = heapq.heappop(open_heap)
+        if closed[current]:
+            continue
+        if current == goal_index:
+            return _reconstruct_path(came_from, current, height)
+        closed[current] = 1
+        if stats is not None:
+            stats.expansions += 1
+
+        x, y = divmod(current, height)
+        tentative_g_score = g_score[current] + 1
+        for offset, dx, dy in movements:
+            nx, ny = x + dx, y + dy
+            if nx < 0 or ny < 0 or nx >= width or ny >= height:
                 continue
-
-            # The distance from start to a neighbor
-            tentative_g_score = g_score[current] + 1
-
-            if neighbor in closed_set and tentative_g_score >= g_score.get(neighbor, 0):
+            neighbor = current + offset
+            if not walkable[neighbor] or closed[neighbor]:
                 continue
-
-            if neighbor not in open_set or tentative_g_score < g_score.get(neighbor, 0):
+            if tentative_g_score < g_score[neighbor]:
                 came_from[neighbor] = current
                 g_score[neighbor] = tentative_g_score
-                f_score[neighbor] = g_score[neighbor] + heuristic(neighbor, goal)
-                open_set.add(neighbor)
+                f_score = tentative_g_score + heuristic((nx, ny), goal)
+                heapq.heappush(open_heap, (f_score, neighbor))
 
     return []
@@ -1,10 +1,13 @@
 from tomasz.map import TomaszMapWithHistory, TomaszAgent
 from tomasz.map.danger_map import get_danger
+from tomasz.map.enemy_maps import EnemyMaps, compute_enemy_maps
+from tomasz.map.enemy_tracker import PREDICTION_HORIZON
+from tomasz.map.ray_table import get_ray_table, get_sight_masks
 from tomasz.utils import distance_l2, distance_l1, distance_min, distance_l_inf
-import numpy as np
-from tomasz.utils import out_of_bounds, propagate, Orientation
+from tomasz.utils import out_of_bounds, Orientation
 from typing import Tuple
 from tomasz.movement import MovementSystem, _get_needed_rotation, parse_dir_to_delta
+from tomasz.pathfinding.firing_position import find_firing_position, find_interception
 from hackathon_bot import *
 
 import logging
@@ -19,14 +22,15 @@ class AlignmentSystem:
 
         self.is_aligned = False
         self.target = None
+        self.interception = None
 
     def get_closest_enemy(self, distance = "l_min", only_visible=True):
 
         tomasz = self.map.agent
         enemies = self.map.tanks
-        enemies = [enemy for enemy in enemies if not enemy["agent"]]
+        enemies = [enemy for enemy in enemies if not enemy.agent]
         if only_visible:
-            enemies = [enemy for enemy in enemies if enemy["ticks_since_seen"] < 10]
+            enemies = [enemy for enemy in enemies if enemy.ticks_since_seen < 10]
         if len(enemies) == 0:
             return None
         
@@ -41,29 +45,51 @@ class AlignmentSystem:
         else:
             raise ValueError("Invalid distance metric")
     
-        closest_enemy = min(enemies, key=lambda e: distance(tomasz.position, e["pos"]))
+        closest_enemy = min(enemies, key=lambda e: distance(tomasz.position, e.pos))
         log.warning(f"closest_enemy: {closest_enemy}")
         return closest_enemy
     
 
-    def _closest_point(self, bool_array, start, distance="l1"):
-        true_points = np.argwhere(bool_array)
-        
-        if true_points.size == 0:
+    def get_enemy_maps(self, only_visible=True) -> EnemyMaps:
+        enemies = [enemy for enemy in self.map.tanks if not enemy.agent]
+        if only_visible:
+            enemies = [enemy for enemy in enemies if enemy.ticks_since_seen < 10]
+        return compute_enemy_maps(self.map, enemies)
+
+    def get_best_target(self, only_visible=True):
+        """
+        Get the enemy the agent can fire at the soonest, None if there are no enemies.
+        """
+        enemy_maps = self.get_enemy_maps(only_visible)
+        best = enemy_maps.best_target()
+        if best is None:
             return None
-        
-        if distance == "l1":
-            distances = np.sum(np.abs(true_points - start), axis=1)
-        elif distance == "l2":
-            distances = np.sum((true_points - start) ** 2, axis=1)
-        else:
-            raise ValueError("Invalid distance metric")
+        log.warning(f"best_target: {enemy_maps.tanks[best]}, ticks_to_fire: {enemy_maps.ticks_to_fire[best]}")
+        return enemy_maps.tanks[best]
 
-        min_index = np.argmin(distances)
-        
-        x, y = true_points[min_index]
-        return (int(x), int(y))
-    
+    def get_aim_point(self, tank, horizon=PREDICTION_HORIZON) -> Tuple[int, int]:
+        """
+        Get the predicted position of the enemy to fire at, its last seen one if it is not tracked.
+
+        The interception is kept in `interception`, see `is_holding_fire`.
+        """
+        self.interception = None
+        track = self.map.enemy_tracker.get(tank)
+        if track is None:
+            return tank.pos
+        predicted = track.predict(get_ray_table(self.map.static), self.map.tick, horizon)
+        self.interception = find_interception(self.map, predicted, self.map.agent.entity.turret.direction)
+        if self.interception is None:
+            return tank.pos
+        log.warning(f"interception: {self.interception}")
+        return self.interception.target
+
+    def is_holding_fire(self) -> bool:
+        """
+        Check that the agent aims from the firing position but a bullet fired now would arrive too early.
+        """
+        interception = self.interception
+        return interception is not None and interception.firing_position.ticks == 0 and interception.slack > 0
 
     def get_turret_rotation(self, position: Tuple[int, int], target: Tuple[int, int], current_dir: Direction):
         if position == target:
@@ -95,8 +121,7 @@ class AlignmentSystem:
 
     def set_target(self, target: Tuple[int, int]):
         self.target = target
-        self.sight_on_target = np.zeros(self.map.size, dtype=bool)
-        propagate(self.sight_on_target, self.map, self.target, "ALL", decay=1)
+        self.sight_on_target = get_sight_masks(self.map.static).get(self.target)
         
     def get_action(self):
         log.warning(f"target: {self.target}")
@@ -111,12 +136,12 @@ class AlignmentSystem:
         
         tomasz = self.map.agent
         if not self.sight_on_target[tomasz.position]:
-            closest_sight_point = self._closest_point(self.sight_on_target, tomasz.position)
-            if closest_sight_point is None:
-                log.warning("no point in sight? this should not happen")
+            firing_position = find_firing_position(self.map, self.target, tomasz.entity.turret.direction)
+            if firing_position is None:
+                log.warning("no reachable point in sight")
                 return 
-            log.warning(f"closest_sight_point: {closest_sight_point}")
-            self.movement_system.target = closest_sight_point
+            log.warning(f"firing_position: {firing_position}")
+            self.movement_system.target = firing_position.position
             move = self.movement_system.get_action(tomasz)
             log.warning(f"move: {move}")
             return move
@@ -169,14 +194,15 @@ class AlignmentSystem:
     def check_alignment(self):
         tomasz = self.map.agent
         closest_enemy = self.get_closest_enemy()
-        sight = np.zeros(self.map.size, dtype=bool)
-        propagate(sight, self.map, closest_enemy["pos"], "ALL", decay=1)
-        
-        if not sight[tomasz.position]:
+        if closest_enemy is None:
+            self.is_aligned = False
+            return False
+
+        if not get_ray_table(self.map.static).line_of_sight(closest_enemy.pos, tomasz.position):
             self.is_aligned = False
             return False
         
-        rot = self.get_turret_rotation(tomasz.position, closest_enemy["pos"], tomasz.entity.turret.direction)
+        rot = self.get_turret_rotation(tomasz.position, closest_enemy.pos, tomasz.entity.turret.direction)
         if rot is not None:
             self.is_aligned = False
             return False
@@ -0,0 +1,101 @@
+import numpy as np
+
+from hackathon_bot import *
+from tomasz.map.ray_table import get_ray_table
+from tomasz.utils import direction_to_delta
+
+FORECAST_HORIZON = 10
+
+# bullets move in tile coordinates (x, y), as in the danger layer
+BULLET_DELTAS = direction_to_delta
+
+
+def get_danger_forecast(tomasz_map, horizon: int = FORECAST_HORIZON) -> np.ndarray:
+    """
+    Predict the tiles crossed by bullets over the next ticks.
+
+    Every bullet and double bullet is projected along its direction at its
+    speed until it hits a wall. A tile is dangerous at tick t if a bullet is
+    on it at t or passes over it between t - 1 and t.
+
+    Parameters
+    ----------
+    tomasz_map: TomaszMap
+        Parsed map.
+    horizon: int
+        Number of ticks to predict, the current tick included.
+
+    Returns
+    -------
+    np.ndarray
+        Array of shape (horizon, W, H), 1 where a bullet is expected.
+        Index 0 is the current tick.
+    """
+    rays = get_ray_table(tomasz_map.static)
+    forecast = np.zeros((horizon, *tomasz_map.size), dtype=float)
+
+    ticks, xs, ys = [], [], []
+    for entity in tomasz_map.iter_grid_entities():
+        if entity.type != 'bullet':
+            continue
+        speed = max(float(entity.speed), 1e-6)
+        max_steps = int(np.floor(speed * (horizon - 1)))
+        cells_x, cells_y = rays.ray_cells(entity.pos, BULLET_DELTAS[entity.dir], max_steps=max_steps)
+        steps = np.arange(1, len(cells_x) + 1)
+
+        ticks.append(np.zeros(1, dtype=int))
+        xs.append(np.array([entity.pos[0]]))
+        ys.append(np.array([entity.pos[1]]))
+        # the step k tiles away is reached during tick ceil(k / speed)
+        ticks.append(np.ceil(steps / speed - 1e-9).astype(int))
+        xs.append(cells_x)
+        ys.append(cells_y)
+
+    if ticks:
+        ticks = np.concatenate(ticks)
+        in_horizon = ticks < horizon
+        forecast[ticks[in_horizon], np.concatenate(xs)[in_horizon], np.concatenate(ys)[in_horizon]] = 1
+
+    return forecast
+
+
+def get_tile_danger(forecast: np.ndarray, x: int, y: int, t: int) -> float:
+    """
+    Get the forecast danger of standing on a tile at tick t.
+
+    A tank moving in during tick t also meets the bullets on the tile at
+    t - 1, the ones it swaps places with. Ticks after the horizon are not
+    dangerous.
+    """
+    if t >= len(forecast):
+        return 0.0
+    if t == 0:
+        return float(forecast[0, x, y])
+    return float(max(forecast[t, x, y], forecast[t - 1, x, y]))
+
+
+def get_arrival_danger(forecast: np.ndarray, path, start_tick: int = 1) -> float:
+    """
+    Get the highest forecast danger along a path, each tile at its arrival tick.
+    See `get_tile_danger`.
+
+    Parameters
+    ----------
+    forecast: np.ndarray
+        Forecast from `get_danger_forecast`.
+    path: list
+        Tiles to visit, one per tick.
+    start_tick: int
+        Tick at which the first tile of the path is entered.
+
+    Returns
+    -------
+    float
+        Highest danger, tiles entered after the horizon are not dangerous.
+    """
+    danger = 0.0
+    for t, (x, y) in enumerate(path, start=start_tick):
+        if t >= len(forecast):
+            break
+        danger = max(danger, get_tile_danger(forecast, x, y, t))
+    return danger
@@ -0,0 +1,183 @@
+import numpy as np
+
+from hackathon_bot import *
+from tomasz.map.ray_table import RayTable, get_ray_table
+from tomasz.utils import direction_to_delta, oridentation_to_delta
+
+BULLET_DECAY = 0.9
+LASER_DECAY = 1
+TURRET_DECAY = 0.7
+
+
+def get_danger_source(entity):
+    """
+    Get the key identifying the danger contribution of an entity.
+
+    Returns
+    -------
+    tuple | None
+        (type, pos, direction) or None if the entity is not dangerous.
+    """
+    if entity.type == 'mine':
+        return 'mine', entity.pos, None
+    if entity.type == 'bullet':
+        return 'bullet', entity.pos, entity.dir
+    if entity.type == 'laser':
+        return 'laser', entity.pos, entity.ori
+    if entity.type == 'tank' and not entity.agent:
+        return 'tank', entity.pos, entity.turret_dir
+    return None
+
+
+class DangerLayer:
+    """
+    Danger map maintained from per-source contributions.
+
+    Every dangerous entity (mine, bullet, laser, enemy turret) contributes
+    danger values to the tiles it threatens. Contributions are combined as
+    1 - prod(1 - value), and only the contributions of sources that appeared,
+    moved or vanished since the last update are added or removed.
+
+    Unlike `get_danger`, the result does not depend on the order of the
+    sources: a bullet's own tile keeps the danger of the other sources.
+
+    Attributes
+    ----------
+    grid: np.ndarray
+        The danger map, updated in place.
+    version: int
+        Incremented every time the danger map changes.
+    changed_cells: (np.ndarray, np.ndarray)
+        The x and y coordinates of the tiles changed by the last update.
+    """
+
+    def __init__(self, size, rays: RayTable):
+        self.size = size
+        self.rays = rays
+        self.grid = np.zeros(size, dtype=float)
+        self.version = 0
+        self.changed_cells = (np.zeros(0, dtype=int), np.zeros(0, dtype=int))
+
+        # number of contributions, number of contributions equal to 1,
+        # and the sum of log(1 - value) of the other ones, per tile
+        self._count = np.zeros(size, dtype=int)
+        self._certain = np.zeros(size, dtype=int)
+        self._log_survival = np.zeros(size, dtype=float)
+
+        # {source: (xs, ys, values)}
+        self.contributions = {}
+
+    @classmethod
+    def for_map(cls, tomasz_map):
+        return cls(tomasz_map.size, get_ray_table(tomasz_map.static))
+
+    def _ray(self, pos, delta, decay):
+        xs, ys = self.rays.ray_cells(pos, delta, max_steps=self.size[0])
+        return xs, ys, decay ** np.arange(len(xs), dtype=float)
+
+    def _get_contribution(self, source):
+        kind, pos, dir = source
+        if kind == 'mine':
+            parts = []
+            start_value = 1
+        elif kind == 'bullet':
+            parts = [self._ray(pos, direction_to_delta[dir], BULLET_DECAY)]
+            start_value = None
+        elif kind == 'laser':
+            parts = [self._ray(pos, delta, LASER_DECAY) for delta in oridentation_to_delta[dir]]
+            start_value = 1
+        else:
+            parts = [self._ray(pos, direction_to_delta[dir], TURRET_DECAY)]
+            start_value = 1
+
+        if start_value is not None:
+            parts.append((np.array([pos[0]]), np.array([pos[1]]), np.array([float(start_value)])))
+        if not parts:
+            return np.zeros(0, dtype=int), np.zeros(0, dtype=int), np.zeros(0)
+        xs, ys, values = zip(*parts)
+        return np.concatenate(xs), np.concatenate(ys), np.concatenate(values)
+
+    def _apply(self, contribution, sign):
+        # tiles of a single contribution are unique, so fancy indexing is safe
+        xs, ys, values = contribution
+        certain = values >= 1
+        self._count[xs, ys] += sign
+        self._certain[xs[certain], ys[certain]] += sign
+        self._log_survival[xs[~certain], ys[~certain]] += sign * np.log1p(-values[~certain])
+
+    def update(self, sources) -> bool:
+        """
+        Update the danger map to the given set of sources.
+
+        Parameters
+        ----------
+        sources: Iterable[tuple]
+            Keys of the current danger sources, see `get_danger_source`.
+
+        Returns
+        -------
+        bool
+            True if the danger map has changed.
+        """
+        sources = set(sources)
+        removed = [source for source in self.contributions if source not in sources]
+        added = [source for source in sources if source not in self.contributions]
+
+        changed = []
+        for source in removed:
+            contribution = self.contributions.pop(source)
+            self._apply(contribution, -1)
+            changed.append(contribution)
+        for source in added:
+            contribution = self._get_contribution(source)
+            self.contributions[source] = contribution
+            self._apply(contribution, 1)
+            changed.append(contribution)
+
+        if not changed:
+            self.changed_cells = (np.zeros(0, dtype=int), np.zeros(0, dtype=int))
+            return False
+
+        xs = np.concatenate([contribution[0] for contribution in changed])
+        ys = np.concatenate([contribution[1] for contribution in changed])
+
+        # tiles without sources are reset to avoid accumulating rounding errors
+        empty = self._count[xs, ys] == 0
+        self._log_survival[xs[empty], ys[empty]] = 0
+
+        old = self.grid[xs, ys]
+        new = np.where(self._certain[xs, ys] > 0, 1.0, 0.0 - np.expm1(self._log_survival[xs, ys]))
+        self.grid[xs, ys] = new
+
+        moved = np.abs(old - new) > 1e-12
+        self.changed_cells = (xs[moved], ys[moved])
+        if not moved.any():
+            return False
+
+        self.version += 1
+        return True
+
+    def get_grid_without(self, kinds) -> np.ndarray:
+        """
+        Get the danger map with the contributions of some source kinds left out.
+
+        Parameters
+        ----------
+        kinds: Iterable[str]
+            Source kinds to leave out, e.g. ('bullet',).
+
+        Returns
+        -------
+        np.ndarray
+            A new danger map.
+        """
+        kinds = set(kinds)
+        survival = np.ones(self.size, dtype=float)
+        for (kind, _, _), (xs, ys, values) in self.contributions.items():
+            if kind not in kinds:
+                survival[xs, ys] *= 1 - values
+        return 1 - survival
+
+    def update_from_map(self, tomasz_map) -> bool:
+        sources = (get_danger_source(entity) for entity in tomasz_map.iter_grid_entities())
+        return self.update(source for source in sources if source is not None)
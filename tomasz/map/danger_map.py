@@ -2,31 +2,62 @@ from tomasz.map import TomaszMap
 import numpy as np
 from hackathon_bot import *
 from typing import Tuple
-from tomasz.utils import propagate
+from tomasz.map.enemy_maps import compute_lines_of_fire
+from tomasz.map.ray_table import RayTable, get_ray_lengths, get_ray_table
+from tomasz.utils import direction_to_delta, oridentation_to_delta
 
 
 
 
+# {(decay, max_steps): 1 - decay ** step}, survival factors of the tiles along a ray
+_ray_factors = {}
+
+
+def _get_ray_factors(decay, max_steps) -> np.ndarray:
+    key = (decay, max_steps)
+    if key not in _ray_factors:
+        _ray_factors[key] = 1 - decay ** np.arange(max_steps, dtype=float)
+    return _ray_factors[key]
+
+
+def _cast_survival(survival: np.ndarray, rays: RayTable, start_pos: Tuple[int, int], delta, decay, max_steps):
+    # survival = 1 - danger, so combining 1 - (1 - danger) * (1 - value) becomes a product
+    ray = rays.view(survival, start_pos, delta, max_steps)
+    ray *= _get_ray_factors(decay, max_steps)[:len(ray)]
+
+
+def _cast_ray_survival(survival, rays, start_pos, dir, decay, max_steps):
+    if isinstance(dir, Orientation):
+        for delta in oridentation_to_delta[dir]:
+            _cast_survival(survival, rays, start_pos, delta, decay, max_steps)
+    else:
+        _cast_survival(survival, rays, start_pos, direction_to_delta[dir], decay, max_steps)
+
+
 def get_danger(map: TomaszMap):
     # mines are danger 
     # bullets and their future positions are danger
     # lasers are danger
     # tanks are danger
+    rays = get_ray_table(map.static)
+    max_steps = map.size[0]
 
-    danger_map = np.zeros(map.size, dtype=float)
-    for i in range(map.size[0]):
-        for j in range(map.size[1]):
-            for entity in map.entities_grid[i, j]:
-                if entity['type'] == 'mine':
-                    danger_map[i, j] = 1
-                elif entity['type'] == 'bullet':
-                    propagate(danger_map, map, (i, j), entity['dir'], decay=0.9, start_pos_not_included=True)
-                elif entity['type'] == 'laser':
-                    propagate(danger_map, map, (i, j), entity['ori'], decay=1)
-                elif entity['type'] == 'tank' and not entity['agent']:
-                    propagate(danger_map, map, (i, j), entity['turret_dir'], decay=0.7)
+    # entities are visited in the grid order, start tiles overwrite what was there before
+    survival = np.ones(map.size, dtype=float)
+    for entity in map.iter_grid_entities():
+        if entity.type == 'mine':
+            survival[entity.pos] = 0
+        elif entity.type == 'bullet':
+            _cast_ray_survival(survival, rays, entity.pos, entity.dir, 0.9, max_steps)
+            survival[entity.pos] = 1
+        elif entity.type == 'laser':
+            _cast_ray_survival(survival, rays, entity.pos, entity.ori, 1, max_steps)
+            survival[entity.pos] = 0
+        elif entity.type == 'tank' and not entity.agent:
+            _cast_ray_survival(survival, rays, entity.pos, entity.turret_dir, 0.7, max_steps)
+            survival[entity.pos] = 0
 
-    return danger_map
+    return 1 - survival
 
 
 def visualize_danger(danger_map: np.ndarray) -> np.ndarray:
@@ -46,9 +77,7 @@ def visualize_danger(danger_map: np.ndarray) -> np.ndarray:
 
 
 def get_sight(map: TomaszMap):
-    sight_map = np.zeros(map.size, dtype=int)
-    for enemy in map.tanks:
-        for delta in direction_to_delta.values():
-            propagate(sight_map, map, enemy['pos'], delta, decay=1)
+    positions = np.array([tank.pos for tank in map.tanks], dtype=int).reshape(-1, 2)
+    sight_map = (compute_lines_of_fire(get_ray_lengths(map.static), positions) >= 0).any(axis=0).astype(int)
+    sight_map[positions[:, 0], positions[:, 1]] = 1
     return sight_map
-        
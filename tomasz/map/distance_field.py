@@ -0,0 +1,147 @@
+import numpy as np
+
+UNREACHABLE = -1
+
+# neighbour deltas (x, y), the first one reaching a tile becomes its parent
+FIELD_DELTAS = ((1, 0), (0, 1), (-1, 0), (0, -1))
+
+
+def compute_distance_field(walkable: np.ndarray, origin) -> (np.ndarray, np.ndarray):
+    """
+    Breadth-first search from the origin over the walkable tiles.
+
+    Every BFS layer is expanded at once: the neighbours of the whole frontier
+    are gathered with array operations and the new tiles form the next one.
+
+    Parameters
+    ----------
+    walkable: np.ndarray
+        Boolean grid, True for tiles that can be entered. Indexed [x, y].
+    origin: (int, int) | list
+        Start of the search, entered even if it is not walkable. A list of
+        tiles starts from all of them at once, the distances are then to
+        the closest one.
+
+    Returns
+    -------
+    (np.ndarray, np.ndarray)
+        Number of moves to every tile (UNREACHABLE if none) and the flat
+        index x * H + y of the previous tile on a shortest path (-1 if none).
+    """
+    width, height = walkable.shape
+    size = width * height
+    flat_walkable = walkable.ravel()
+    distances = np.full(size, UNREACHABLE, dtype=np.int32)
+    parents = np.full(size, -1, dtype=np.int32)
+
+    origins = [origin] if isinstance(origin, tuple) else list(origin)
+    frontier = np.unique(np.array([x * height + y for x, y in origins], dtype=np.int64))
+    distances[frontier] = 0
+
+    offsets = np.array([dx * height + dy for dx, dy in FIELD_DELTAS], dtype=np.int64)
+    dxs = np.array([dx for dx, _ in FIELD_DELTAS])
+    dys = np.array([dy for _, dy in FIELD_DELTAS])
+
+    distance = 0
+    while frontier.size:
+        distance += 1
+        xs, ys = np.divmod(frontier, height)
+        nxs = xs[:, None] + dxs
+        nys = ys[:, None] + dys
+        inside = (nxs >= 0) & (nxs < width) & (nys >= 0) & (nys < height)
+        neighbors = (frontier[:, None] + offsets)[inside]
+        sources = np.broadcast_to(frontier[:, None], inside.shape)[inside]
+
+        new = flat_walkable[neighbors] & (distances[neighbors] == UNREACHABLE)
+        neighbors, sources = neighbors[new], sources[new]
+        # a tile reached from several frontier tiles keeps the first one
+        neighbors, first = np.unique(neighbors, return_index=True)
+
+        distances[neighbors] = distance
+        parents[neighbors] = sources[first]
+        frontier = neighbors
+
+    return distances.reshape(walkable.shape), parents
+
+
+class DistanceField:
+    """
+    Shortest walking distances from one tile, or the closest of several
+    tiles, to every other tile.
+
+    Attributes
+    ----------
+    origin: (int, int) | list
+        The tile or tiles the distances are measured from.
+    distances: np.ndarray
+        Number of moves to every tile, UNREACHABLE if there is no way.
+    parents: np.ndarray
+        Flat index of the previous tile on a shortest path, see `compute_distance_field`.
+    """
+
+    def __init__(self, walkable: np.ndarray | None, origin, distances=None, parents=None):
+        self.origin = origin
+        if distances is None:
+            distances, parents = compute_distance_field(walkable, origin)
+        self.distances, self.parents = distances, parents
+        self.height = self.distances.shape[1]
+
+    def is_reachable(self, pos) -> bool:
+        return self.distances[pos] != UNREACHABLE
+
+    def distance(self, pos) -> float:
+        """
+        Get the number of moves to pos, inf if it can not be reached.
+        """
+        distance = self.distances[pos]
+        return float('inf') if distance == UNREACHABLE else int(distance)
+
+    def path_to(self, pos) -> list:
+        """
+        Get a shortest path to pos, the origin excluded, like the path of `a_star`.
+
+        Returns
+        -------
+        list
+            Tiles to visit, empty if pos is the origin or can not be reached.
+        """
+        if not self.is_reachable(pos):
+            return []
+        path = []
+        index = pos[0] * self.height + pos[1]
+        while self.parents[index] != -1:
+            path.append(divmod(int(index), self.height))
+            index = self.parents[index]
+        return path[::-1]
+
+    def path_from(self, pos) -> list:
+        """
+        Get a shortest path from pos back to the origin, pos excluded.
+
+        For a field grown from goal tiles this walks down the flow field,
+        the first tile is the next step and the last one the closest goal.
+
+        Returns
+        -------
+        list
+            Tiles to visit, empty if pos is an origin or can not be reached.
+        """
+        if not self.is_reachable(pos):
+            return []
+        path = []
+        index = self.parents[pos[0] * self.height + pos[1]]
+        while index != -1:
+            path.append(divmod(int(index), self.height))
+            index = self.parents[index]
+        return path
+
+    def closest(self, positions):
+        """
+        Get the reachable position with the shortest path, None if there is none.
+        """
+        best, best_distance = None, float('inf')
+        for pos in positions:
+            distance = self.distance(pos)
+            if distance < best_distance:
+                best, best_distance = pos, distance
+        return best
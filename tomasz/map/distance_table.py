@@ -0,0 +1,238 @@
+import logging
+import math
+import os
+import threading
+
+import numpy as np
+
+from tomasz.map.static_layer import get_wall_hash
+
+log = logging.getLogger(__name__)
+log.disabled = False
+
+# distance between tiles that can not reach each other
+UNREACHABLE_DISTANCE = np.iinfo(np.uint16).max
+# maps with more walkable tiles get no table, it would take (N * N * 2) bytes
+MAX_TABLE_CELLS = 4096
+# number of sources walked together by the batched BFS
+BFS_BATCH_SIZE = 256
+
+
+def _fill_distance_table(table: np.ndarray, walls_arr: np.ndarray, cells: np.ndarray):
+    """
+    Fill the rows of the table with BFS distances, a batch of sources at a time.
+    """
+    free = walls_arr == 0
+    width, height = walls_arr.shape
+    for first in range(0, len(cells), BFS_BATCH_SIZE):
+        sources = cells[first:first + BFS_BATCH_SIZE]
+        rows = np.arange(len(sources))
+        distances = np.full((len(sources), width * height), UNREACHABLE_DISTANCE, dtype=np.uint16)
+        frontier = np.zeros((len(sources), width * height), dtype=bool)
+        frontier[rows, sources] = True
+        distances[rows, sources] = 0
+        reached = frontier.copy()
+
+        frontier = frontier.reshape(-1, width, height)
+        distance = 0
+        while frontier.any():
+            distance += 1
+            layer = np.zeros_like(frontier)
+            layer[:, 1:, :] |= frontier[:, :-1, :]
+            layer[:, :-1, :] |= frontier[:, 1:, :]
+            layer[:, :, 1:] |= frontier[:, :, :-1]
+            layer[:, :, :-1] |= frontier[:, :, 1:]
+            layer &= free
+            layer = layer.reshape(len(sources), -1) & ~reached
+            reached |= layer
+            distances[layer] = distance
+            frontier = layer.reshape(-1, width, height)
+
+        table[first:first + len(sources)] = distances[:, cells]
+
+
+def compute_distance_table(walls_arr: np.ndarray) -> np.ndarray:
+    """
+    Compute the walking distances between all pairs of walkable tiles.
+
+    Parameters
+    ----------
+    walls_arr: np.ndarray
+        Occupancy grid, 1 for walls. Indexed [x, y].
+
+    Returns
+    -------
+    np.ndarray
+        Array of shape (N, N) of uint16, N the number of walkable tiles in
+        the order of their flat index x * H + y. UNREACHABLE_DISTANCE for
+        tiles that can not reach each other.
+    """
+    cells = np.flatnonzero(walls_arr.ravel() == 0)
+    table = np.empty((len(cells), len(cells)), dtype=np.uint16)
+    _fill_distance_table(table, walls_arr, cells)
+    return table
+
+
+def _table_path(cache_dir: str, wall_hash: str) -> str:
+    return os.path.join(cache_dir, f"distance_table_{wall_hash}.npy")
+
+
+def load_distance_table(walls_arr: np.ndarray, cache_dir: str | None = None) -> "DistanceTable | None":
+    """
+    Load the distance table of the walls from the cache, or build it.
+
+    With a cache directory the table is built straight into a file and used
+    memory-mapped, so a table of a map played before is ready at once.
+
+    Returns
+    -------
+    DistanceTable | None
+        None if the map has more than MAX_TABLE_CELLS walkable tiles.
+    """
+    cells = np.flatnonzero(walls_arr.ravel() == 0)
+    if len(cells) > MAX_TABLE_CELLS:
+        log.info(f"No distance table for {len(cells)} walkable tiles")
+        return None
+    if not cache_dir:
+        return DistanceTable(walls_arr, compute_distance_table(walls_arr))
+
+    path = _table_path(cache_dir, get_wall_hash(walls_arr))
+    if os.path.exists(path):
+        try:
+            table = np.load(path, mmap_mode="r")
+            if table.shape == (len(cells), len(cells)):
+                log.info(f"Loaded distance table from {path}")
+                return DistanceTable(walls_arr, table)
+        except (OSError, ValueError) as e:
+            log.warning(f"Failed to load distance table from {path}: {e}")
+
+    os.makedirs(cache_dir, exist_ok=True)
+    # written under another name first, a half-written file is never loaded
+    temporary_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    table = np.lib.format.open_memmap(temporary_path, mode="w+", dtype=np.uint16, shape=(len(cells), len(cells)))
+    _fill_distance_table(table, walls_arr, cells)
+    table.flush()
+    del table
+    os.replace(temporary_path, path)
+    log.info(f"Saved distance table to {path}")
+    return DistanceTable(walls_arr, np.load(path, mmap_mode="r"))
+
+
+class DistanceTable:
+    """
+    Walking distances between all pairs of walkable tiles, walls only.
+
+    Danger only blocks more tiles, so the distances are a lower bound of the
+    ones around danger: an admissible A* heuristic, exact on a quiet map.
+
+    Attributes
+    ----------
+    size: (int, int)
+        Size of the map.
+    table: np.ndarray
+        Distances, see `compute_distance_table`. Possibly memory-mapped.
+    """
+
+    def __init__(self, walls_arr: np.ndarray, table: np.ndarray):
+        self.size = walls_arr.shape
+        self.table = table
+        index = np.full(walls_arr.size, -1, dtype=np.int32)
+        cells = np.flatnonzero(walls_arr.ravel() == 0)
+        index[cells] = np.arange(len(cells), dtype=np.int32)
+        # row of every tile by flat index, -1 for walls
+        self._index = index.tolist()
+
+    def _row(self, pos) -> int:
+        x, y = pos
+        if x < 0 or y < 0 or x >= self.size[0] or y >= self.size[1]:
+            return -1
+        return self._index[x * self.size[1] + y]
+
+    def distance(self, pos1, pos2) -> float:
+        """
+        Get the walking distance between two tiles, inf if one can not reach the other.
+        """
+        row1, row2 = self._row(pos1), self._row(pos2)
+        if row1 == -1 or row2 == -1:
+            return math.inf
+        distance = int(self.table[row1, row2])
+        return math.inf if distance == UNREACHABLE_DISTANCE else float(distance)
+
+    def heuristic_to(self, goal):
+        """
+        Get an A* heuristic towards the goal reading its row of the table.
+
+        The row is copied once, so every estimate is a list lookup. Tiles that
+        can not reach the goal get UNREACHABLE_DISTANCE.
+
+        Returns
+        -------
+        Callable[[(int, int), (int, int)], float]
+            Heuristic with the signature of `euclidean_distance`.
+        """
+        row = self._row(goal)
+        height = self.size[1]
+        if row == -1:
+            return lambda point, _: abs(point[0] - goal[0]) + abs(point[1] - goal[1])
+        distances = np.asarray(self.table[row]).tolist()
+        index = self._index
+        return lambda point, _: distances[index[point[0] * height + point[1]]]
+
+
+# tables of the walls seen by this process, {wall_hash: DistanceTable | None}
+_distance_tables = {}
+# threads building them, {wall_hash: threading.Thread}
+_builders = {}
+_builders_lock = threading.Lock()
+
+
+def _build(wall_hash: str, walls_arr: np.ndarray, cache_dir: str | None):
+    try:
+        _distance_tables[wall_hash] = load_distance_table(walls_arr, cache_dir)
+    except (OSError, MemoryError) as e:
+        log.warning(f"Failed to build the distance table: {e}")
+        _distance_tables[wall_hash] = None
+
+
+def start_distance_table(walls_arr: np.ndarray, cache_dir: str | None = None) -> threading.Thread | None:
+    """
+    Start loading or building the distance table of the walls in a background thread.
+    Does nothing if it was already started.
+
+    Returns
+    -------
+    threading.Thread | None
+        The thread, None if it had been started before.
+    """
+    wall_hash = get_wall_hash(walls_arr)
+    with _builders_lock:
+        if wall_hash in _builders:
+            return None
+        thread = threading.Thread(
+            target=_build, args=(wall_hash, walls_arr.copy(), cache_dir), name="distance-table", daemon=True,
+        )
+        _builders[wall_hash] = thread
+    thread.start()
+    return thread
+
+
+def get_distance_table(static_layer, wait: bool = False) -> DistanceTable | None:
+    """
+    Get the distance table of the static layer if it is ready.
+
+    Parameters
+    ----------
+    static_layer: TomaszStaticLayer
+        Static layer of the match.
+    wait: bool
+        Wait for the build started by `start_distance_table` to finish.
+
+    Returns
+    -------
+    DistanceTable | None
+        None while the table is being built, if it was never started or if
+        the map is too large.
+    """
+    if wait and static_layer.wall_hash in _builders:
+        _builders[static_layer.wall_hash].join()
+    return _distance_tables.get(static_layer.wall_hash)
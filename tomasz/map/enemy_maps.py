@@ -0,0 +1,143 @@
+from typing import NamedTuple
+
+import numpy as np
+
+from hackathon_bot import Direction
+from tomasz.map.ray_table import get_ray_lengths
+
+# clockwise order of the turret directions, a rotation moves one step along it
+CLOCKWISE = (Direction.UP, Direction.RIGHT, Direction.DOWN, Direction.LEFT)
+# index in CLOCKWISE of the direction of every ray of RAY_DELTAS
+RAY_CLOCKWISE_INDEX = np.array([3, 1, 0, 2], dtype=np.int8)
+
+
+def compute_lines_of_fire(ray_lengths: np.ndarray, positions: np.ndarray) -> np.ndarray:
+    """
+    Compute the tiles in a straight line of fire of every position at once.
+
+    Parameters
+    ----------
+    ray_lengths: np.ndarray
+        Ray lengths table, see `compute_ray_lengths`.
+    positions: np.ndarray
+        Array of shape (E, 2), the (x, y) of every shooter.
+
+    Returns
+    -------
+    np.ndarray
+        Array of shape (E, W, H) of int8, the index in RAY_DELTAS of the ray
+        of the position the tile is on, -1 if a wall is in the way or the
+        tile is not in line. The position itself is -1.
+    """
+    width, height = ray_lengths.shape[:2]
+    positions = np.asarray(positions, dtype=int).reshape(-1, 2)
+    dx = np.arange(width)[None, :, None] - positions[:, 0, None, None]
+    dy = np.arange(height)[None, None, :] - positions[:, 1, None, None]
+    dx, dy = np.broadcast_arrays(dx, dy)
+
+    rays = np.where(dy == 0, np.where(dx < 0, 0, 1), np.where(dy < 0, 2, 3))
+    lengths = ray_lengths[positions[:, 0], positions[:, 1]]
+    reach = lengths[np.arange(len(positions))[:, None, None], rays]
+    steps = np.abs(dx) + np.abs(dy)
+    in_line = ((dx == 0) | (dy == 0)) & (steps > 0) & (steps <= reach)
+    return np.where(in_line, rays, -1).astype(np.int8)
+
+
+def _turret_turns(rays: np.ndarray, current: np.ndarray, opposite: bool) -> np.ndarray:
+    # rotations from the current turret direction to the ray direction, or the opposite one
+    needed = RAY_CLOCKWISE_INDEX[np.maximum(rays, 0)] + (2 if opposite else 0)
+    turns = (needed - current) % 4
+    return np.where(rays >= 0, np.minimum(turns, 4 - turns), -1).astype(np.int8)
+
+
+class EnemyMaps(NamedTuple):
+    """
+    Lines of fire between every enemy and every tile, computed together.
+
+    Attributes
+    ----------
+    tanks: list
+        The enemies, TomaszTank, in the order of the first axis of the arrays.
+    rays: np.ndarray
+        Array of shape (E, W, H), see `compute_lines_of_fire`.
+    threat_turns: np.ndarray
+        Array of shape (E, W, H) of int8, turret rotations the enemy needs to
+        hit the tile, -1 if it can not.
+    firing_ticks: np.ndarray
+        Array of shape (E, W, H), moves of the agent to the tile plus turret
+        rotations to hit the enemy from it, inf if it can not.
+    distances: np.ndarray
+        Array of shape (E,), Manhattan distance from the agent.
+    ticks_to_fire: np.ndarray
+        Array of shape (E,), fewest firing ticks over all tiles, 0 if the
+        agent can fire at the enemy now.
+    exposed: np.ndarray
+        Array of shape (E,) of bool, the enemy can hit the agent now.
+    """
+    tanks: list
+    rays: np.ndarray
+    threat_turns: np.ndarray
+    firing_ticks: np.ndarray
+    distances: np.ndarray
+    ticks_to_fire: np.ndarray
+    exposed: np.ndarray
+
+    @property
+    def threat(self) -> np.ndarray:
+        """
+        Tiles an enemy can hit, possibly after rotating its turret.
+        """
+        return (self.threat_turns >= 0).any(axis=0)
+
+    @property
+    def opportunity(self) -> np.ndarray:
+        """
+        Tiles the agent can reach and hit an enemy from.
+        """
+        return np.isfinite(self.firing_ticks).any(axis=0)
+
+    def best_target(self) -> int | None:
+        """
+        Get the index of the enemy quickest to fire at, ties broken by the distance.
+        """
+        if not self.tanks:
+            return None
+        return int(np.lexsort((self.distances, self.ticks_to_fire))[0])
+
+
+def compute_enemy_maps(tomasz_map, tanks: list | None = None) -> EnemyMaps:
+    """
+    Compute the threat and opportunity maps of all enemies in one pass.
+
+    Parameters
+    ----------
+    tomasz_map: TomaszMapWithHistory
+        Parsed map with an agent.
+    tanks: list | None
+        The enemies, all tanks but the agent if not given.
+
+    Returns
+    -------
+    EnemyMaps
+        The maps, with a first axis of length 0 if there are no enemies.
+    """
+    if tanks is None:
+        tanks = [tank for tank in tomasz_map.tanks if not tank.agent]
+    agent = tomasz_map.agent
+    positions = np.array([tank.pos for tank in tanks], dtype=int).reshape(-1, 2)
+    rays = compute_lines_of_fire(get_ray_lengths(tomasz_map.static), positions)
+
+    enemy_turrets = np.array([CLOCKWISE.index(tank.turret_dir) for tank in tanks], dtype=int)
+    threat_turns = _turret_turns(rays, enemy_turrets[:, None, None], opposite=False)
+
+    firing_turns = _turret_turns(rays, CLOCKWISE.index(agent.entity.turret.direction), opposite=True)
+    field = tomasz_map.distance_field()
+    walking = field.distances.astype(float)
+    walking[walking < 0] = np.inf
+    firing_ticks = np.where(firing_turns >= 0, walking + firing_turns, np.inf)
+
+    x, y = agent.position
+    distances = np.abs(positions - agent.position).sum(axis=1)
+    ticks_to_fire = firing_ticks.min(axis=(1, 2), initial=np.inf)
+    exposed = threat_turns[:, x, y] == 0
+    return EnemyMaps(tanks, rays, threat_turns, firing_ticks, distances, ticks_to_fire, exposed)
@@ -0,0 +1,150 @@
+from collections import deque
+
+from hackathon_bot import Direction
+from tomasz.map.ray_table import RayTable
+
+# observations kept per enemy
+TRACK_LENGTH = 8
+# weight of the newest observed velocity in the smoothed one
+VELOCITY_SMOOTHING = 0.5
+# tracks of enemies not seen for longer are dropped
+MAX_TRACK_AGE = 20
+# number of ticks predicted ahead
+PREDICTION_HORIZON = 5
+
+# hull direction as (delta_x, delta_y), tanks only move along their hull
+HULL_DELTAS = {
+    Direction.UP: (0, -1),
+    Direction.RIGHT: (1, 0),
+    Direction.DOWN: (0, 1),
+    Direction.LEFT: (-1, 0),
+}
+
+
+class EnemyTrack:
+    """
+    Motion of one enemy estimated from the ticks it was seen.
+
+    Attributes
+    ----------
+    key: str | (int, int)
+        Owner of the tank, its position if the owner is unknown.
+    pos: (int, int)
+        Last seen position, (x, y).
+    dir: Direction
+        Last seen hull direction.
+    turret_dir: Direction
+        Last seen turret direction.
+    tick: int
+        Tick the enemy was last seen.
+    velocity: (float, float)
+        Smoothed tiles per tick along x and y.
+    observations: deque
+        The last TRACK_LENGTH (tick, position) pairs.
+    """
+    __slots__ = ("key", "pos", "dir", "turret_dir", "tick", "velocity", "observations")
+
+    def __init__(self, key, tick: int, tank):
+        self.key = key
+        self.pos = tank.pos
+        self.dir = tank.dir
+        self.turret_dir = tank.turret_dir
+        self.tick = tick
+        self.velocity = (0.0, 0.0)
+        self.observations = deque([(tick, tank.pos)], maxlen=TRACK_LENGTH)
+
+    def update(self, tick: int, tank):
+        elapsed = tick - self.tick
+        if elapsed <= 0:
+            return
+        observed = ((tank.pos[0] - self.pos[0]) / elapsed, (tank.pos[1] - self.pos[1]) / elapsed)
+        if len(self.observations) == 1:
+            # nothing to smooth with yet
+            self.velocity = observed
+        else:
+            self.velocity = tuple(
+                VELOCITY_SMOOTHING * new + (1 - VELOCITY_SMOOTHING) * old for new, old in zip(observed, self.velocity)
+            )
+        self.pos = tank.pos
+        self.dir = tank.dir
+        self.turret_dir = tank.turret_dir
+        self.tick = tick
+        self.observations.append((tick, tank.pos))
+
+    def hull_speed(self) -> float:
+        """
+        Get the tiles per tick along the hull direction, negative when reversing.
+        """
+        dx, dy = HULL_DELTAS[self.dir]
+        speed = self.velocity[0] * dx + self.velocity[1] * dy
+        return max(-1.0, min(1.0, speed))
+
+    def predict(self, rays: RayTable, tick: int, horizon: int = PREDICTION_HORIZON) -> list:
+        """
+        Predict the positions of the enemy from the given tick on.
+
+        The enemy keeps its speed along its hull until it hits a wall. A
+        change of the hull direction stops it, the velocity along the new
+        axis builds up from the next observations.
+
+        Parameters
+        ----------
+        rays: RayTable
+            Ray table of the map.
+        tick: int
+            The current tick, the first predicted one.
+        horizon: int
+            Number of ticks predicted after the current one.
+
+        Returns
+        -------
+        list
+            Positions at the ticks tick, tick + 1, ..., tick + horizon.
+        """
+        speed = self.hull_speed()
+        dx, dy = HULL_DELTAS[self.dir]
+        if speed < 0:
+            dx, dy, speed = -dx, -dy, -speed
+        max_steps = rays.ray_length(self.pos, (dx, dy))
+
+        positions = []
+        for step in range(tick - self.tick, tick - self.tick + horizon + 1):
+            distance = min(int(round(speed * step)), max_steps)
+            positions.append((self.pos[0] + dx * distance, self.pos[1] + dy * distance))
+        return positions
+
+
+class EnemyTracker:
+    """
+    Tracks of the enemies seen in the match, one per tank owner.
+
+    Attributes
+    ----------
+    tracks: dict
+        {key: EnemyTrack}, see `EnemyTrack.key`.
+    """
+
+    def __init__(self):
+        self.tracks = {}
+
+    @staticmethod
+    def _key(tank):
+        return tank.owner_id if tank.owner_id is not None else tank.pos
+
+    def update(self, tick: int, tanks: list):
+        """
+        Add the enemy tanks seen at the tick to their tracks.
+        """
+        for tank in tanks:
+            if tank.agent:
+                continue
+            key = self._key(tank)
+            if key in self.tracks:
+                self.tracks[key].update(tick, tank)
+            else:
+                self.tracks[key] = EnemyTrack(key, tick, tank)
+        for key in [key for key, track in self.tracks.items() if tick - track.tick > MAX_TRACK_AGE]:
+            del self.tracks[key]
+
+    def get(self, tank) -> EnemyTrack | None:
+        return self.tracks.get(self._key(tank))
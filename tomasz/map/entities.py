@@ -0,0 +1,97 @@
+from typing import Tuple
+
+from hackathon_bot import Direction, ItemType, Orientation
+
+
+class TomaszEntity:
+    """
+    Compact record describing a single entity on the map.
+
+    Records are created once per parsed tile and kept by reference in
+    `TomaszMap.entities_grid` and the per-kind lists. History fields such as
+    `ticks_since_seen` are updated in place instead of copying the record.
+
+    Attributes
+    ----------
+    type: str
+        Entity kind ('wall', 'laser', 'bullet', 'tank', 'mine' or 'item').
+    pos: (int, int)
+        Position of the entity, (x, y).
+    ticks_since_seen: int
+        Number of ticks since the tile of the entity was last visible.
+    """
+    __slots__ = ("pos", "ticks_since_seen")
+    type = None
+
+    def __init__(self, pos: Tuple[int, int]):
+        self.pos = pos
+        self.ticks_since_seen = 0
+
+    def _fields(self):
+        for cls in reversed(type(self).__mro__):
+            for name in cls.__dict__.get("__slots__", ()):
+                yield name
+
+    def to_dict(self) -> dict:
+        return {"type": self.type, **{name: getattr(self, name) for name in self._fields()}}
+
+    def __repr__(self):
+        fields = ", ".join(f"{name}={getattr(self, name)!r}" for name in self._fields())
+        return f"{self.__class__.__name__}<{fields}>"
+
+
+class TomaszWall(TomaszEntity):
+    __slots__ = ()
+    type = "wall"
+
+
+class TomaszLaser(TomaszEntity):
+    __slots__ = ("ori",)
+    type = "laser"
+
+    def __init__(self, pos: Tuple[int, int], ori: Orientation):
+        super().__init__(pos)
+        self.ori = ori
+
+
+class TomaszBullet(TomaszEntity):
+    __slots__ = ("dir", "double", "speed")
+    type = "bullet"
+
+    def __init__(self, pos: Tuple[int, int], dir: Direction, double: bool, speed: float = 1.0):
+        super().__init__(pos)
+        self.dir = dir
+        self.double = double
+        self.speed = speed
+
+
+class TomaszTank(TomaszEntity):
+    __slots__ = ("agent", "dir", "turret_dir", "owner_id")
+    type = "tank"
+
+    def __init__(
+            self, pos: Tuple[int, int], agent: bool, dir: Direction, turret_dir: Direction, owner_id: str | None = None,
+    ):
+        super().__init__(pos)
+        self.agent = agent
+        self.dir = dir
+        self.turret_dir = turret_dir
+        self.owner_id = owner_id
+
+
+class TomaszMine(TomaszEntity):
+    __slots__ = ("exploded",)
+    type = "mine"
+
+    def __init__(self, pos: Tuple[int, int], exploded: bool):
+        super().__init__(pos)
+        self.exploded = exploded
+
+
+class TomaszItem(TomaszEntity):
+    __slots__ = ("item_type",)
+    type = "item"
+
+    def __init__(self, pos: Tuple[int, int], item_type: ItemType):
+        super().__init__(pos)
+        self.item_type = item_type
@@ -3,6 +3,9 @@ import json
 import numpy as np
 from typing import Tuple
 
+from tomasz.map.entities import TomaszEntity, TomaszLaser, TomaszBullet, TomaszTank, TomaszMine, TomaszItem
+from tomasz.map.static_layer import TomaszStaticLayer
+
 class TomaszZone:
     def __init__(self, game_zone):
         self.index = game_zone.index
@@ -34,16 +37,20 @@ class TomaszAgent:
 class TomaszMap:
     agent: TomaszAgent | None
 
-    def __init__(self, game_state: GameState):
+    def __init__(self, game_state: GameState, static_layer: TomaszStaticLayer | None = None):
         game_map = game_state.map
         self.game_state = game_state
         self.size = (len(game_map.tiles), len(game_map.tiles[0]))
         self.agent = None
         self.initialized = False
 
-        self.walls_arr = np.zeros(self.size, dtype=int)
+        # walls and zone tiles are parsed only when there is no static layer yet
+        self.static = static_layer
+        if static_layer is None:
+            self.walls_arr = np.zeros(self.size, dtype=int)
+        else:
+            self.walls_arr = static_layer.walls_arr
         self.visible_arr = np.zeros(self.size, dtype=int)
-        self.walls = []
         self.visible = []
         self.lasers = []
         self.bullets = []
@@ -63,45 +70,53 @@ class TomaszMap:
         for ent in [*self.lasers, *self.bullets, *self.tanks, *self.mines, *self.items]:
             yield ent
 
+    def iter_grid_entities(self):
+        # entities kept in entities_grid, in the row-major order of the grid
+        for pos in sorted({ent.pos for ent in self.iter_entities()}):
+            for ent in self.entities_grid[pos]:
+                yield ent
+
     def _add_entity(self, entity, x, y):
         if isinstance(entity, Wall):
-            entity_dict = {'type': 'wall', 'pos': (x, y)}
-            self.walls.append(entity_dict)
-            self.walls_arr[x, y] = 1
+            if self.static is None:
+                self.walls_arr[x, y] = 1
+            return
         elif isinstance(entity, Laser):
-            entity_dict = {'type': 'laser', 'pos': (x, y), 'ori': entity.orientation}
-            self.lasers.append(entity_dict)
+            record = TomaszLaser((x, y), entity.orientation)
+            self.lasers.append(record)
         elif isinstance(entity, DoubleBullet):
-            entity_dict = {'type': 'bullet', 'double':True, 'pos': (x, y), 'dir': entity.direction}
-            self.bullets.append(entity_dict)
+            record = TomaszBullet((x, y), entity.direction, double=True, speed=entity.speed)
+            self.bullets.append(record)
         elif isinstance(entity, Bullet, ):
-            entity_dict = {'type': 'bullet', 'double':False, 'pos': (x, y), 'dir': entity.direction}
-            self.bullets.append(entity_dict)
+            record = TomaszBullet((x, y), entity.direction, double=False, speed=entity.speed)
+            self.bullets.append(record)
         elif isinstance(entity, AgentTank,):
-            entity_dict = {'type': 'tank', 'agent': True, 'pos': (x, y), 'dir': entity.direction, 'turret_dir': entity.turret.direction}
+            record = TomaszTank((x, y), True, entity.direction, entity.turret.direction, entity.owner_id)
             self.agent = TomaszAgent(entity, (x, y))
-            self.tanks.append(entity_dict)
+            self.tanks.append(record)
         elif isinstance(entity, PlayerTank):
-            entity_dict = {'type': 'tank', 'agent': False, 'pos': (x, y), 'dir': entity.direction, 'turret_dir': entity.turret.direction}
-            self.tanks.append(entity_dict)
+            record = TomaszTank((x, y), False, entity.direction, entity.turret.direction, entity.owner_id)
+            self.tanks.append(record)
         elif isinstance(entity, Mine):
-            entity_dict = {'type': 'mine', 'pos': (x, y), 'exploded': entity.exploded}
-            self.mines.append(entity_dict)
+            record = TomaszMine((x, y), entity.exploded)
+            self.mines.append(record)
         elif isinstance(entity, Item):
-            entity_dict = {'type': "item", "item_type":entity.type, 'pos': (x, y)}
-            self.items.append(entity_dict)
+            record = TomaszItem((x, y), entity.type)
+            self.items.append(record)
         
-        self.entities_grid[x, y] = [entity_dict]
+        self.entities_grid[x, y] = [record]
 
 
     def _extract_map_data(self, game_map: Map):
         for zone in game_map.zones:
             idx = chr(zone.index)
             self.zones[idx] = TomaszZone(zone)
+            if self.static is not None:
+                self.zones[idx].pos = self.static.zone_tiles[idx]
 
         for y, row in enumerate(game_map.tiles):
             for x, tile in enumerate(row):
-                if tile.zone:
+                if tile.zone and self.static is None:
                     zone = self.zones[chr(tile.zone.index)]
                     zone.add_pos(x, y)
 
@@ -112,8 +127,15 @@ class TomaszMap:
                 for entity in tile.entities:
                     self._add_entity(entity, x, y)
 
+        if self.static is None:
+            zone_tiles = {idx: zone.pos for idx, zone in self.zones.items()}
+            self.static = TomaszStaticLayer(self.walls_arr, zone_tiles)
         self.initialized = True
 
+    @property
+    def walls(self):
+        return self.static.walls
+
     def _char_map(self):
         char_map = np.full(self.entities_grid.shape, " ", dtype=str)
         for idx, zone in self.zones.items():
@@ -129,7 +151,7 @@ class TomaszMap:
                     entity = entities[0]  # TODO !
                     entity_symbol = self._get_entity_symbol(entity)
                     char_map[x, y] = entity_symbol
-                elif self.visible_arr[x, y] == 1:
+                elif self.visible_arr[x, y] == 1 and not self.walls_arr[x, y]:
                     char_map[x, y] = "⬞"
 
         return char_map.T
@@ -154,24 +176,24 @@ class TomaszMap:
             ">"
         )
     
-    def _get_entity_symbol(self, entity_dict: dict):
-        entity_type = entity_dict['type']
+    def _get_entity_symbol(self, entity: TomaszEntity):
+        entity_type = entity.type
         
         if entity_type == 'wall':
             return "■"
         elif entity_type == 'laser':
-            return "|" if entity_dict['ori'] is Orientation.HORIZONTAL else "-"
+            return "|" if entity.ori is Orientation.HORIZONTAL else "-"
         elif entity_type == 'bullet':
-            return self._bullet_direction_symbol(entity_dict['dir'], is_double = entity_dict['double'])
+            return self._bullet_direction_symbol(entity.dir, is_double = entity.double)
         elif entity_type == 'tank':
-            if entity_dict['agent']:
+            if entity.agent:
                 return "✪"
             else:
                 return "☠"
         elif entity_type == 'mine':
-            return "x" if entity_dict['exploded'] else "X"
+            return "x" if entity.exploded else "X"
         elif entity_type == 'item':
-            return self._item_symbol(entity_dict["item_type"])
+            return self._item_symbol(entity.item_type)
 
         return "?"
 
@@ -201,14 +223,14 @@ class TomaszMap:
 
     def to_json(self) -> str:
         data = {
-            'walls': self.walls,  # Convert NumPy array to list for JSON serialization
+            'walls': [wall.to_dict() for wall in self.walls],
             'visible': self.visible,
-            'lasers': self.lasers,
-            'bullets': self.bullets,
-            'tanks': self.tanks,
-            'mines': self.mines,
-            'items': self.items,
-            'zones': self.zones
+            'lasers': [laser.to_dict() for laser in self.lasers],
+            'bullets': [bullet.to_dict() for bullet in self.bullets],
+            'tanks': [tank.to_dict() for tank in self.tanks],
+            'mines': [mine.to_dict() for mine in self.mines],
+            'items': [item.to_dict() for item in self.items],
+            'zones': {idx: zone.to_dict() for idx, zone in self.zones.items()}
         }
         return json.dumps(data)
     
\ No newline at end of file
@@ -1,30 +1,70 @@
 from tomasz.map import TomaszMap
 import numpy as np
 
-from tomasz.map.danger_map import get_danger, visualize_danger
+from tomasz.map.danger_forecast import FORECAST_HORIZON, get_danger_forecast
+from tomasz.map.danger_layer import DangerLayer
+from tomasz.map.danger_map import visualize_danger
+from tomasz.map.distance_field import DistanceField
+from tomasz.map.distance_table import DistanceTable, get_distance_table
+from tomasz.map.enemy_tracker import EnemyTracker
+from tomasz.map.zone_fields import ZoneFields
+from tomasz.map.walkable import compute_walkable_mask
 
 import logging
 log = logging.getLogger(__name__)
 log.disabled = False
 
 
+NEVER_SEEN = 31337
+
+
 class TomaszMapWithHistory(TomaszMap):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        self.ticks_since_seen = np.full(self.size, np.inf, dtype=int)
+        # number of updates so far, ticks since seen are derived from it lazily
+        self.tick = 0
+        self.last_seen = np.full(self.size, -NEVER_SEEN, dtype=int)
+        self.last_seen[self.visible_arr == 1] = 0
         self.last_danger_map_change = 0
         #self.max_ticks_since_seen = 10
-        self.danger = np.zeros(self.size)
-
-        self.lasers = [{**laser, "ticks_since_seen": 0} for laser in self.lasers]
-        self.bullets = [{**bullet, "ticks_since_seen": 0} for bullet in self.bullets]
-        self.tanks = [{**tank, "ticks_since_seen": 0} for tank in self.tanks]
-        self.mines = [{**mine, "ticks_since_seen": 0} for mine in self.mines]
-        self.items = [{**item, "ticks_since_seen": 0} for item in self.items]
+        self.danger_layer = DangerLayer.for_map(self)
+        self.danger = self.danger_layer.grid
+        self._forecast = None
+        self._forecast_key = None
+        # {danger_threshold: flat walkability list} for the current danger version
+        self._walkable = {}
+        self._walkable_version = None
+        self._distance_fields = {}
+        self._distance_fields_key = None
+        self._zone_fields = None
+
+        # index of remembered entities, {(x, y): entity}
+        self.remembered = {ent.pos: ent for ent in self.iter_entities()}
+        # positions of remembered entities that expire as soon as they are out of sight
+        self.transient = {pos for pos, ent in self.remembered.items() if self._is_transient(ent)}
+        # motion of the enemies, from the ticks they were seen
+        self.enemy_tracker = EnemyTracker()
+        self.enemy_tracker.update(self.tick, self.tanks)
+
+    @property
+    def ticks_since_seen(self) -> np.ndarray:
+        return self.tick - self.last_seen
+
+    def iter_grid_entities(self):
+        for pos in sorted(self.remembered):
+            for ent in self.entities_grid[pos]:
+                yield ent
+
+    @staticmethod
+    def _is_transient(entity) -> bool:
+        # we dont want to remember bullets and lasers that are not visible
+        # and we dont want to remember our own previous position
+        return entity.type in ['bullet', 'laser'] or entity.type == 'tank' and entity.agent
         
     def update(self, new_map: TomaszMap):
         self._update_entities_lists(new_map)
         self._update_entities_grid(new_map)
+        self.enemy_tracker.update(self.tick, new_map.tanks)
         self._update_clenup()
         self._update_danger()
         self.game_state = new_map.game_state
@@ -41,64 +81,137 @@ class TomaszMapWithHistory(TomaszMap):
         self.tanks = []
         self.mines = []
         self.items = []
-        for i in range(self.size[0]):
-            for j in range(self.size[1]):
-                for ent in self.entities_grid[i, j]:
-                    since_seen = int(self.ticks_since_seen[i, j])
-                    if since_seen < 0:
-                        since_seen = 31337
-                        #ovefrflow fix
-                    if ent['type'] == 'laser':
-                        self.lasers.append({**ent, "ticks_since_seen": since_seen})
-                    elif ent['type'] == 'bullet':
-                        self.bullets.append({**ent, "ticks_since_seen": since_seen})
-                    elif ent['type'] == 'tank':
-                        self.tanks.append({**ent, "ticks_since_seen": since_seen})
-                    elif ent['type'] == 'mine':
-                        self.mines.append({**ent, "ticks_since_seen": since_seen})
-                    elif ent['type'] == 'item':
-                        self.items.append({**ent, "ticks_since_seen": since_seen})
+        for pos in sorted(self.remembered):
+            ent = self.remembered[pos]
+            ent.ticks_since_seen = int(self.tick - self.last_seen[pos])
+            if ent.type == 'laser':
+                self.lasers.append(ent)
+            elif ent.type == 'bullet':
+                self.bullets.append(ent)
+            elif ent.type == 'tank':
+                self.tanks.append(ent)
+            elif ent.type == 'mine':
+                self.mines.append(ent)
+            elif ent.type == 'item':
+                self.items.append(ent)
     
     def _update_entities_grid(self, new_map: TomaszMap):
         # TODO bullets and lasers may need special handling
-        self.ticks_since_seen += 1
-        for (x, y) in new_map.visible:
-            self.ticks_since_seen[x, y] = 0
-            self.entities_grid[x, y] = []
+        self.tick += 1
+        if new_map.visible:
+            xs, ys = np.array(new_map.visible).T
+            self.last_seen[xs, ys] = self.tick
+
+        # forget remembered entities whose tiles are visible again, they are re-added below if still there
+        for pos in [pos for pos in self.remembered if new_map.visible_arr[pos]]:
+            self._forget(pos)
 
         for entity in new_map.iter_entities():
-            x, y = entity['pos']
-            self.ticks_since_seen[x, y] = 0
+            x, y = entity.pos
+            self.last_seen[x, y] = self.tick
 
             self.entities_grid[x, y] = [entity]
+            self.remembered[x, y] = entity
+            if self._is_transient(entity):
+                self.transient.add((x, y))
 
     def _update_clenup(self):
-        for x in range(self.size[0]):
-            for y in range(self.size[1]):
-                if self.ticks_since_seen[x, y] > 0 and len(self.entities_grid[x, y]) > 0:
-                    entities = self.entities_grid[x, y]
-                    entity = entities[0]
-
-                    if entity['type'] in ['bullet', 'laser']:
-                        # we dont want to remember bullets and lasers that are not visible
-                        self.entities_grid[x, y] = []
-                    if entity['type'] == 'tank' and entity['agent']:
-                        # we dont want to remember our own previous position
-                        self.entities_grid[x, y] = []
+        for pos in [pos for pos in self.transient if self.last_seen[pos] != self.tick]:
+            self._forget(pos)
+
+    def _forget(self, pos):
+        self.entities_grid[pos] = []
+        del self.remembered[pos]
+        self.transient.discard(pos)
 
     def _update_danger(self):
-        danger = get_danger(self)
-        if np.any(self.danger - danger != 0): 
+        if self.danger_layer.update_from_map(self):
             log.info("Danger map has changed")
             # danger map has changed
             self.last_danger_map_change = 0
         else:
             self.last_danger_map_change += 1
-
-        self.danger = danger
             
         return 
 
+    @property
+    def danger_version(self) -> int:
+        return self.danger_layer.version
+
+    def danger_forecast(self, horizon: int = FORECAST_HORIZON) -> np.ndarray:
+        """
+        Bullet danger over the next ticks, computed at most once per tick.
+        See `get_danger_forecast`.
+        """
+        key = (self.tick, horizon)
+        if self._forecast_key != key:
+            self._forecast = get_danger_forecast(self, horizon)
+            self._forecast_key = key
+        return self._forecast
+
+    def walkable_mask(self, danger_threshold: float = 0.2) -> list:
+        """
+        Flat walkability of the tiles, indexed by x * H + y, computed at most
+        once per danger map version and threshold.
+        See `get_walkable_mask`.
+        """
+        if self._walkable_version != self.danger_version:
+            self._walkable = {}
+            self._walkable_version = self.danger_version
+        if danger_threshold not in self._walkable:
+            self._walkable[danger_threshold] = compute_walkable_mask(self.walls_arr, self.danger, danger_threshold)
+        return self._walkable[danger_threshold]
+
+    def distance_field(self, danger_threshold: float = 0.2) -> DistanceField | None:
+        """
+        Walking distances and shortest paths from the agent to every tile,
+        computed at most once per tick, danger map version and threshold.
+        Tiles with walls or danger above the threshold are not entered.
+
+        Returns
+        -------
+        DistanceField | None
+            None if the agent is not on the map.
+        """
+        if not self.agent:
+            return None
+        key = (self.tick, self.danger_version, self.agent.position)
+        if self._distance_fields_key != key:
+            self._distance_fields = {}
+            self._distance_fields_key = key
+        if danger_threshold not in self._distance_fields:
+            walkable = (self.walls_arr == 0) & (self.danger <= danger_threshold)
+            self._distance_fields[danger_threshold] = DistanceField(walkable, self.agent.position)
+        return self._distance_fields[danger_threshold]
+
+    def zone_field(self, zone_idx: str, danger_threshold: float = 0.2) -> DistanceField:
+        """
+        Walking distances from every tile to the zone and the way to it,
+        avoiding tiles with danger above the threshold except the agent's.
+        See `ZoneFields.get`.
+        """
+        if self._zone_fields is None:
+            self._zone_fields = ZoneFields(self.static)
+        open_tile = self.agent.position if self.agent else None
+        return self._zone_fields.get(zone_idx, self.danger, danger_threshold, open_tile)
+
+    def distance_table(self) -> DistanceTable | None:
+        """
+        All-pairs walking distances around the walls, None until the background
+        build started by `start_distance_table` is done.
+        """
+        return get_distance_table(self.static)
+
+    def walls_distance(self, pos1, pos2) -> float:
+        """
+        Walking distance between two tiles ignoring danger, read from the
+        distance table. The Manhattan distance while the table is not ready.
+        """
+        table = self.distance_table()
+        if table is None:
+            return abs(pos1[0] - pos2[0]) + abs(pos1[1] - pos2[1])
+        return table.distance(pos1, pos2)
+
     def __repr__(self):
         return (
             "TomaszMapWithHistory<"
@@ -114,8 +227,7 @@ class TomaszMapWithHistory(TomaszMap):
         )
     
     def pretty_print(self):
-        danger_map = get_danger(self)
-        char_map = visualize_danger(danger_map)
+        char_map = visualize_danger(self.danger)
 
         og_char_map = self._char_map()
         
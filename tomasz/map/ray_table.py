@@ -0,0 +1,192 @@
+from collections import OrderedDict
+
+import numpy as np
+
+# ray directions as (delta_x, delta_y), the index is the last axis of the ray lengths table
+RAY_DELTAS = ((-1, 0), (1, 0), (0, -1), (0, 1))
+RAY_INDEX = {delta: k for k, delta in enumerate(RAY_DELTAS)}
+# number of sight masks kept per static layer
+SIGHT_MASK_CACHE_SIZE = 64
+
+
+def compute_ray_lengths(walls_arr: np.ndarray) -> np.ndarray:
+    """
+    Compute the free run length from every tile in every ray direction.
+
+    Parameters
+    ----------
+    walls_arr: np.ndarray
+        Occupancy grid, 1 for walls. Indexed [x, y].
+
+    Returns
+    -------
+    np.ndarray
+        Array of shape (W, H, 4), number of tiles a ray starting at [x, y]
+        (start tile excluded) passes in direction RAY_DELTAS[k] before it hits
+        a wall or leaves the map.
+    """
+    free = walls_arr == 0
+    width, height = walls_arr.shape
+    lengths = np.zeros((width, height, 4), dtype=np.int32)
+
+    # a ray from x continues through x + delta only if that tile is free
+    for x in range(1, width):
+        lengths[x, :, 0] = np.where(free[x - 1], lengths[x - 1, :, 0] + 1, 0)
+    for x in range(width - 2, -1, -1):
+        lengths[x, :, 1] = np.where(free[x + 1], lengths[x + 1, :, 1] + 1, 0)
+    for y in range(1, height):
+        lengths[:, y, 2] = np.where(free[:, y - 1], lengths[:, y - 1, 2] + 1, 0)
+    for y in range(height - 2, -1, -1):
+        lengths[:, y, 3] = np.where(free[:, y + 1], lengths[:, y + 1, 3] + 1, 0)
+
+    return lengths
+
+
+def get_ray_lengths(static_layer) -> np.ndarray:
+    """
+    Get the ray lengths table of the static layer, computed once per match.
+    """
+    return static_layer.get_table("ray_lengths", lambda static: compute_ray_lengths(static.walls_arr))
+
+
+def ray_view(grid: np.ndarray, start_pos, delta, length: int) -> np.ndarray:
+    """
+    Get a view of `length` tiles of `grid` along a ray, start tile excluded.
+
+    The view is ordered from the start outwards and writes go to `grid`.
+    """
+    x, y = start_pos
+    dx, dy = delta
+    if dx == 1:
+        return grid[x + 1:x + 1 + length, y]
+    if dx == -1:
+        return grid[x - length:x, y][::-1]
+    if dy == 1:
+        return grid[x, y + 1:y + 1 + length]
+    return grid[x, y - length:y][::-1]
+
+
+class RayTable:
+    """
+    Per-tile, per-direction free run lengths with ray queries on top of them.
+
+    Every ray operation is a lookup in the table plus a slice of the grid.
+
+    Attributes
+    ----------
+    lengths: np.ndarray
+        Ray lengths, see `compute_ray_lengths`.
+    size: (int, int)
+        Size of the map.
+    """
+
+    def __init__(self, lengths: np.ndarray):
+        self.lengths = lengths
+        self.size = lengths.shape[:2]
+
+    def ray_length(self, start_pos, delta, max_steps: int | None = None) -> int:
+        length = int(self.lengths[start_pos][RAY_INDEX[delta]])
+        if max_steps is not None:
+            length = min(length, max_steps)
+        return length
+
+    def view(self, grid: np.ndarray, start_pos, delta, max_steps: int | None = None) -> np.ndarray:
+        """
+        Get a writable view of `grid` along the ray, start tile excluded.
+        """
+        return ray_view(grid, start_pos, delta, self.ray_length(start_pos, delta, max_steps))
+
+    def ray_cells(self, start_pos, delta, max_steps: int | None = None):
+        """
+        Get the tiles of the ray, start tile excluded, ordered outwards.
+
+        Returns
+        -------
+        (np.ndarray, np.ndarray)
+            The x and y coordinates of the tiles, usable as a grid index.
+        """
+        steps = np.arange(1, self.ray_length(start_pos, delta, max_steps) + 1)
+        return start_pos[0] + delta[0] * steps, start_pos[1] + delta[1] * steps
+
+    def line_of_sight(self, pos1, pos2) -> bool:
+        """
+        Check if a straight ray from pos1 reaches pos2 without hitting a wall.
+        """
+        dx, dy = pos2[0] - pos1[0], pos2[1] - pos1[1]
+        if dx == 0 and dy == 0:
+            return True
+        if dx != 0 and dy != 0:
+            return False
+        distance = abs(dx) + abs(dy)
+        delta = (int(np.sign(dx)), int(np.sign(dy)))
+        return distance <= self.ray_length(pos1, delta)
+
+    def sight_mask(self, pos) -> np.ndarray:
+        """
+        Get the tiles that have a line of sight to pos, pos included.
+        """
+        mask = np.zeros(self.size, dtype=bool)
+        for delta in RAY_DELTAS:
+            self.view(mask, pos, delta)[:] = True
+        mask[pos] = True
+        return mask
+
+
+def get_ray_table(static_layer) -> RayTable:
+    """
+    Get the ray table of the static layer, computed once per match.
+    """
+    return RayTable(get_ray_lengths(static_layer))
+
+
+class SightMaskCache:
+    """
+    Least recently used sight masks of a ray table, keyed by position.
+
+    The masks only depend on the walls, so they stay valid for the whole
+    match. They are shared between callers and are read-only.
+
+    Attributes
+    ----------
+    rays: RayTable
+        Ray table the masks are computed with.
+    max_size: int
+        Number of masks kept.
+    hits: int
+        Number of masks returned from the cache.
+    misses: int
+        Number of masks computed.
+    """
+
+    def __init__(self, rays: RayTable, max_size: int = SIGHT_MASK_CACHE_SIZE):
+        self.rays = rays
+        self.max_size = max_size
+        self.masks = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, pos) -> np.ndarray:
+        """
+        Get the tiles that have a line of sight to pos, see `RayTable.sight_mask`.
+        """
+        pos = (int(pos[0]), int(pos[1]))
+        mask = self.masks.get(pos)
+        if mask is not None:
+            self.hits += 1
+            self.masks.move_to_end(pos)
+            return mask
+
+        self.misses += 1
+        mask = self.rays.sight_mask(pos)
+        mask.setflags(write=False)
+        self.masks[pos] = mask
+        if len(self.masks) > self.max_size:
+            self.masks.popitem(last=False)
+        return mask
+
+
+def get_sight_masks(static_layer) -> SightMaskCache:
+    """
+    Get the sight mask cache of the static layer, kept for the whole match.
+    """
+    return static_layer.get_object("sight_masks", lambda static: SightMaskCache(get_ray_table(static)))
@@ -0,0 +1,215 @@
+import hashlib
+import logging
+import os
+from typing import Callable, Dict, List, Tuple
+
+import numpy as np
+
+from hackathon_bot import *
+from tomasz.map.entities import TomaszWall
+
+log = logging.getLogger(__name__)
+log.disabled = False
+
+
+def get_wall_hash(walls_arr: np.ndarray) -> str:
+    """
+    Get the hash identifying a wall layout, the same for the same walls and size.
+    """
+    return hashlib.sha1(
+        np.ascontiguousarray(walls_arr, dtype=np.uint8).tobytes() + str(walls_arr.shape).encode()
+    ).hexdigest()
+
+
+class TomaszStaticLayer:
+    """
+    The part of the map that never changes during a match.
+
+    Holds the walls, the zone geometry and every table derived from them
+    (ray lengths, distance fields...). It is built once, on the first tick,
+    and shared by all the maps of the match, also across respawns.
+
+    Attributes
+    ----------
+    walls_arr: np.ndarray
+        Occupancy grid, 1 for walls. Indexed [x, y].
+    walls: list
+        Wall records.
+    zone_tiles: dict
+        Tiles of every zone, {zone_idx: [(x, y), ...]}.
+    zone_masks: dict
+        Boolean mask of every zone, {zone_idx: np.ndarray}.
+    seed: int | None
+        Seed of the match the layer was built for, if known.
+    tables: dict
+        Derived arrays, saved with the layer.
+    objects: dict
+        Derived objects that are not arrays, kept in memory only.
+    """
+
+    def __init__(self, walls_arr: np.ndarray, zone_tiles: Dict[str, List[Tuple[int, int]]], seed: int | None = None):
+        self.walls_arr = walls_arr
+        self.size = walls_arr.shape
+        self.walls = [TomaszWall((int(x), int(y))) for x, y in np.argwhere(walls_arr)]
+        self.zone_tiles = zone_tiles
+        self.zone_masks = {}
+        for idx, tiles in zone_tiles.items():
+            mask = np.zeros(self.size, dtype=bool)
+            for pos in tiles:
+                mask[pos] = True
+            self.zone_masks[idx] = mask
+        self.seed = seed
+        self.wall_hash = get_wall_hash(walls_arr)
+        self.tables = {}
+        self.objects = {}
+
+    @classmethod
+    def from_game_state(cls, game_state: GameState, seed: int | None = None):
+        game_map = game_state.map
+        size = (len(game_map.tiles), len(game_map.tiles[0]))
+        walls_arr = np.zeros(size, dtype=int)
+        zone_tiles = {chr(zone.index): [] for zone in game_map.zones}
+
+        for y, row in enumerate(game_map.tiles):
+            for x, tile in enumerate(row):
+                if tile.zone:
+                    zone_tiles[chr(tile.zone.index)].append((x, y))
+                if any(isinstance(entity, Wall) for entity in tile.entities):
+                    walls_arr[x, y] = 1
+
+        return cls(walls_arr, zone_tiles, seed)
+
+    def get_table(self, name: str, build: Callable[["TomaszStaticLayer"], np.ndarray]) -> np.ndarray:
+        """
+        Get a table derived from the static layer, building it on first use.
+
+        Parameters
+        ----------
+        name: str
+            Name of the table, also used as its key in the saved file.
+        build: Callable[[TomaszStaticLayer], np.ndarray]
+            Function building the table.
+
+        Returns
+        -------
+        np.ndarray
+            The cached table.
+        """
+        if name not in self.tables:
+            self.tables[name] = build(self)
+        return self.tables[name]
+
+    def get_object(self, name: str, build: Callable[["TomaszStaticLayer"], object]) -> object:
+        """
+        Get an object derived from the static layer, building it on first use.
+        Unlike tables, objects are not saved.
+        """
+        if name not in self.objects:
+            self.objects[name] = build(self)
+        return self.objects[name]
+
+    def save(self, path: str):
+        arrays = {f"table_{name}": table for name, table in self.tables.items()}
+        np.savez(
+            path,
+            walls_arr=self.walls_arr,
+            wall_hash=np.array(self.wall_hash),
+            **arrays,
+        )
+
+    def load_tables(self, path: str) -> bool:
+        """
+        Load derived tables saved for the same walls.
+
+        Returns
+        -------
+        bool
+            True if the file matched the walls of this layer and was loaded.
+        """
+        with np.load(path) as data:
+            if str(data["wall_hash"]) != self.wall_hash:
+                return False
+            for key in data.files:
+                if key.startswith("table_"):
+                    self.tables[key[len("table_"):]] = data[key]
+        return True
+
+
+# static layers of the matches played by this process, {seed: layer}
+_static_layers = {}
+
+
+def _cache_path(cache_dir: str, seed: int) -> str:
+    return os.path.join(cache_dir, f"static_layer_{seed}.npz")
+
+
+def load_saved_walls(cache_dir: str, seed: int) -> np.ndarray | None:
+    """
+    Get the walls of the static layer saved for a seed, before the first tick of its match.
+
+    Returns
+    -------
+    np.ndarray | None
+        The walls, None if no layer was saved for the seed.
+    """
+    path = _cache_path(cache_dir, seed)
+    if not os.path.exists(path):
+        return None
+    try:
+        with np.load(path) as data:
+            return data["walls_arr"]
+    except (OSError, ValueError, KeyError) as e:
+        log.warning(f"Failed to load static layer from {path}: {e}")
+        return None
+
+
+def get_static_layer(game_state: GameState, seed: int | None = None, cache_dir: str | None = None) -> TomaszStaticLayer:
+    """
+    Get the static layer of the match, building it if needed.
+
+    Layers are kept in memory by seed. When `cache_dir` is given, the derived
+    tables of a previous match on the same map are loaded from disk.
+
+    Parameters
+    ----------
+    game_state: GameState
+        Any game state of the match.
+    seed: int | None
+        Seed of the match from the server settings.
+    cache_dir: str | None
+        Directory with saved static layers.
+
+    Returns
+    -------
+    TomaszStaticLayer
+    """
+    layer = _static_layers.get(seed) if seed is not None else None
+    size = (len(game_state.map.tiles), len(game_state.map.tiles[0]))
+    if layer is not None and layer.size == size:
+        return layer
+
+    layer = TomaszStaticLayer.from_game_state(game_state, seed)
+    if seed is None:
+        return layer
+
+    if cache_dir:
+        path = _cache_path(cache_dir, seed)
+        if os.path.exists(path):
+            try:
+                if layer.load_tables(path):
+                    log.info(f"Loaded static layer tables from {path}")
+            except (OSError, ValueError, KeyError) as e:
+                log.warning(f"Failed to load static layer from {path}: {e}")
+
+    _static_layers[seed] = layer
+    return layer
+
+
+def save_static_layer(layer: TomaszStaticLayer, cache_dir: str):
+    """
+    Save the static layer with all its derived tables, keyed by its seed.
+    """
+    if layer.seed is None:
+        return
+    os.makedirs(cache_dir, exist_ok=True)
+    layer.save(_cache_path(cache_dir, layer.seed))
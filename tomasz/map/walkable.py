@@ -0,0 +1,23 @@
+import numpy as np
+
+
+def compute_walkable_mask(walls_arr: np.ndarray, danger: np.ndarray, danger_threshold: float = 0.2) -> list:
+    """
+    Compute the walkability of every tile as a flat list.
+
+    Parameters
+    ----------
+    walls_arr: np.ndarray
+        Occupancy grid, 1 for walls. Indexed [x, y].
+    danger: np.ndarray
+        Danger map of the same shape.
+    danger_threshold: float
+        Tiles with a higher danger are not walkable.
+
+    Returns
+    -------
+    list
+        True for walkable tiles, tile (x, y) is at index x * H + y.
+        A list is used because it is the fastest to index one tile at a time.
+    """
+    return ((walls_arr == 0) & (danger <= danger_threshold)).ravel().tolist()
@@ -0,0 +1,157 @@
+import numpy as np
+
+from tomasz.map.distance_field import UNREACHABLE, DistanceField, compute_distance_field
+
+
+def get_zone_order(static_layer) -> list:
+    """
+    Get the zone indices in the order of the zone tables.
+    """
+    return sorted(static_layer.zone_tiles)
+
+
+def _get_zone_sources(static_layer, zone_idx, walkable):
+    return [pos for pos in static_layer.zone_tiles[zone_idx] if walkable[pos]]
+
+
+def compute_zone_table(static_layer) -> np.ndarray:
+    """
+    Compute the walking distance from every tile to every zone over the walls only.
+
+    Returns
+    -------
+    np.ndarray
+        Array of shape (Z, 2, W * H) with the flat distances and parent
+        pointers of every zone in `get_zone_order`, see `compute_distance_field`.
+    """
+    walkable = static_layer.walls_arr == 0
+    width, height = static_layer.size
+    zones = get_zone_order(static_layer)
+    table = np.zeros((len(zones), 2, width * height), dtype=np.int32)
+    for k, zone_idx in enumerate(zones):
+        distances, parents = compute_distance_field(walkable, _get_zone_sources(static_layer, zone_idx, walkable))
+        table[k, 0], table[k, 1] = distances.ravel(), parents
+    return table
+
+
+def get_zone_table(static_layer) -> np.ndarray:
+    """
+    Get the zone distances table of the static layer, computed once per match.
+    """
+    return static_layer.get_table("zone_fields", compute_zone_table)
+
+
+def _is_path_clear(field: DistanceField, pos, blocked: np.ndarray) -> bool:
+    return not any(blocked[tile] for tile in field.path_from(pos))
+
+
+def _is_field_outdated(field: DistanceField, cached_blocked: np.ndarray, blocked: np.ndarray, open_tile) -> bool:
+    """
+    Check if tiles blocked or freed since the field was grown can change it.
+
+    A freed tile matters only next to a tile the field reaches. A blocked one
+    matters on the path from the open tile, or anywhere the field reaches
+    without an open tile. A field not reaching the open tile is grown again.
+    """
+    if open_tile is not None and field.distances[open_tile] == UNREACHABLE:
+        # grown while the open tile was cut off, maybe blocked itself
+        return True
+    freed = cached_blocked & ~blocked
+    if freed.any():
+        reached = field.distances != UNREACHABLE
+        next_to_reached = np.zeros_like(reached)
+        next_to_reached[1:, :] |= reached[:-1, :]
+        next_to_reached[:-1, :] |= reached[1:, :]
+        next_to_reached[:, 1:] |= reached[:, :-1]
+        next_to_reached[:, :-1] |= reached[:, 1:]
+        if (freed & next_to_reached).any():
+            return True
+
+    newly_blocked = blocked & ~cached_blocked
+    if not newly_blocked.any():
+        return False
+    if open_tile is not None:
+        return not _is_path_clear(field, open_tile, newly_blocked)
+    return bool((newly_blocked & (field.distances != UNREACHABLE)).any())
+
+
+class ZoneFields:
+    """
+    Flow fields leading to the closest walkable tile of every capture zone.
+
+    The fields over the walls are built once per match in the static layer.
+    Danger only makes paths longer, so the field over the walls is kept
+    while the path from the open tile avoids the blocked tiles. Otherwise a
+    field is grown around them, and grown again only when the tiles blocked
+    or freed since then can change it.
+
+    Attributes
+    ----------
+    static_layer: TomaszStaticLayer
+        The walls and zones of the match.
+    rebuilds: int
+        Number of fields grown around danger.
+    """
+
+    def __init__(self, static_layer):
+        self.static_layer = static_layer
+        self.zones = get_zone_order(static_layer)
+        table = get_zone_table(static_layer)
+        walkable = static_layer.walls_arr == 0
+        self.static_fields = {}
+        for k, zone_idx in enumerate(self.zones):
+            sources = _get_zone_sources(static_layer, zone_idx, walkable)
+            distances = table[k, 0].reshape(static_layer.size)
+            self.static_fields[zone_idx] = DistanceField(None, sources, distances, table[k, 1])
+        # {(danger_threshold, zone_idx): (blocked mask, DistanceField)}
+        self._fields = {}
+        self.rebuilds = 0
+
+    def get(self, zone_idx: str, danger: np.ndarray | None = None, danger_threshold: float = 0.2,
+            open_tile=None) -> DistanceField:
+        """
+        Get the field of a zone, tiles with danger above the threshold are not entered.
+
+        With an open tile the field is exact for the open tile, other tiles
+        may get a path that crosses danger.
+
+        Parameters
+        ----------
+        zone_idx: str
+            Zone index, as in `TomaszMap.zones`.
+        danger: np.ndarray | None
+            Current danger map, the walls only field is returned if not given.
+        danger_threshold: float
+            Tiles with a higher danger are blocked.
+        open_tile: (int, int) | None
+            Tile never blocked by danger, usually the one of the agent, so
+            that there is a way out of it.
+
+        Returns
+        -------
+        DistanceField
+            Distances to the zone, `path_from` walks to it.
+        """
+        static_field = self.static_fields[zone_idx]
+        if danger is None:
+            return static_field
+        blocked = (danger > danger_threshold) & (self.static_layer.walls_arr == 0)
+        if open_tile is not None:
+            blocked[open_tile] = False
+            if _is_path_clear(static_field, open_tile, blocked):
+                return static_field
+        if not blocked.any():
+            return static_field
+
+        key = (danger_threshold, zone_idx)
+        if key in self._fields:
+            cached_blocked, field = self._fields[key]
+            if not _is_field_outdated(field, cached_blocked, blocked, open_tile):
+                self._fields[key] = (blocked, field)
+                return field
+
+        walkable = (self.static_layer.walls_arr == 0) & ~blocked
+        field = DistanceField(walkable, _get_zone_sources(self.static_layer, zone_idx, walkable))
+        self._fields[key] = (blocked, field)
+        self.rebuilds += 1
+        return field
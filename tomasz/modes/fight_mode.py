@@ -11,7 +11,7 @@ class FightMode(Mode):
     closest_tank = None
 
     def get_priority(self, tomasz_map, my_bot):
-        self.closest_tank = my_bot.alignment.get_closest_enemy()
+        self.closest_tank = my_bot.alignment.get_best_target()
 
         if self.closest_tank and tomasz_map.agent.entity.turret.bullet_count > 0:
             return 1
@@ -20,12 +20,15 @@ class FightMode(Mode):
 
     def get_action(self, tomasz_map, my_bot):
         if self.closest_tank:
-            my_bot.alignment.set_target(self.closest_tank["pos"])
+            my_bot.alignment.set_target(my_bot.alignment.get_aim_point(self.closest_tank))
 
         alignment_action = my_bot.alignment.get_action()
         if alignment_action:
             return alignment_action
-        
+        if my_bot.alignment.is_holding_fire():
+            # the enemy is not there yet, the bullet would pass in front of it
+            return None
+
         if tomasz_map.agent.entity.secondary_item:
             weapon_kurwa = tomasz_map.agent.entity.secondary_item
             return AbilityUse(Ability(weapon_kurwa))
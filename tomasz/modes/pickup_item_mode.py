@@ -1,7 +1,7 @@
 import logging
 
 from hackathon_bot import ItemType, Pass
-from tomasz.map import TomaszMapWithHistory, TomaszAgent
+from tomasz.map import TomaszMapWithHistory
 from tomasz.modes.mode import Mode
 
 log = logging.getLogger(__name__)
@@ -23,8 +23,11 @@ def get_item_priority(item_type: ItemType):
     return ITEM_PRIORITIES.get(item_type, 0)
 
 
-def get_item_distance(item, agent: TomaszAgent):
-    return abs(item['pos'][0] - agent.position[0]) + abs(item['pos'][1] - agent.position[1])
+def get_item_distance(item, tomasz_map: TomaszMapWithHistory):
+    """
+    Get the walking distance from the agent to the item, inf if it can not be reached.
+    """
+    return tomasz_map.distance_field().distance(item.pos)
 
 
 def get_closest_item(tomasz_map: TomaszMapWithHistory):
@@ -32,16 +35,18 @@ def get_closest_item(tomasz_map: TomaszMapWithHistory):
     closest_distance = float('inf')
     if tomasz_map.agent:
         for item in tomasz_map.items:
-            distance = get_item_distance(item, tomasz_map.agent)
+            distance = get_item_distance(item, tomasz_map)
             if distance < closest_distance:
                 closest_distance = distance
                 closest_item = item
     return closest_item
 
 
-def get_item_distance_priority(item, agent: TomaszAgent):
-    distance = get_item_distance(item, agent)
-    if distance <= 1:
+def get_item_distance_priority(item, tomasz_map: TomaszMapWithHistory):
+    distance = get_item_distance(item, tomasz_map)
+    if distance == float('inf'):
+        return 0
+    elif distance <= 1:
         return 1
     elif distance <= 2:
         return 0.8
@@ -53,7 +58,7 @@ def get_item_distance_priority(item, agent: TomaszAgent):
         return 0.3
 
 def get_item_age_priority(item):
-    return max(0, 1 - item["ticks_since_seen"] / 100)
+    return max(0, 1 - item.ticks_since_seen / 100)
 
 
 
@@ -70,14 +75,14 @@ class PickUpItemMode(Mode):
         best_item = None
         best_priority = 0
         for item in tomasz_map.items:
-            item_priority = get_item_priority(item["item_type"])
-            distance_priority = get_item_distance_priority(item, tomasz_map.agent)
+            item_priority = get_item_priority(item.item_type)
+            distance_priority = get_item_distance_priority(item, tomasz_map)
             age_priority = get_item_age_priority(item)
             priority = item_priority * distance_priority * age_priority
 
-            if item["pos"] in self.forget_items:
-                if tomasz_map.game_state.tick - self.forget_items[item["pos"]] > 100:
-                    del self.forget_items[item["pos"]]
+            if item.pos in self.forget_items:
+                if tomasz_map.game_state.tick - self.forget_items[item.pos] > 100:
+                    del self.forget_items[item.pos]
                 else:
                     continue
 
@@ -97,18 +102,18 @@ class PickUpItemMode(Mode):
             if my_bot.movement.path_finding_failed:
                 log.warning("Path finding failed clearing best_item")
                 # forget this item for a while
-                self.forget_items[self.best_item["pos"]] = tomasz_map.game_state.tick
+                self.forget_items[self.best_item.pos] = tomasz_map.game_state.tick
                 self.best_item = None
                 return 0
-            return get_item_distance_priority(self.best_item, tomasz_map.agent)
+            return get_item_distance_priority(self.best_item, tomasz_map)
         else:
             log.info("No items found")
         return 0
 
     def get_action(self, tomasz_map, my_bot):
         if self.best_item and my_bot.movement:
-            log.info(f"Moving to item: {self.best_item['type']}, at: {self.best_item['pos'][1]}, {self.best_item['pos'][0]}")
-            my_bot.movement.target = self.best_item['pos']
+            log.info(f"Moving to item: {self.best_item.type}, at: {self.best_item.pos[1]}, {self.best_item.pos[0]}")
+            my_bot.movement.target = self.best_item.pos
 
             return my_bot.movement.get_action(tomasz_map.agent)
 
@@ -33,12 +33,43 @@ def are_all_zones_captured(tomasz_map):
     return all_captured
 
 
+def get_zone_tiles(tomasz_map, zone):
+    """
+    Get the tiles of the zone a tank can stand on, walls and danger excluded.
+    """
+    return [pos for pos in tomasz_map.zones[chr(zone.index)].pos if is_walkable(tomasz_map, pos, 0)]
+
+
+def get_tile_distance(tomasz_map, pos):
+    """
+    Key ranking tiles by walking distance from the agent, tiles cut off by
+    danger come last, ordered by their walking distance around the walls
+    and then by their Manhattan distance.
+    """
+    my_pos = tomasz_map.agent.position
+    return (
+        tomasz_map.distance_field().distance(pos),
+        tomasz_map.walls_distance(my_pos, pos),
+        distance_l1(my_pos, pos),
+    )
+
+
+def get_zone_distance(tomasz_map, zone):
+    """
+    Key ranking zones by walking distance from the agent, read from the zone
+    flow field. Unreachable zones come last, ordered by the Manhattan distance
+    to their corner.
+    """
+    my_pos = tomasz_map.agent.position
+    return tomasz_map.zone_field(chr(zone.index)).distance(my_pos), distance_l1(my_pos, (zone.x, zone.y))
+
+
 def get_closest_zone(tomasz_map):
     closest_zone = None
-    closest_distance = float('inf')
+    closest_distance = (float('inf'), float('inf'))
     if tomasz_map.agent:
         for zone in tomasz_map.game_state.map.zones:
-            distance = abs(zone.x - tomasz_map.agent.position[0]) + abs(zone.y - tomasz_map.agent.position[1])
+            distance = get_zone_distance(tomasz_map, zone)
             if distance < closest_distance:
                 if isinstance(zone, CapturedZone):
                     if zone.player_id == tomasz_map.game_state.my_agent.id:
@@ -51,14 +82,17 @@ def get_closest_zone(tomasz_map):
 def get_closest_tile_at_zone(tomasz_map, zone) -> Tuple[int, int]:
     zone_pos = tomasz_map.zones[chr(zone.index)].pos
     my_pos = tomasz_map.agent.position
+
+    # the zone flow field ends on the closest zone tile
+    path = tomasz_map.zone_field(chr(zone.index)).path_from(my_pos)
+    closest_pos = path[-1] if path else my_pos
+    if closest_pos in zone_pos and is_walkable(tomasz_map, closest_pos, 0):
+        return zone_pos, closest_pos
+
     closest_pos = None
-    for pos in zone_pos:
-        if not is_walkable(tomasz_map, pos, 0):
-            continue
-        if not closest_pos:
-            closest_pos = pos
-        elif distance_l1(my_pos, pos) < distance_l1(my_pos, closest_pos):
-            closest_pos = pos
+    tiles = get_zone_tiles(tomasz_map, zone)
+    if tiles:
+        closest_pos = min(tiles, key=lambda pos: get_tile_distance(tomasz_map, pos))
     return zone_pos, closest_pos
 
 
@@ -1,76 +1,32 @@
 import logging
-import random
-from typing import Tuple
+from collections import deque
 
-from hackathon_bot import Movement, Rotation, MovementDirection, Direction, RotationDirection
-from tomasz.a_star import a_star
+from hackathon_bot import Movement, Rotation, Direction, RotationDirection
+from tomasz.a_star import a_star, euclidean_distance, get_walkable_mask
 from tomasz.map import TomaszAgent, TomaszMap, TomaszMapWithHistory
+from tomasz.map.danger_forecast import get_arrival_danger
+from tomasz.pathfinding.ara_star import ara_star
+from tomasz.pathfinding.d_star_lite import DStarLite
+from tomasz.pathfinding.danger_weighted_a_star import DANGER_PENALTY, danger_weighted_a_star
+from tomasz.pathfinding.hpa_star import hpa_star
+from tomasz.pathfinding.jps import jps
+from tomasz.pathfinding.oriented_a_star import compile_path, get_plan_positions, oriented_a_star
+from tomasz.pathfinding.space_time_a_star import get_static_blocked, oriented_space_time_a_star
+from tomasz.utils import distance_l1
 
 log = logging.getLogger(__name__)
 log.disabled = False
 
+# on maps with a side this long rotations are not planned
+LARGE_MAP_SIZE = 64
 
-def get_move_delta(current, next):
-    """
-    Get the move delta between two points.
-
-    Parameters
-    ----------
-    current: (int, int)
-        The current point.
-    next: (int, int)
-        The next point.
-
-    Returns
-    -------
-    (int, int)
-        The move delta.
-    """
-    return next[0] - current[0], next[1] - current[1]
-
-
-def _is_facing_right_direction(move_delta, current_direction):
-    """
-    Check if the agent is facing the right direction.
-
-    Parameters
-    ----------
-    move_delta: (int, int)
-        The move delta.
-    current_direction: int
-        The current direction.
-
-    Returns
-    -------
-    bool
-        True if the agent is facing the right direction.
-    """
-    log.info(f"move_delta: {move_delta}, current_direction: {current_direction}")
-    return move_delta == (0, -1) and current_direction == Direction.UP or move_delta == (
-        1, 0) and current_direction == Direction.RIGHT or move_delta == (
-        0, 1) and current_direction == Direction.DOWN or move_delta == (-1, 0) and current_direction == Direction.LEFT
-
+# tile path finders with the signature of `a_star`, selectable by name
+PATH_FINDERS = {
+    "a_star": a_star,
+    "jps": jps,
+    "hpa_star": hpa_star,
+}
 
-def _is_facing_opposite_direction(move_delta, current_direction):
-    """
-    Check if the agent is facing the opposite direction.
-
-    Parameters
-    ----------
-    move_delta: (int, int)
-        The move delta.
-    current_direction: int
-        The current direction.
-
-    Returns
-    -------
-    bool
-        True if the agent is facing the opposite direction.
-    """
-    log.info(f"move_delta: {move_delta}, current_direction: {current_direction}")
-    return move_delta == (0, -1) and current_direction == Direction.DOWN or move_delta == (
-        1, 0) and current_direction == Direction.LEFT or move_delta == (
-        0, 1) and current_direction == Direction.UP or move_delta == (-1, 0) and current_direction == Direction.RIGHT
 
 def parse_dir_to_delta(dir):
     if dir == Direction.UP:
@@ -129,57 +85,16 @@ def _get_needed_rotation(move_delta, current_direction) -> RotationDirection:
             return RotationDirection.RIGHT
 
 
-def get_random_movement() -> Movement | Rotation:
+def get_planner(tomasz_map: TomaszMapWithHistory, name: str | None = None):
     """
-    Get a random movement action.
+    Get the tile path finder for the map, one of `PATH_FINDERS`, `a_star` if no name is given.
 
-    Returns
-    -------
-    Movement | Rotation
-        The movement action.
+    Without a planner the movement system takes its paths from the distance
+    field of the tick, `hpa_star` and `jps` are only used when chosen.
     """
-
-    if random.randint(0, 100) % 2 == 0:
-        return Movement(random.choice(list(MovementDirection)))
-    return Rotation(random.choice(list(RotationDirection)), None)
-
-def get_movement_action(agent: TomaszAgent, next_pos: Tuple[int, int], allow_backwards=False, allow_random=True) -> Movement | Rotation | None:
-    """
-    Get the movement action to move the agent to the next position.
-
-    Parameters
-    ----------
-    allow_backwards: bool
-        Whether to allow moving backwards
-    agent: TomaszAgent
-        The agent.
-    next_pos: (int, int)
-        The next position.
-
-    Returns
-    -------
-    Movement | Rotation
-        The movement action.
-    """
-    move_delta = get_move_delta(agent.position, next_pos)
-
-    if abs(move_delta[0]) > 1 or abs(move_delta[1]) > 1:
-        log.error(f"Invalid move delta: {move_delta}")
-        return None
-
-    if _is_facing_right_direction(move_delta, agent.entity.direction):
-        return Movement(MovementDirection.FORWARD)
-
-    if _is_facing_opposite_direction(move_delta, agent.entity.direction) and allow_backwards:
-        return Movement(MovementDirection.BACKWARD)
-
-
-    rotation = Rotation(_get_needed_rotation(move_delta, agent.entity.direction), RotationDirection.LEFT)
-    if rotation.tank_rotation_direction is None:
-        log.warning("Empty rotation! Making random movement\n"*10)
-        return None
-
-    return rotation
+    if name is not None:
+        return PATH_FINDERS[name]
+    return a_star
 
 
 class MovementSystem:
@@ -188,7 +103,35 @@ class MovementSystem:
     tomasz_map: TomaszMapWithHistory = None
     target_reached: bool = False
     path_finding_failed: bool = False
-    fails_counter: int = 0
+    danger_version: int = 0
+    # plan with the bullet forecast when bullets are flying
+    dodge_bullets: bool = True
+    # plan rotations and backward moves together with the path
+    plan_rotations: bool = True
+    # repair the previous search when replanning to the same target
+    incremental: bool = True
+    # name of the tile path finder in PATH_FINDERS, the distance field of the tick if None
+    planner: str | None = None
+    # seconds a tile path search may take, searched with ara_star; None for no limit
+    time_budget: float | None = 0.02
+    # the current path costs at most this many times the cheapest one
+    path_bound: float = 1.0
+    _d_star: DStarLite = None
+    _d_star_threshold: float = None
+    _timed_path: bool = False
+    # extra cost of a tile with danger 1 when no safe path exists, see danger_weighted_a_star
+    danger_penalty: float = DANGER_PENALTY
+    # danger threshold the current path was planned with, None for a danger-weighted path
+    _danger_threshold: float | None = 0.2
+    # number of danger map updates that needed a new path and that kept the old one
+    replans: int = 0
+    replans_avoided: int = 0
+    # OrientedStep of the next ticks, compiled from the path
+    _actions: deque = deque()
+    # (position, direction) the tank should have before the next action
+    _expected_pose: tuple = None
+    # number of times the actions were compiled again because the tank was not where expected
+    recompiles: int = 0
     _next_position: (int, int) = None
 
     def __init__(self, tomasz_map: TomaszMapWithHistory):
@@ -201,52 +144,274 @@ class MovementSystem:
             log.info("nic nie robie opiedalam sie")
             return None
 
-        if not self.path:
+        if self.target == tomasz_agent.position:
+            log.info("Target reached :D")
+            self.target_reached = True
+            self.target = None
+            self.path = []
+            self._actions = deque()
+            return None
+
+        if not self._get_remaining_path() and not self._actions:
             log.info(f"Looking for path from {tomasz_agent.position} to {self.target}")
-            allow_danger = self.fails_counter > 3
-            if allow_danger:
-                log.warning("Allowing dangerous path")
-            self.path = a_star(self.tomasz_map, tomasz_agent.position, self.target, allow_danger)
+            self.path = self._find_path(tomasz_agent.position)
             if not self.path:
                 log.info("Failed to find path :(")
                 self.path_finding_failed = True
-                self.fails_counter += 1
                 self.target_reached = False
                 self.target = None
                 return None
             else:
                 self.path_finding_failed = False
-                self.fails_counter = 0
                 self.target_reached = False
                 log.info("I have a path now! " + str(self.path))
 
-        if self.path:
-            if self.target == tomasz_agent.position:
-                log.info("Target reached :D")
-                self.target_reached = True
-                self.target = None
-                self.path = []
-                return None
-
-            if tomasz_agent.position == self._next_position:
-                log.info("I reached the next position!")
-                self._next_position = None
-
-            if not self._next_position:
-                log.info("Setting next position")
-                self._next_position = self.path.pop(0)
-
-            movement_action = get_movement_action(tomasz_agent, self._next_position)
-            if not movement_action:
-                log.warning("Performing random movement and updating map!!\n" * 10)
-                movement_action = get_random_movement()
-                self.update_map(self.tomasz_map)
-            log.info(f"Moving from {tomasz_agent.position} to {self._next_position} with {movement_action}")
-            return movement_action
+        pose = (tomasz_agent.position, tomasz_agent.entity.direction)
+        if not self._actions or pose != self._expected_pose:
+            if self._actions:
+                # the last action did not have the expected effect, e.g. a blocked move
+                log.info(f"Expected to be at {self._expected_pose}, recompiling the path from {pose}")
+                self.recompiles += 1
+            if not self._compile_actions(pose):
+                log.warning("The path does not start next to us, replanning")
+                self.update_map(self.tomasz_map, force_replan=True)
+                if not self._actions and not self._compile_actions(pose):
+                    return None
+
+        step = self._actions.popleft()
+        self._expected_pose = (step.position, step.direction)
+        if step.action is None or step.position != tomasz_agent.position:
+            self._next_position = self.path.pop(0) if self.path else step.position
+        log.info(f"Moving from {tomasz_agent.position} to {self._next_position} with {step.action}")
+        return step.action
+
+    def _compile_actions(self, pose) -> bool:
+        """
+        Compile the rest of the path into the actions of the next ticks, starting at the given pose.
+
+        Returns
+        -------
+        bool
+            False if the path does not continue next to the position.
+        """
+        position, direction = pose
+        remaining = self._get_remaining_path()
+        if remaining and distance_l1(remaining[0], position) > 1 and position in remaining:
+            # we got ahead of the path
+            remaining = remaining[remaining.index(position) + 1:]
+        if not remaining or distance_l1(remaining[0], position) > 1:
+            self._actions = deque()
+            return False
+
+        self.path = remaining
+        self._next_position = None
+        self._queue_steps(pose, compile_path(position, direction, remaining, allow_backwards=self.plan_rotations))
+        return True
+
+    def _queue_steps(self, pose, steps):
+        """
+        Queue the steps of a plan starting at the pose, sweeping the turret during the rotations.
+        """
+        self._actions = deque(
+            step._replace(action=Rotation(step.action.tank_rotation_direction, RotationDirection.LEFT))
+            if isinstance(step.action, Rotation) else step
+            for step in steps
+        )
+        self._expected_pose = pose
+
+    def is_outdated(self, tomasz_map: TomaszMapWithHistory) -> bool:
+        """
+        Check if the danger map has changed since the last update_map.
+        """
+        return self.danger_version != tomasz_map.danger_version
+
+    def _find_path(self, start: (int, int)) -> list:
+        """
+        Find a path to the target, dodging the predicted bullets if there are any.
+        If danger cuts off the target, the path with the least risk is taken.
+        """
+        if self.dodge_bullets:
+            forecast = self.tomasz_map.danger_forecast()
+            if forecast[1:].any():
+                # the bullets are dodged tick by tick, so the rotations are planned too
+                direction = self.tomasz_map.agent.entity.direction
+                plan = oriented_space_time_a_star(self.tomasz_map, start, direction, self.target, forecast,
+                                                  allow_backwards=self.plan_rotations)
+                if plan:
+                    log.info("Found a path dodging the bullets")
+                    self._timed_path = True
+                    self._danger_threshold = 0.2
+                    self._queue_steps((start, direction), plan)
+                    return get_plan_positions(plan, waits=True)
+
+        self._timed_path = False
+        self._actions = deque()
+        self._danger_threshold = 0.2
+        # the search over orientations is four times larger, too slow on large maps
+        plan_rotations = self.plan_rotations and max(self.tomasz_map.size) < LARGE_MAP_SIZE
+        field = self.tomasz_map.distance_field(self._danger_threshold)
+        if field and field.origin == start:
+            # the distance field of the tick already knows the shortest paths
+            if not field.is_reachable(self.target):
+                return self._find_weighted_path(start)
+            if not plan_rotations and self.planner is None:
+                return field.path_to(self.target)
+        self.path_bound = 1.0
+        if plan_rotations:
+            path = self._find_oriented_path(start)
+        elif self.time_budget is not None and self.planner is None:
+            path = self._find_anytime_path(start)
+        else:
+            planner = get_planner(self.tomasz_map, self.planner)
+            path = planner(self.tomasz_map, start, self.target, False, self._get_heuristic())
+        return path or self._find_weighted_path(start)
+
+    def _get_heuristic(self):
+        # distances around the walls are exact unless danger makes a detour
+        table = self.tomasz_map.distance_table()
+        return euclidean_distance if table is None else table.heuristic_to(self.target)
+
+    def _find_anytime_path(self, start: (int, int), danger_penalty: float | None = None) -> list:
+        """
+        Find a path within the time budget, the best one ara_star improved it to.
+        """
+        result = ara_star(self.tomasz_map, start, self.target, heuristic=self._get_heuristic(),
+                          time_budget=self.time_budget, danger_penalty=danger_penalty)
+        self.path_bound = result.bound
+        log.info(f"Anytime search found a path at most {result.bound:.2f} times the cheapest")
+        return result.path
+
+    def _find_weighted_path(self, start: (int, int)) -> list:
+        """
+        Find the cheapest path with danger as a cost, used when no safe path exists.
+        """
+        log.warning("No safe path, taking the least dangerous one")
+        self._actions = deque()
+        self._danger_threshold = None
+        self.path_bound = 1.0
+        if self.time_budget is not None:
+            return self._find_anytime_path(start, self.danger_penalty)
+        return danger_weighted_a_star(self.tomasz_map, start, self.target, self.danger_penalty, self._get_heuristic())
+
+    def _find_oriented_path(self, start: (int, int)) -> list:
+        """
+        Find a path counting rotations and keep its actions for the states on the way.
+        """
+        direction = self.tomasz_map.agent.entity.direction
+        if self.incremental:
+            plan = self._repair_plan(start, direction, self._danger_threshold)
+        else:
+            plan = oriented_a_star(self.tomasz_map, start, direction, self.target)
+
+        self._queue_steps((start, direction), plan)
+        return get_plan_positions(plan)
+
+    def _repair_plan(self, start: (int, int), direction: Direction, danger_threshold: float) -> list:
+        """
+        Plan with D* Lite, reusing the search of the previous call if the target is the same.
+        Only the states affected by the tiles that changed since then are expanded again.
+        """
+        walkable = get_walkable_mask(self.tomasz_map, danger_threshold)
+        d_star = self._d_star
+        if (d_star is None or d_star.goal != self.target or self._d_star_threshold != danger_threshold
+                or (d_star.width, d_star.height) != self.tomasz_map.size):
+            d_star = DStarLite(walkable, self.tomasz_map.size, start, direction, self.target)
+            self._d_star, self._d_star_threshold = d_star, danger_threshold
+        else:
+            d_star.update_start(start, direction)
+            changed = d_star.update_walkable(walkable)
+            log.info(f"Repairing the plan, {changed} tiles changed")
+
+        expansions = d_star.expansions
+        d_star.compute_shortest_path()
+        log.info(f"Expanded {d_star.expansions - expansions} states")
+        return d_star.get_plan()
+
+    def _get_upcoming_steps(self) -> list:
+        """
+        Get the OrientedStep of the next ticks, compiled again from the pose of the tank if it is not the expected one.
+        """
+        agent = self.tomasz_map.agent
+        pose = (agent.position, agent.entity.direction)
+        if self._actions and pose == self._expected_pose:
+            return list(self._actions)
+        try:
+            return compile_path(pose[0], pose[1], self._get_remaining_path(), allow_backwards=self.plan_rotations)
+        except ValueError:
+            return []
+
+    def _is_timed_path_safe(self) -> bool:
+        """
+        Check the actions of a path dodging bullets against the current forecast, at the tick each one ends.
+        """
+        steps = self._get_upcoming_steps()
+        if not steps:
+            return False
+
+        positions = [step.position for step in steps]
+        blocked = get_static_blocked(self.tomasz_map)
+        if any(blocked[pos] for pos in positions):
+            return False
+        # a rotation or a wait keeps the tank on its tile for one more tick
+        return get_arrival_danger(self.tomasz_map.danger_forecast(), positions) == 0
+
+    def _get_remaining_path(self) -> list:
+        remaining = list(self.path)
+        if self._next_position and self._next_position != self.tomasz_map.agent.position:
+            remaining.insert(0, self._next_position)
+        return remaining
+
+    def _get_changed_cells(self, tomasz_map: TomaszMapWithHistory) -> set | None:
+        """
+        Get the tiles whose danger changed since the last update_map, None if not known.
+        """
+        if tomasz_map.danger_version == self.danger_version:
+            return set()
+        if tomasz_map.danger_version == self.danger_version + 1:
+            xs, ys = tomasz_map.danger_layer.changed_cells
+            return set(zip(xs.tolist(), ys.tolist()))
+        # several updates happened, the danger layer only keeps the last one
+        return None
 
-    def update_map(self, tomasz_map: TomaszMapWithHistory):
+    def _is_path_valid(self, changed_cells: set | None) -> bool:
+        """
+        Check the rest of the path after a danger map change.
+
+        Only the tiles of the path whose danger changed are looked at, all of
+        them if the changed tiles are not known.
+        """
+        remaining = self._get_remaining_path()
+        if not remaining:
+            return False
+        position = self.tomasz_map.agent.position
+        if abs(remaining[0][0] - position[0]) + abs(remaining[0][1] - position[1]) > 1:
+            # we are not where the path starts, e.g. after a respawn
+            return False
+
+        to_check = remaining if changed_cells is None else [pos for pos in remaining if pos in changed_cells]
+        if self._danger_threshold is None:
+            # the risk of a danger-weighted path is only known for the danger it was planned with
+            return not to_check
+        walkable = get_walkable_mask(self.tomasz_map, self._danger_threshold)
+        height = self.tomasz_map.size[1]
+        return all(walkable[x * height + y] for x, y in to_check)
+
+    def update_map(self, tomasz_map: TomaszMapWithHistory, force_replan=False):
+        changed_cells = self._get_changed_cells(tomasz_map)
         self.tomasz_map = tomasz_map
-        self._next_position = None
+        self.danger_version = tomasz_map.danger_version
         self.target_reached = False
+        if self.target and not force_replan:
+            if self._timed_path and self._is_timed_path_safe():
+                log.info("Bullets are where we expected, keeping the path")
+                self.replans_avoided += 1
+                return
+            if not self._timed_path and self._is_path_valid(changed_cells):
+                self.replans_avoided += 1
+                log.info(f"Danger does not touch the path, keeping it ({self.replans_avoided} replans avoided)")
+                return
+
+        self._next_position = None
         if self.target:
-            self.path = a_star(self.tomasz_map, self.tomasz_map.agent.position, self.target)
+            self.replans += 1
+            self.path = self._find_path(self.tomasz_map.agent.position)
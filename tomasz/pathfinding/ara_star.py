@@ -0,0 +1,160 @@
+import heapq
+import math
+import time
+from array import array
+from typing import NamedTuple
+
+from tomasz.a_star import SearchStats, _reconstruct_path, euclidean_distance, get_movements_4n, get_walkable_mask
+from tomasz.map import TomaszMapWithHistory
+from tomasz.pathfinding.danger_weighted_a_star import get_step_costs
+
+# inflation factors of the heuristic, one search per factor while time is left
+EPSILONS = (3.0, 2.0, 1.5, 1.2, 1.0)
+# number of expansions between two looks at the clock
+DEADLINE_CHECK_INTERVAL = 256
+
+
+class AnytimePath(NamedTuple):
+    """
+    The best path found before the deadline and how far from the cheapest it may be.
+
+    Attributes
+    ----------
+    path: list
+        Array of points to reach the goal, empty if none was found.
+    bound: float
+        The path costs at most `bound` times the cheapest one. 1 for a path
+        known to be the cheapest, inf if no path was found.
+    """
+    path: list
+    bound: float
+
+
+def ara_star(
+        tomasz_map: TomaszMapWithHistory,
+        start: (int, int),
+        goal: (int, int),
+        ignore_danger=False,
+        heuristic=euclidean_distance,
+        time_budget: float | None = 0.02,
+        epsilons=EPSILONS,
+        danger_penalty: float | None = None,
+        stats: SearchStats | None = None,
+) -> AnytimePath:
+    """
+    Anytime Repairing A*: a quick path with an inflated heuristic, improved until the deadline.
+
+    Every search multiplies the heuristic by the next factor of `epsilons`,
+    which bounds the cost of its path by that factor times the cheapest one.
+    The searches reuse each other's work: only the tiles whose score
+    improved since the previous one are expanded again. The search stops at
+    the deadline and returns the best path so far, with the bound it proved.
+
+    Parameters
+    ----------
+    tomasz_map: TomaszMapWithHistory
+        Parsed map.
+    start: (int, int)
+        The starting point, (x, y).
+    goal: (int, int)
+        The goal point, (x, y).
+    ignore_danger: bool
+        Walk through dangerous tiles. Ignored with `danger_penalty`.
+    heuristic: Callable[[int, int], float]
+        Admissible estimate of the number of steps to the goal.
+    time_budget: float | None
+        Maximum search time in seconds, no limit if None.
+    epsilons: tuple
+        Decreasing inflation factors, the last one 1 for an optimal path.
+    danger_penalty: float | None
+        If given, danger is a cost instead of blocking tiles, see `danger_weighted_a_star`.
+    stats: SearchStats | None
+        Counters to add the expansions of the search to.
+
+    Returns
+    -------
+    AnytimePath
+        The path and its suboptimality bound.
+    """
+    width, height = tomasz_map.size
+    if start == goal:
+        return AnytimePath([], 1.0)
+    deadline = math.inf if time_budget is None else time.perf_counter() + time_budget
+
+    if danger_penalty is None:
+        walkable = get_walkable_mask(tomasz_map, 100.0 if ignore_danger else 0.2)
+        step_costs = [1.0 if free else math.inf for free in walkable]
+    else:
+        step_costs = get_step_costs(tomasz_map, danger_penalty)
+    movements = [(dx * height + dy, dx, dy) for dx, dy, _ in get_movements_4n()]
+
+    size = width * height
+    g_score = array("d", [math.inf]) * size
+    came_from = array("l", [-1]) * size
+    # number of the search that closed every tile, a tile is expanded once per search
+    closed_in = array("l", [0]) * size
+    open_set = set()
+    h_score = {}
+
+    def h(index):
+        if index not in h_score:
+            h_score[index] = heuristic(divmod(index, height), goal)
+        return h_score[index]
+
+    start_index = start[0] * height + start[1]
+    goal_index = goal[0] * height + goal[1]
+    g_score[start_index] = 0.0
+    open_set.add(start_index)
+    # tiles improved after they were closed in the current search
+    inconsistent = []
+
+    best = AnytimePath([], math.inf)
+    expansions = 0
+    for search, epsilon in enumerate(epsilons, start=1):
+        open_heap = [(g_score[index] + epsilon * h(index), index) for index in open_set]
+        heapq.heapify(open_heap)
+
+        while open_heap and g_score[goal_index] > open_heap[0][0]:
+            key, current = heapq.heappop(open_heap)
+            if current not in open_set or key != g_score[current] + epsilon * h(current):
+                continue
+            open_set.discard(current)
+            closed_in[current] = search
+
+            expansions += 1
+            if stats is not None:
+                stats.expansions += 1
+            if expansions % DEADLINE_CHECK_INTERVAL == 0 and time.perf_counter() > deadline:
+                return best
+
+            x, y = divmod(current, height)
+            g = g_score[current]
+            for offset, dx, dy in movements:
+                nx, ny = x + dx, y + dy
+                if nx < 0 or ny < 0 or nx >= width or ny >= height:
+                    continue
+                neighbor = current + offset
+                tentative_g_score = g + step_costs[neighbor]
+                if tentative_g_score < g_score[neighbor]:
+                    g_score[neighbor] = tentative_g_score
+                    came_from[neighbor] = current
+                    if closed_in[neighbor] == search:
+                        inconsistent.append(neighbor)
+                    else:
+                        open_set.add(neighbor)
+                        heapq.heappush(open_heap, (tentative_g_score + epsilon * h(neighbor), neighbor))
+
+        if g_score[goal_index] == math.inf:
+            # the whole reachable region was searched
+            return best
+
+        # the cheapest path costs at least the lowest g + h of the tiles left to expand
+        open_set.update(inconsistent)
+        inconsistent = []
+        lower_bound = min((g_score[index] + h(index) for index in open_set), default=math.inf)
+        bound = max(1.0, min(epsilon, g_score[goal_index] / lower_bound))
+        best = AnytimePath(_reconstruct_path(came_from, goal_index, height), bound)
+        if bound == 1.0 or time.perf_counter() > deadline:
+            return best
+
+    return best
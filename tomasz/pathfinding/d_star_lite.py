@@ -0,0 +1,213 @@
+import heapq
+import math
+from array import array
+
+import numpy as np
+
+from hackathon_bot import Direction
+from tomasz.pathfinding.oriented_a_star import DIRECTION_DELTAS, DIRECTION_INDEX, get_step
+
+
+class DStarLite:
+    """
+    D* Lite over the (x, y, direction) states of the tank.
+
+    The search runs backwards from the goal, so when the tank moves or tiles
+    become blocked or free again only the states whose distance to the goal
+    changes are expanded again, instead of searching the whole map.
+
+    Costs follow `oriented_a_star`: a tick per move forward or backward and
+    per 90 degrees rotation. States are flattened to (x * H + y) * 4 + direction.
+
+    Attributes
+    ----------
+    goal: (int, int)
+        The goal tile, reached in any direction.
+    expansions: int
+        Number of states expanded so far, for profiling the repairs.
+    """
+
+    def __init__(self, walkable: list, size, start: (int, int), start_direction: Direction, goal: (int, int),
+                 allow_backwards=True):
+        """
+        Parameters
+        ----------
+        walkable: list
+            Flat walkability of the tiles, see `get_walkable_mask`.
+        size: (int, int)
+            Size of the map.
+        start: (int, int)
+            Position of the tank.
+        start_direction: Direction
+            The direction the tank is facing.
+        goal: (int, int)
+            The goal tile.
+        allow_backwards: bool
+            Whether the tank may move backwards.
+        """
+        self.width, self.height = size
+        self.walkable = list(walkable)
+        self.goal = goal
+        self.allow_backwards = allow_backwards
+        self.expansions = 0
+
+        count = self.width * self.height * 4
+        self.g = array("d", [math.inf]) * count
+        self.rhs = array("d", [math.inf]) * count
+        self.open_heap = []
+        # current key of every state in the open list, heap entries with another key are outdated
+        self.open_keys = {}
+        self.km = 0
+
+        self.start_state = self._state(start, start_direction)
+        self.goal_index = goal[0] * self.height + goal[1]
+        for d in range(4):
+            state = self.goal_index * 4 + d
+            self.rhs[state] = 0.0
+            self._push(state)
+
+    def _state(self, pos, direction) -> int:
+        return (pos[0] * self.height + pos[1]) * 4 + DIRECTION_INDEX[direction]
+
+    def _heuristic(self, state) -> int:
+        x, y = divmod(state // 4, self.height)
+        sx, sy = divmod(self.start_state // 4, self.height)
+        return abs(x - sx) + abs(y - sy)
+
+    def _key(self, state):
+        best = min(self.g[state], self.rhs[state])
+        return best + self._heuristic(state) + self.km, best
+
+    def _push(self, state):
+        key = self._key(state)
+        self.open_keys[state] = key
+        heapq.heappush(self.open_heap, (key, state))
+
+    def _moves(self, state, forward_sign):
+        # tiles reached by moving along the direction of the state, forward_sign -1 looks at predecessors
+        index, d = divmod(state, 4)
+        x, y = divmod(index, self.height)
+        dx, dy = DIRECTION_DELTAS[d]
+        signs = (1, -1) if self.allow_backwards else (1,)
+        for sign in signs:
+            nx, ny = x + sign * forward_sign * dx, y + sign * forward_sign * dy
+            if 0 <= nx < self.width and 0 <= ny < self.height:
+                yield (nx * self.height + ny) * 4 + d, nx * self.height + ny
+
+    def _successors(self, state):
+        base = state - state % 4
+        d = state % 4
+        yield base + (d + 1) % 4, 1.0
+        yield base + (d - 1) % 4, 1.0
+        for neighbor, index in self._moves(state, 1):
+            if self.walkable[index]:
+                yield neighbor, 1.0
+
+    def _predecessors(self, state):
+        base = state - state % 4
+        d = state % 4
+        yield base + (d + 1) % 4
+        yield base + (d - 1) % 4
+        # moves end on the tile of the state, it has to be walkable
+        if self.walkable[state // 4]:
+            for neighbor, _ in self._moves(state, -1):
+                yield neighbor
+
+    def _update_vertex(self, state):
+        if state // 4 != self.goal_index:
+            self.rhs[state] = min((cost + self.g[neighbor] for neighbor, cost in self._successors(state)),
+                                  default=math.inf)
+        if self.g[state] != self.rhs[state]:
+            self._push(state)
+        else:
+            self.open_keys.pop(state, None)
+
+    def _top(self):
+        # drop outdated heap entries
+        while self.open_heap:
+            key, state = self.open_heap[0]
+            if self.open_keys.get(state) == key:
+                return key, state
+            heapq.heappop(self.open_heap)
+        return (math.inf, math.inf), None
+
+    def compute_shortest_path(self):
+        """
+        Expand the inconsistent states until the start state is consistent.
+        """
+        start = self.start_state
+        while True:
+            key, state = self._top()
+            if state is None:
+                return
+            if key >= self._key(start) and self.rhs[start] <= self.g[start]:
+                return
+
+            self.expansions += 1
+            new_key = self._key(state)
+            if key < new_key:
+                self._push(state)
+            elif self.g[state] > self.rhs[state]:
+                self.g[state] = self.rhs[state]
+                del self.open_keys[state]
+                for predecessor in self._predecessors(state):
+                    self._update_vertex(predecessor)
+            else:
+                self.g[state] = math.inf
+                self._update_vertex(state)
+                for predecessor in self._predecessors(state):
+                    self._update_vertex(predecessor)
+
+    def update_start(self, start: (int, int), start_direction: Direction):
+        """
+        Move the start of the search, the heuristic of the queued keys is corrected by km.
+        """
+        state = self._state(start, start_direction)
+        self.km += self._heuristic(state)
+        self.start_state = state
+
+    def update_walkable(self, walkable: list) -> int:
+        """
+        Update the walkability of the tiles and requeue the states whose costs changed.
+
+        Returns
+        -------
+        int
+            Number of tiles that changed.
+        """
+        changed = np.flatnonzero(np.asarray(walkable, dtype=bool) != np.asarray(self.walkable, dtype=bool))
+        for index in changed.tolist():
+            self.walkable[index] = walkable[index]
+        for index in changed.tolist():
+            # the states that can move onto the tile
+            for d in range(4):
+                for predecessor, _ in self._moves(index * 4 + d, -1):
+                    self._update_vertex(predecessor)
+        return len(changed)
+
+    def get_plan(self) -> list:
+        """
+        Get the plan from the start to the goal following the smallest costs.
+
+        Returns
+        -------
+        list
+            OrientedStep per tick, like `oriented_a_star`. Empty if the goal
+            is the start or can not be reached.
+        """
+        plan = []
+        state = self.start_state
+        if math.isinf(self.rhs[state]) and math.isinf(self.g[state]):
+            return []
+        for _ in range(self.width * self.height * 4):
+            if state // 4 == self.goal_index:
+                return plan
+            best, best_cost = None, math.inf
+            for neighbor, cost in self._successors(state):
+                if cost + self.g[neighbor] < best_cost:
+                    best, best_cost = neighbor, cost + self.g[neighbor]
+            if best is None:
+                return []
+            plan.append(get_step(state, best, self.height))
+            state = best
+        return []
@@ -0,0 +1,109 @@
+import heapq
+import math
+from array import array
+
+import numpy as np
+
+from tomasz.a_star import SearchStats, _reconstruct_path, get_movements_4n
+from tomasz.map import TomaszMapWithHistory
+
+# extra cost of entering a tile with danger 1, in steps
+DANGER_PENALTY = 20.0
+
+
+def manhattan_distance(point1: (int, int), point2: (int, int)):
+    return abs(point1[0] - point2[0]) + abs(point1[1] - point2[1])
+
+
+def get_step_costs(tomasz_map: TomaszMapWithHistory, danger_penalty=DANGER_PENALTY) -> list:
+    """
+    Get the cost of entering every tile: one step plus the penalty scaled by its danger.
+
+    Returns
+    -------
+    list
+        Flat costs indexed by x * H + y, inf for walls.
+    """
+    costs = 1.0 + danger_penalty * np.asarray(tomasz_map.danger, dtype=float)
+    costs[tomasz_map.walls_arr == 1] = math.inf
+    return costs.ravel().tolist()
+
+
+def danger_weighted_a_star(
+        tomasz_map: TomaszMapWithHistory,
+        start: (int, int),
+        goal: (int, int),
+        danger_penalty=DANGER_PENALTY,
+        heuristic=manhattan_distance,
+        stats: SearchStats | None = None,
+):
+    """
+    A* where danger makes tiles expensive instead of blocking them.
+
+    Entering a tile costs 1 + danger_penalty * danger, so the path is the
+    cheapest trade-off between its length and the risk taken. Only walls
+    block, a path is found whenever the goal can be reached at all.
+
+    Parameters
+    ----------
+    tomasz_map: TomaszMapWithHistory
+        Parsed map.
+    start: (int, int)
+        The starting point, (x, y).
+    goal: (int, int)
+        The goal point, (x, y).
+    danger_penalty: float
+        Extra cost of a tile with danger 1, 0 for the shortest path around the walls.
+    heuristic: Callable[[int, int], float]
+        Estimate of the number of steps to the goal, every step costs at least 1.
+    stats: SearchStats | None
+        Counters to add the expansions of the search to.
+
+    Returns
+    -------
+    list
+        Array of points to reach the goal, empty if the goal is walled off.
+    """
+    width, height = tomasz_map.size
+    if start == goal:
+        return []
+
+    step_costs = get_step_costs(tomasz_map, danger_penalty)
+    movements = [(dx * height + dy, dx, dy) for dx, dy, _ in get_movements_4n()]
+
+    size = width * height
+    g_score = array("d", [math.inf]) * size
+    came_from = array("l", [-1]) * size
+    closed = bytearray(size)
+
+    start_index = start[0] * height + start[1]
+    goal_index = goal[0] * height + goal[1]
+    g_score[start_index] = 0.0
+    open_heap = [(heuristic(start, goal), start_index)]
+
+    while open_heap:
+        _, current = heapq.heappop(open_heap)
+        if closed[current]:
+            continue
+        if current == goal_index:
+            return _reconstruct_path(came_from, current, height)
+        closed[current] = 1
+        if stats is not None:
+            stats.expansions += 1
+
+        x, y = divmod(current, height)
+        g = g_score[current]
+        for offset, dx, dy in movements:
+            nx, ny = x + dx, y + dy
+            if nx < 0 or ny < 0 or nx >= width or ny >= height:
+                continue
+            neighbor = current + offset
+            if closed[neighbor]:
+                continue
+            tentative_g_score = g + step_costs[neighbor]
+            if tentative_g_score < g_score[neighbor]:
+                came_from[neighbor] = current
+                g_score[neighbor] = tentative_g_score
+                heapq.heappush(open_heap, (tentative_g_score + heuristic((nx, ny), goal), neighbor))
+
+    return []
@@ -0,0 +1,181 @@
+import math
+from typing import NamedTuple, Tuple
+
+import numpy as np
+
+from hackathon_bot import Direction
+from tomasz.map import TomaszMapWithHistory
+from tomasz.map.distance_field import DistanceField
+from tomasz.map.ray_table import RAY_DELTAS, RayTable, get_ray_table
+from tomasz.pathfinding.oriented_a_star import DIRECTION_DELTAS, DIRECTION_INDEX, DIRECTIONS
+
+# tiles per tick of a fired bullet
+BULLET_SPEED = 2.0
+
+# direction a turret on the ray RAY_DELTAS[k] of the target has to face, back towards the target
+RAY_FIRING_DIRECTIONS = tuple(DIRECTIONS[DIRECTION_DELTAS.index((-dx, -dy))] for dx, dy in RAY_DELTAS)
+
+
+class FiringPosition(NamedTuple):
+    """
+    A tile with a line of fire on the target.
+
+    Attributes
+    ----------
+    position: (int, int)
+        The tile, (x, y).
+    turret_direction: Direction
+        The direction the turret has to face to hit the target.
+    ticks: int
+        Moves to reach the tile plus turret rotations to face the target.
+    """
+    position: Tuple[int, int]
+    turret_direction: Direction
+    ticks: int
+
+
+def get_line_of_fire(rays: RayTable, target) -> (np.ndarray, np.ndarray, np.ndarray):
+    """
+    Get the tiles a bullet fired towards the target reaches it from, read from the ray lengths.
+
+    Returns
+    -------
+    (np.ndarray, np.ndarray, np.ndarray)
+        The x and y coordinates of the tiles and the index in RAY_DELTAS of
+        the ray of the target each tile is on.
+    """
+    xs, ys, rays_index = [], [], []
+    for k, delta in enumerate(RAY_DELTAS):
+        cells_x, cells_y = rays.ray_cells(target, delta)
+        xs.append(cells_x)
+        ys.append(cells_y)
+        rays_index.append(np.full(len(cells_x), k))
+    return np.concatenate(xs), np.concatenate(ys), np.concatenate(rays_index)
+
+
+def find_firing_position(
+        tomasz_map: TomaszMapWithHistory,
+        target: (int, int),
+        turret_direction: Direction,
+        field: DistanceField | None = None,
+) -> FiringPosition | None:
+    """
+    Find the tile with a line of fire on the target that is the quickest to shoot from.
+
+    The candidates are the tiles on the four rays of the target, each ray
+    one lookup in the ray table. Each is ranked by its walking distance in
+    the distance field of the agent plus the turret rotations needed there,
+    ties broken by the Manhattan distance.
+
+    Parameters
+    ----------
+    tomasz_map: TomaszMapWithHistory
+        Parsed map.
+    target: (int, int)
+        The tile to shoot at, (x, y).
+    turret_direction: Direction
+        The direction the turret of the agent faces.
+    field: DistanceField | None
+        Walking distances from the agent, the one of the map if not given.
+
+    Returns
+    -------
+    FiringPosition | None
+        None if no tile with a line of fire can be reached.
+    """
+    if field is None:
+        field = tomasz_map.distance_field()
+    if field is None:
+        return None
+    xs, ys, rays_index = get_line_of_fire(get_ray_table(tomasz_map.static), target)
+
+    distances = field.distances[xs, ys]
+    reachable = distances >= 0
+    if not reachable.any():
+        return None
+    xs, ys, rays_index, distances = xs[reachable], ys[reachable], rays_index[reachable], distances[reachable]
+
+    current = DIRECTION_INDEX[turret_direction]
+    needed = np.array([DIRECTION_INDEX[direction] for direction in RAY_FIRING_DIRECTIONS])[rays_index]
+    turns = (needed - current) % 4
+    ticks = distances + np.minimum(turns, 4 - turns)
+    l1 = np.abs(xs - field.origin[0]) + np.abs(ys - field.origin[1])
+
+    best = np.lexsort((l1, ticks))[0]
+    return FiringPosition(
+        (int(xs[best]), int(ys[best])), RAY_FIRING_DIRECTIONS[rays_index[best]], int(ticks[best])
+    )
+
+
+class Interception(NamedTuple):
+    """
+    A predicted position of an enemy and where to shoot it from.
+
+    Attributes
+    ----------
+    target: (int, int)
+        The predicted position, (x, y).
+    tick: int
+        Number of ticks from now the enemy is predicted there.
+    firing_position: FiringPosition
+        The tile to fire from.
+    slack: int
+        Ticks the bullet would arrive before the enemy, the ticks to hold fire
+        at the firing position. Negative if it is late.
+    """
+    target: Tuple[int, int]
+    tick: int
+    firing_position: FiringPosition
+    slack: int
+
+
+def find_interception(
+        tomasz_map: TomaszMapWithHistory,
+        predicted: list,
+        turret_direction: Direction,
+        bullet_speed: float = BULLET_SPEED,
+) -> Interception | None:
+    """
+    Find the predicted position of an enemy a bullet meets it at with the least waiting.
+
+    A bullet reaches the k-th predicted position after the firing position
+    is reached and the turret rotated, plus its flight time from there. A
+    bullet arriving early misses the enemy, so the agent has to hold fire for
+    the slack. The position with the smallest slack that is not negative is
+    returned, the earliest one on ties. Without such position the one missed
+    by the fewest ticks is returned.
+
+    Parameters
+    ----------
+    tomasz_map: TomaszMapWithHistory
+        Parsed map.
+    predicted: list
+        Positions of the enemy at the next ticks, the current one first.
+    turret_direction: Direction
+        The direction the turret of the agent faces.
+    bullet_speed: float
+        Tiles per tick of the bullet.
+
+    Returns
+    -------
+    Interception | None
+        None if no predicted position can be fired at.
+    """
+    field = tomasz_map.distance_field()
+    best = None
+    late = None
+    for tick, target in enumerate(predicted):
+        firing_position = find_firing_position(tomasz_map, target, turret_direction, field)
+        if firing_position is None:
+            continue
+        x, y = firing_position.position
+        flight = math.ceil((abs(x - target[0]) + abs(y - target[1])) / bullet_speed)
+        interception = Interception(target, tick, firing_position, tick - firing_position.ticks - flight)
+        if interception.slack == 0:
+            return interception
+        if interception.slack > 0:
+            if best is None or interception.slack < best.slack:
+                best = interception
+        elif late is None or interception.slack > late.slack:
+            late = interception
+    return best if best is not None else late
@@ -0,0 +1,341 @@
+import heapq
+import itertools
+from collections import deque
+
+import numpy as np
+
+from tomasz.a_star import SearchStats, a_star
+from tomasz.map import TomaszMapWithHistory
+
+CLUSTER_SIZE = 8
+# entrances longer than this get a transition at both ends instead of one in the middle
+MAX_SINGLE_TRANSITION = 6
+
+
+def manhattan_distance(point1: (int, int), point2: (int, int)):
+    return abs(point1[0] - point2[0]) + abs(point1[1] - point2[1])
+
+
+class HPAGraph:
+    """
+    Abstract graph of the map for hierarchical path finding (HPA*).
+
+    The map is cut into square clusters. Free tiles on both sides of a
+    cluster border are entrances, and some of their tiles become the nodes
+    of the graph. Nodes of neighbouring clusters are linked by a single step
+    and nodes of the same cluster by their walking distance inside it.
+    Everything is computed from the walls only.
+
+    Attributes
+    ----------
+    cluster_size: int
+        Side of the clusters in tiles.
+    nodes: list
+        Tile of every node, (x, y).
+    node_index: dict
+        Node of every tile, {(x, y): node}.
+    edges: list
+        Neighbours of every node with the cost to reach them, [{node: cost}].
+    cluster_nodes: dict
+        Nodes of every cluster, {(cx, cy): [node, ...]}.
+    """
+
+    def __init__(self, walls_arr: np.ndarray, cluster_size: int = CLUSTER_SIZE):
+        self.walls_arr = walls_arr
+        self.free = walls_arr == 0
+        self.size = walls_arr.shape
+        self.cluster_size = cluster_size
+        self.clusters = (-(-self.size[0] // cluster_size), -(-self.size[1] // cluster_size))
+        self.nodes = []
+        self.node_index = {}
+        self.edges = []
+        self.cluster_nodes = {(cx, cy): [] for cx in range(self.clusters[0]) for cy in range(self.clusters[1])}
+        self._intra_paths = {}
+
+        self._build_entrances()
+        for cluster in self.cluster_nodes:
+            self._build_intra_edges(cluster)
+        self.node_xs = np.array([x for x, _ in self.nodes], dtype=int)
+        self.node_ys = np.array([y for _, y in self.nodes], dtype=int)
+
+    def cluster_of(self, pos) -> (int, int):
+        return pos[0] // self.cluster_size, pos[1] // self.cluster_size
+
+    def cluster_bounds(self, cluster) -> (int, int, int, int):
+        """
+        Get the tiles of the cluster as x0, x1, y0, y1, ends excluded.
+        """
+        x0, y0 = cluster[0] * self.cluster_size, cluster[1] * self.cluster_size
+        return x0, min(x0 + self.cluster_size, self.size[0]), y0, min(y0 + self.cluster_size, self.size[1])
+
+    def _add_node(self, pos) -> int:
+        if pos not in self.node_index:
+            self.node_index[pos] = len(self.nodes)
+            self.nodes.append(pos)
+            self.edges.append({})
+            self.cluster_nodes[self.cluster_of(pos)].append(self.node_index[pos])
+        return self.node_index[pos]
+
+    def _add_edge(self, node1, node2, cost):
+        if cost < self.edges[node1].get(node2, float('inf')):
+            self.edges[node1][node2] = cost
+            self.edges[node2][node1] = cost
+
+    def _add_transitions(self, pairs):
+        # pairs of tiles facing each other along one border, in order
+        runs, run = [], []
+        for pos1, pos2 in pairs:
+            if self.free[pos1] and self.free[pos2]:
+                run.append((pos1, pos2))
+            elif run:
+                runs.append(run)
+                run = []
+        if run:
+            runs.append(run)
+
+        for run in runs:
+            transitions = [run[len(run) // 2]] if len(run) <= MAX_SINGLE_TRANSITION else [run[0], run[-1]]
+            for pos1, pos2 in transitions:
+                self._add_edge(self._add_node(pos1), self._add_node(pos2), 1)
+
+    def _build_entrances(self):
+        for cx, cy in self.cluster_nodes:
+            x0, x1, y0, y1 = self.cluster_bounds((cx, cy))
+            if x1 < self.size[0]:
+                self._add_transitions([((x1 - 1, y), (x1, y)) for y in range(y0, y1)])
+            if y1 < self.size[1]:
+                self._add_transitions([((x, y1 - 1), (x, y1)) for x in range(x0, x1)])
+
+    def _build_intra_edges(self, cluster):
+        nodes = self.cluster_nodes[cluster]
+        for k, node in enumerate(nodes):
+            distances, _ = self.local_search(self.free, self.nodes[node])
+            for other in nodes[k + 1:]:
+                if self.nodes[other] in distances:
+                    self._add_edge(node, other, distances[self.nodes[other]])
+
+    def local_search(self, walkable: np.ndarray, origin, stats: SearchStats | None = None) -> (dict, dict):
+        """
+        Breadth-first search from a tile to the tiles of its cluster.
+
+        Clusters are small, a plain queue is faster than array operations here.
+        The expanded tiles are added to `stats` if given.
+
+        Returns
+        -------
+        (dict, dict)
+            Distances {(x, y): moves} and parents {(x, y): previous tile} of the reached tiles.
+        """
+        x0, x1, y0, y1 = self.cluster_bounds(self.cluster_of(origin))
+        distances = {origin: 0}
+        parents = {}
+        queue = deque([origin])
+        while queue:
+            pos = queue.popleft()
+            if stats is not None:
+                stats.expansions += 1
+            x, y = pos
+            for neighbor in ((x + 1, y), (x, y + 1), (x - 1, y), (x, y - 1)):
+                nx, ny = neighbor
+                if x0 <= nx < x1 and y0 <= ny < y1 and neighbor not in distances and walkable[nx, ny]:
+                    distances[neighbor] = distances[pos] + 1
+                    parents[neighbor] = pos
+                    queue.append(neighbor)
+        return distances, parents
+
+    def local_path(self, walkable: np.ndarray, start, goal, stats: SearchStats | None = None) -> list | None:
+        """
+        Get a shortest path between two tiles of the same cluster, staying in it.
+
+        Returns
+        -------
+        list | None
+            Tiles to visit, start excluded, None if there is no way inside the cluster.
+        """
+        if goal == start:
+            return []
+        _, parents = self.local_search(walkable, start, stats)
+        if goal not in parents:
+            return None
+        path = [goal]
+        while path[-1] in parents:
+            path.append(parents[path[-1]])
+        return path[-2::-1]
+
+    def intra_path(self, node1: int, node2: int) -> list | None:
+        """
+        Get the path between two nodes of the same cluster over the walls only, cached.
+        """
+        key = (node1, node2)
+        if key not in self._intra_paths:
+            self._intra_paths[key] = self.local_path(self.free, self.nodes[node1], self.nodes[node2])
+        return self._intra_paths[key]
+
+
+def build_hpa_graph(static_layer) -> HPAGraph:
+    return HPAGraph(static_layer.walls_arr)
+
+
+def get_hpa_graph(tomasz_map) -> HPAGraph:
+    """
+    Get the abstract graph of the map, built once per match on the static layer.
+    """
+    static_layer = getattr(tomasz_map, 'static', None)
+    if static_layer is None:
+        return HPAGraph(tomasz_map.walls_arr)
+    return static_layer.get_object("hpa_graph", build_hpa_graph)
+
+
+def _abstract_search(graph: HPAGraph, start_edges, goal_edges, goal, blocked_edges, blocked_nodes, stats=None):
+    """
+    A* over the abstract graph with the start and goal linked to it by the given edges.
+
+    Returns
+    -------
+    list | None
+        The abstract path as ('start' | node | 'goal'), None if there is none.
+    """
+    counter = itertools.count()
+    g_score = {'start': 0}
+    came_from = {}
+    closed = set()
+    open_heap = [(0, next(counter), 'start')]
+
+    def neighbors(node):
+        if node == 'start':
+            return start_edges.items()
+        edges = list(graph.edges[node].items())
+        if node in goal_edges:
+            edges.append(('goal', goal_edges[node]))
+        return edges
+
+    def position(node):
+        return goal if node == 'goal' else graph.nodes[node]
+
+    while open_heap:
+        _, _, node = heapq.heappop(open_heap)
+        if node in closed:
+            continue
+        if node == 'goal':
+            path = [node]
+            while node in came_from:
+                node = came_from[node]
+                path.append(node)
+            return path[::-1]
+        closed.add(node)
+        if stats is not None:
+            stats.expansions += 1
+
+        for neighbor, cost in neighbors(node):
+            if neighbor in blocked_nodes or (node, neighbor) in blocked_edges:
+                continue
+            tentative_g_score = g_score[node] + cost
+            if tentative_g_score < g_score.get(neighbor, float('inf')):
+                g_score[neighbor] = tentative_g_score
+                came_from[neighbor] = node
+                f_score = tentative_g_score + manhattan_distance(position(neighbor), goal)
+                heapq.heappush(open_heap, (f_score, next(counter), neighbor))
+    return None
+
+
+def hpa_star(tomasz_map: TomaszMapWithHistory, start: (int, int), goal: (int, int), ignore_danger=False,
+             heuristic=None, graph: HPAGraph | None = None, stats: SearchStats | None = None):
+    """
+    Hierarchical path finding: a search on the abstract graph refined cluster by cluster.
+
+    The abstract graph only knows the walls. Danger is taken into account
+    when a step of the abstract path is refined into tiles: if a cluster can
+    not be crossed safely the step is dropped and the abstract search runs
+    again. If that fails too, the full `a_star` is run instead.
+
+    The paths are close to the shortest ones, not always the shortest.
+
+    Parameters
+    ----------
+    tomasz_map: TomaszMapWithHistory
+        Parsed map.
+    start: (int, int)
+        The starting point, (x, y).
+    goal: (int, int)
+        The goal point, (x, y).
+    ignore_danger: bool
+        Walk through dangerous tiles, walls still block.
+    heuristic:
+        Unused, for the signature of `a_star`.
+    graph: HPAGraph | None
+        The abstract graph, taken from the static layer of the map if not given.
+    stats: SearchStats | None
+        Counters to add the expansions of the abstract and the local searches to.
+
+    Returns
+    -------
+    list
+        Array of points to reach the goal, empty if there is none.
+    """
+    if start == goal:
+        return []
+    graph = graph or get_hpa_graph(tomasz_map)
+    danger_threshold = 100.0 if ignore_danger else 0.2
+    walkable = graph.free & (tomasz_map.danger <= danger_threshold)
+    if not walkable[goal]:
+        return []
+
+    start_cluster, goal_cluster = graph.cluster_of(start), graph.cluster_of(goal)
+    if start_cluster == goal_cluster:
+        direct = graph.local_path(walkable, start, goal, stats)
+        if direct is not None and len(direct) == manhattan_distance(start, goal):
+            # nothing can be shorter
+            return direct
+
+    # link the start and the goal to the nodes of their clusters
+    start_distances, _ = graph.local_search(walkable, start, stats)
+    goal_distances, _ = graph.local_search(walkable, goal, stats)
+    start_edges = {node: start_distances[graph.nodes[node]] for node in graph.cluster_nodes[start_cluster]
+                   if graph.nodes[node] in start_distances}
+    goal_edges = {node: goal_distances[graph.nodes[node]] for node in graph.cluster_nodes[goal_cluster]
+                  if graph.nodes[node] in goal_distances}
+    if goal in start_distances:
+        start_edges['goal'] = start_distances[goal]
+
+    blocked_nodes = set(np.flatnonzero(~walkable[graph.node_xs, graph.node_ys]).tolist())
+    blocked_edges = set()
+    for _ in range(len(graph.nodes) + 1):
+        abstract_path = _abstract_search(graph, start_edges, goal_edges, goal, blocked_edges, blocked_nodes, stats)
+        if abstract_path is None:
+            break
+        path = _refine(graph, walkable, abstract_path, start, goal, blocked_edges, stats)
+        if path is not None:
+            return path
+
+    if blocked_edges or (graph.free & ~walkable).any():
+        # danger may have cut the abstract graph, or the start or the goal off from the nodes of
+        # their clusters inside them, where the map is still passable
+        return a_star(tomasz_map, start, goal, ignore_danger, stats=stats)
+    return []
+
+
+def _refine(graph: HPAGraph, walkable, abstract_path, start, goal, blocked_edges, stats=None):
+    """
+    Turn the abstract path into tiles, blocking the first step that can not be walked safely.
+    """
+    path = []
+    position = start
+    for previous, node in zip(abstract_path, abstract_path[1:]):
+        target = goal if node == 'goal' else graph.nodes[node]
+        if manhattan_distance(position, target) == 1 and graph.cluster_of(position) != graph.cluster_of(target):
+            # a step between two clusters
+            path.append(target)
+        else:
+            local = None
+            if previous not in ('start', 'goal') and node not in ('start', 'goal'):
+                local = graph.intra_path(previous, node)
+                if local is not None and not all(walkable[pos] for pos in local):
+                    local = None
+            if local is None:
+                local = graph.local_path(walkable, position, target, stats)
+            if local is None:
+                blocked_edges.add((previous, node))
+                return None
+            path.extend(local)
+        position = target
+    return path
@@ -0,0 +1,224 @@
+import heapq
+import math
+from array import array
+from typing import NamedTuple, Tuple
+
+from hackathon_bot import Direction, Movement, MovementDirection, Rotation, RotationDirection
+from tomasz.a_star import get_walkable_mask
+from tomasz.map import TomaszMapWithHistory
+
+# tank directions in clockwise order, rotating right moves one step forward in it
+DIRECTIONS = (Direction.UP, Direction.RIGHT, Direction.DOWN, Direction.LEFT)
+DIRECTION_INDEX = {direction: k for k, direction in enumerate(DIRECTIONS)}
+# tile deltas (x, y) of a forward move
+DIRECTION_DELTAS = ((0, -1), (1, 0), (0, 1), (-1, 0))
+
+
+class OrientedStep(NamedTuple):
+    """
+    One tick of an oriented plan: the action and the tank state after it.
+    The action is None for a tick of waiting.
+    """
+    action: Movement | Rotation | None
+    position: Tuple[int, int]
+    direction: Direction
+
+
+def _oriented_heuristic(x, y, d, goal):
+    # every tile costs a move, and a rotation is needed if the goal is off the axis the tank faces
+    dx, dy = goal[0] - x, goal[1] - y
+    vertical = d % 2 == 0
+    needs_rotation = dx != 0 if vertical else dy != 0
+    return abs(dx) + abs(dy) + (1 if needs_rotation else 0)
+
+
+def oriented_a_star(
+        tomasz_map: TomaszMapWithHistory,
+        start: (int, int),
+        start_direction: Direction,
+        goal: (int, int),
+        ignore_danger=False,
+        allow_backwards=True,
+        rotation_cost=1.0,
+        backward_cost=1.0,
+) -> list:
+    """
+    A* over (x, y, direction) states of the tank.
+
+    Every action takes a tick: moving forward or backward one tile along the
+    direction the tank faces, or rotating it by 90 degrees. The shortest plan
+    is the one with the fewest ticks, so long straight runs are preferred
+    over zig-zags that need a rotation at every turn.
+
+    Parameters
+    ----------
+    tomasz_map: TomaszMapWithHistory
+        Parsed map.
+    start: (int, int)
+        The starting point, (x, y).
+    start_direction: Direction
+        The direction the tank is facing.
+    goal: (int, int)
+        The goal point, (x, y). Reached in any direction.
+    ignore_danger: bool
+        Walk through dangerous tiles, walls still block.
+    allow_backwards: bool
+        Whether the tank may move backwards.
+    rotation_cost: float
+        Cost of a rotation, at least 1 for the heuristic to stay admissible.
+    backward_cost: float
+        Cost of a backward move, at least 1 for the heuristic to stay admissible.
+
+    Returns
+    -------
+    list
+        OrientedStep per tick, empty if the goal is the start or unreachable.
+    """
+    width, height = tomasz_map.size
+    if start == goal:
+        return []
+
+    walkable = get_walkable_mask(tomasz_map, 100.0 if ignore_danger else 0.2)
+
+    # states are flattened to (x * H + y) * 4 + direction
+    size = width * height * 4
+    g_score = array("d", [math.inf]) * size
+    came_from = array("l", [-1]) * size
+    closed = bytearray(size)
+
+    d0 = DIRECTION_INDEX[start_direction]
+    start_state = (start[0] * height + start[1]) * 4 + d0
+    g_score[start_state] = 0.0
+    open_heap = [(_oriented_heuristic(start[0], start[1], d0, goal), start_state)]
+
+    while open_heap:
+        _, state = heapq.heappop(open_heap)
+        if closed[state]:
+            continue
+        closed[state] = 1
+
+        index, d = divmod(state, 4)
+        x, y = divmod(index, height)
+        if (x, y) == goal:
+            return _reconstruct_plan(came_from, state, height)
+
+        g = g_score[state]
+        dx, dy = DIRECTION_DELTAS[d]
+        neighbors = [
+            (x + dx, y + dy, d, 1.0),
+            (x, y, (d - 1) % 4, rotation_cost),
+            (x, y, (d + 1) % 4, rotation_cost),
+        ]
+        if allow_backwards:
+            neighbors.append((x - dx, y - dy, d, backward_cost))
+
+        for nx, ny, nd, cost in neighbors:
+            if nx < 0 or ny < 0 or nx >= width or ny >= height:
+                continue
+            neighbor_index = nx * height + ny
+            if neighbor_index != index and not walkable[neighbor_index]:
+                continue
+            neighbor = neighbor_index * 4 + nd
+            if closed[neighbor]:
+                continue
+            tentative_g_score = g + cost
+            if tentative_g_score < g_score[neighbor]:
+                came_from[neighbor] = state
+                g_score[neighbor] = tentative_g_score
+                f_score = tentative_g_score + _oriented_heuristic(nx, ny, nd, goal)
+                heapq.heappush(open_heap, (f_score, neighbor))
+
+    return []
+
+
+def get_step(previous_state: int, state: int, height: int) -> OrientedStep:
+    """
+    Get the step going from one flat (x * H + y) * 4 + direction state to the next.
+    """
+    previous_index, previous_d = divmod(previous_state, 4)
+    index, d = divmod(state, 4)
+    if index == previous_index:
+        rotation = RotationDirection.RIGHT if d == (previous_d + 1) % 4 else RotationDirection.LEFT
+        action = Rotation(rotation, None)
+    else:
+        dx, dy = DIRECTION_DELTAS[d]
+        forward = index - previous_index == dx * height + dy
+        action = Movement(MovementDirection.FORWARD if forward else MovementDirection.BACKWARD)
+    return OrientedStep(action, divmod(index, height), DIRECTIONS[d])
+
+
+def _reconstruct_plan(came_from, state, height):
+    """
+    Reconstruct the plan from the came_from buffer.
+
+    Returns
+    -------
+    list
+        OrientedStep per tick from the start (excluded) to the state.
+    """
+    plan = []
+    while came_from[state] != -1:
+        previous_state = came_from[state]
+        plan.append(get_step(previous_state, state, height))
+        state = previous_state
+    return plan[::-1]
+
+
+def get_plan_positions(plan, waits=False) -> list:
+    """
+    Get the tiles visited by a plan, one per move, like the path of `a_star`.
+    With `waits` a tick of waiting repeats the tile, like the path of `space_time_a_star`.
+    """
+    positions = []
+    for step in plan:
+        if isinstance(step.action, Movement) or (waits and step.action is None):
+            positions.append(step.position)
+    return positions
+
+
+def compile_path(start: (int, int), start_direction: Direction, path, allow_backwards=False) -> list:
+    """
+    Turn a tile path into the action of every tick, the inverse of `get_plan_positions`.
+
+    The tank rotates the short way before every turn and moves forward, or
+    backward to a tile behind it if allowed. A repeated tile is a tick of
+    waiting, with None as its action.
+
+    Parameters
+    ----------
+    start: (int, int)
+        The position of the tank, (x, y).
+    start_direction: Direction
+        The direction the tank is facing.
+    path: list
+        Tiles to enter, each next to the previous one or equal to it.
+    allow_backwards: bool
+        Whether the tank may move backwards.
+
+    Returns
+    -------
+    list
+        OrientedStep per tick.
+    """
+    steps = []
+    position, d = start, DIRECTION_INDEX[start_direction]
+    for tile in path:
+        delta = tile[0] - position[0], tile[1] - position[1]
+        if delta == (0, 0):
+            steps.append(OrientedStep(None, position, DIRECTIONS[d]))
+            continue
+        if delta not in DIRECTION_DELTAS:
+            raise ValueError(f"Tile {tile} is not next to {position}")
+
+        target = DIRECTION_DELTAS.index(delta)
+        if allow_backwards and target == (d + 2) % 4:
+            steps.append(OrientedStep(Movement(MovementDirection.BACKWARD), tile, DIRECTIONS[d]))
+        else:
+            turns = (target - d) % 4
+            rotation = RotationDirection.LEFT if turns == 3 else RotationDirection.RIGHT
+            for _ in range(min(turns, 4 - turns)):
+                d = (d + (-1 if turns == 3 else 1)) % 4
+                steps.append(OrientedStep(Rotation(rotation, None), position, DIRECTIONS[d]))
+            steps.append(OrientedStep(Movement(MovementDirection.FORWARD), tile, DIRECTIONS[d]))
+        position = tile
+    return steps
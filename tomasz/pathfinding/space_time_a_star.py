@@ -0,0 +1,274 @@
+import heapq
+import itertools
+import time
+
+import numpy as np
+
+from hackathon_bot import Direction, Movement, MovementDirection, Rotation, RotationDirection
+from tomasz.a_star import get_movements_4n
+from tomasz.map import TomaszMapWithHistory
+from tomasz.map.danger_forecast import FORECAST_HORIZON, get_tile_danger
+from tomasz.pathfinding.oriented_a_star import (
+    DIRECTION_DELTAS,
+    DIRECTION_INDEX,
+    DIRECTIONS,
+    OrientedStep,
+    _oriented_heuristic,
+)
+
+
+def manhattan_distance(point1: (int, int), point2: (int, int)):
+    return abs(point1[0] - point2[0]) + abs(point1[1] - point2[1])
+
+
+def get_static_blocked(tomasz_map: TomaszMapWithHistory, danger_threshold=0.2) -> np.ndarray:
+    """
+    Get the tiles blocked regardless of time: walls and danger other than bullets.
+
+    Bullets are left out, the forecast tells when they actually are on a tile.
+
+    Returns
+    -------
+    np.ndarray
+        Boolean grid, True for blocked tiles.
+    """
+    danger = tomasz_map.danger_layer.get_grid_without(('bullet',))
+    return (tomasz_map.walls_arr == 1) | (danger > danger_threshold)
+
+
+def _reconstruct_path(came_from, state):
+    total_path = []
+    while state in came_from:
+        total_path.append(state[:2])
+        state = came_from[state]
+    return total_path[::-1]
+
+
+def space_time_a_star(
+        tomasz_map: TomaszMapWithHistory,
+        start: (int, int),
+        goal: (int, int),
+        forecast: np.ndarray | None = None,
+        danger_threshold=0.2,
+        time_budget=0.01,
+        max_ticks=None,
+):
+    """
+    A* over (x, y, t) states that dodges the bullets predicted by the forecast.
+
+    Every tick the tank moves to a neighbour or waits in place. A tile can be
+    entered at tick t only if no bullet is predicted on it at t - 1 or t, so
+    the path is collision-free at the time each tile is entered. After the
+    forecast horizon the search continues as a plain A* on the static tiles.
+
+    Rotations are not modelled, a tank that has to turn enters the tiles
+    later than planned. See `oriented_space_time_a_star` for the actions of
+    the tank.
+
+    Parameters
+    ----------
+    tomasz_map: TomaszMapWithHistory
+        Parsed map.
+    start: (int, int)
+        The starting point, (x, y).
+    goal: (int, int)
+        The goal point, (x, y).
+    forecast: np.ndarray | None
+        Bullet forecast of shape (T, W, H), see `get_danger_forecast`.
+        Taken from the map if not given.
+    danger_threshold: float
+        Tiles with higher danger from other sources than bullets are blocked.
+    time_budget: float
+        Maximum search time in seconds, the search gives up after it.
+    max_ticks: int | None
+        Maximum length of the path in ticks, waiting included.
+
+    Returns
+    -------
+    list
+        Tiles to be on after each tick, a repeated tile means waiting.
+        Empty if no path was found.
+    """
+    if forecast is None:
+        forecast = tomasz_map.danger_forecast(FORECAST_HORIZON)
+    horizon = len(forecast)
+    blocked = get_static_blocked(tomasz_map, danger_threshold)
+    size = tomasz_map.size
+    if max_ticks is None:
+        max_ticks = horizon + size[0] * size[1]
+
+    def is_dangerous(x, y, t):
+        # there is no bullet prediction after the horizon
+        return get_tile_danger(forecast, x, y, t) > 0
+
+    moves = [(dx, dy) for dx, dy, _ in get_movements_4n()] + [(0, 0)]
+    deadline = time.perf_counter() + time_budget
+    counter = itertools.count()
+
+    start_state = (start[0], start[1], 0)
+    g_score = {start_state: 0}
+    came_from = {}
+    closed_set = set()
+    open_heap = [(manhattan_distance(start, goal), next(counter), start_state)]
+
+    while open_heap:
+        _, _, state = heapq.heappop(open_heap)
+        if state in closed_set:
+            continue
+        closed_set.add(state)
+
+        x, y, t = state
+        if (x, y) == goal:
+            return _reconstruct_path(came_from, state)
+
+        g = g_score[state]
+        if g >= max_ticks:
+            continue
+        if len(closed_set) % 64 == 0 and time.perf_counter() > deadline:
+            return []
+
+        for dx, dy in moves:
+            nx, ny = x + dx, y + dy
+            if nx < 0 or ny < 0 or nx >= size[0] or ny >= size[1] or blocked[nx, ny]:
+                continue
+            nt = min(t + 1, horizon)
+            if is_dangerous(nx, ny, nt):
+                continue
+            if nt == horizon and (dx, dy) == (0, 0):
+                # waiting after the horizon never helps
+                continue
+
+            neighbor = (nx, ny, nt)
+            tentative_g_score = g + 1
+            if tentative_g_score < g_score.get(neighbor, float('inf')):
+                came_from[neighbor] = state
+                g_score[neighbor] = tentative_g_score
+                f_score = tentative_g_score + manhattan_distance((nx, ny), goal)
+                heapq.heappush(open_heap, (f_score, next(counter), neighbor))
+
+    return []
+
+
+def _reconstruct_plan(came_from, state):
+    plan = []
+    while state in came_from:
+        state, step = came_from[state]
+        plan.append(step)
+    return plan[::-1]
+
+
+def oriented_space_time_a_star(
+        tomasz_map: TomaszMapWithHistory,
+        start: (int, int),
+        start_direction: Direction,
+        goal: (int, int),
+        forecast: np.ndarray | None = None,
+        danger_threshold=0.2,
+        allow_backwards=True,
+        time_budget=0.01,
+        max_ticks=None,
+) -> list:
+    """
+    A* over (x, y, direction, t) states that dodges the bullets predicted by the forecast.
+
+    Every tick the tank takes one action of `oriented_a_star`, moving forward
+    or backward, rotating by 90 degrees, or waits. The tank can be on a tile
+    at tick t only if `get_tile_danger` is 0 there, whichever action brought
+    it there, so the plan is collision-free tick by tick, rotations and waits
+    included. After the forecast horizon the search continues as a plain
+    `oriented_a_star` on the static tiles.
+
+    Parameters
+    ----------
+    tomasz_map: TomaszMapWithHistory
+        Parsed map.
+    start: (int, int)
+        The starting point, (x, y).
+    start_direction: Direction
+        The direction the tank is facing.
+    goal: (int, int)
+        The goal point, (x, y). Reached in any direction.
+    forecast: np.ndarray | None
+        Bullet forecast of shape (T, W, H), see `get_danger_forecast`.
+        Taken from the map if not given.
+    danger_threshold: float
+        Tiles with higher danger from other sources than bullets are blocked.
+    allow_backwards: bool
+        Whether the tank may move backwards.
+    time_budget: float
+        Maximum search time in seconds, the search gives up after it.
+    max_ticks: int | None
+        Maximum length of the plan in ticks, waiting included.
+
+    Returns
+    -------
+    list
+        OrientedStep per tick, None as the action of a tick of waiting.
+        Empty if the goal is the start or no plan was found.
+    """
+    if start == goal:
+        return []
+    if forecast is None:
+        forecast = tomasz_map.danger_forecast(FORECAST_HORIZON)
+    horizon = len(forecast)
+    blocked = get_static_blocked(tomasz_map, danger_threshold)
+    width, height = tomasz_map.size
+    if max_ticks is None:
+        max_ticks = horizon + width * height * 4
+
+    deadline = time.perf_counter() + time_budget
+    counter = itertools.count()
+
+    d0 = DIRECTION_INDEX[start_direction]
+    start_state = (start[0], start[1], d0, 0)
+    g_score = {start_state: 0}
+    came_from = {}
+    closed_set = set()
+    open_heap = [(_oriented_heuristic(start[0], start[1], d0, goal), next(counter), start_state)]
+
+    while open_heap:
+        _, _, state = heapq.heappop(open_heap)
+        if state in closed_set:
+            continue
+        closed_set.add(state)
+
+        x, y, d, t = state
+        if (x, y) == goal:
+            return _reconstruct_plan(came_from, state)
+
+        g = g_score[state]
+        if g >= max_ticks:
+            continue
+        if len(closed_set) % 64 == 0 and time.perf_counter() > deadline:
+            return []
+
+        nt = min(t + 1, horizon)
+        dx, dy = DIRECTION_DELTAS[d]
+        neighbors = [
+            (x + dx, y + dy, d, Movement(MovementDirection.FORWARD)),
+            (x, y, (d - 1) % 4, Rotation(RotationDirection.LEFT, None)),
+            (x, y, (d + 1) % 4, Rotation(RotationDirection.RIGHT, None)),
+        ]
+        if allow_backwards:
+            neighbors.append((x - dx, y - dy, d, Movement(MovementDirection.BACKWARD)))
+        if nt < horizon:
+            # waiting after the horizon never helps
+            neighbors.append((x, y, d, None))
+
+        for nx, ny, nd, action in neighbors:
+            if nx < 0 or ny < 0 or nx >= width or ny >= height:
+                continue
+            if (nx, ny) != (x, y) and blocked[nx, ny]:
+                continue
+            if get_tile_danger(forecast, nx, ny, nt) > 0:
+                continue
+
+            neighbor = (nx, ny, nd, nt)
+            tentative_g_score = g + 1
+            if tentative_g_score < g_score.get(neighbor, float('inf')):
+                came_from[neighbor] = (state, OrientedStep(action, (nx, ny), DIRECTIONS[nd]))
+                g_score[neighbor] = tentative_g_score
+                f_score = tentative_g_score + _oriented_heuristic(nx, ny, nd, goal)
+                heapq.heappush(open_heap, (f_score, next(counter), neighbor))
+
+    return []
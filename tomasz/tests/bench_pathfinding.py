@@ -0,0 +1,195 @@
+"""Benchmark of the path finders on generated MonoTanks-like maps.
+
+Run with `python -m tomasz.tests.bench_pathfinding`. Every path finder is run
+on the same start and goal pairs, half of the goals in zones. Its paths are
+checked against the shortest lengths of a reference BFS, and the time, the
+number of expanded nodes, counted by the path finder itself, and the peak
+memory of a query are recorded.
+"""
+
+import argparse
+import inspect
+import time
+import tracemalloc
+from functools import partial
+from typing import NamedTuple
+
+import numpy as np
+
+from tomasz.a_star import SearchStats, a_star
+from tomasz.pathfinding.ara_star import ara_star
+from tomasz.pathfinding.hpa_star import HPAGraph, hpa_star
+from tomasz.pathfinding.jps import jps
+from tomasz.tests.map_builder import generate_monotanks_map
+from tomasz.tests.test_a_star import reference_a_star
+from tomasz.tests.test_distance_field import reference_distances
+
+SIZES = (20, 50, 100, 200)
+# time budget of ara_star, its paths may be longer when it runs out
+ARA_TIME_BUDGET = 0.005
+DANGER_THRESHOLD = 0.2
+
+# {name: function preparing the path finder for a map}, the preparation is timed apart
+PATH_FINDERS = {
+    "a_star": lambda grid_map: a_star,
+    "jps": lambda grid_map: jps,
+    "hpa_star": lambda grid_map: partial(hpa_star, graph=HPAGraph(grid_map.walls_arr)),
+    "ara_star": lambda grid_map: lambda *args, **kwargs: ara_star(*args, time_budget=ARA_TIME_BUDGET, **kwargs).path,
+}
+
+
+class BenchmarkRow(NamedTuple):
+    size: int
+    name: str
+    # seconds to prepare the path finder for the map
+    setup: float
+    # mean per query
+    seconds: float
+    # mean expanded nodes per query, None if the path finder does not count them
+    expansions: float | None
+    peak_kib: float
+    # mean ratio of the path lengths to the shortest ones, inf if the reachability differs
+    length_ratio: float
+    # number of paths that are not valid
+    invalid: int
+
+
+def get_query_pairs(rng, grid_map, count):
+    """
+    Get start and goal pairs on free tiles, every other goal in a zone.
+    """
+    free = [tuple(int(v) for v in pos) for pos in np.argwhere(grid_map.walls_arr == 0)]
+    zone_tiles = [pos for tiles in getattr(grid_map, "zones", {}).values() for pos in tiles]
+    pairs = []
+    for k in range(count):
+        start = free[rng.integers(len(free))]
+        goals = zone_tiles if zone_tiles and k % 2 else free
+        pairs.append((start, goals[rng.integers(len(goals))]))
+    return pairs
+
+
+def reference_lengths(grid_map, pairs, danger_threshold=DANGER_THRESHOLD):
+    """
+    Get the shortest path lengths with a plain BFS, 0 for unreachable goals.
+    """
+    walkable = (grid_map.walls_arr == 0) & (grid_map.danger <= danger_threshold)
+    lengths = []
+    for start, goal in pairs:
+        distance = int(reference_distances(walkable, start)[goal])
+        lengths.append(max(distance, 0))
+    return lengths
+
+
+def is_valid_path(grid_map, start, goal, path, danger_threshold=DANGER_THRESHOLD) -> bool:
+    """
+    Check that the path goes from a neighbour of the start to the goal over walkable tiles.
+    """
+    previous = start
+    for pos in path:
+        if abs(pos[0] - previous[0]) + abs(pos[1] - previous[1]) != 1:
+            return False
+        if grid_map.walls_arr[pos] == 1 or grid_map.danger[pos] > danger_threshold:
+            return False
+        previous = pos
+    return not path or previous == goal
+
+
+def _length_ratio(lengths, expected):
+    if [length > 0 for length in lengths] != [length > 0 for length in expected]:
+        return float('inf')
+    ratios = [length / shortest for length, shortest in zip(lengths, expected) if shortest > 0]
+    return float(np.mean(ratios)) if ratios else 1.0
+
+
+def reports_expansions(path_finder) -> bool:
+    """
+    Check that the path finder takes the `stats` to count its expansions in.
+    """
+    parameters = inspect.signature(path_finder).parameters.values()
+    return any(parameter.name == "stats" or parameter.kind == parameter.VAR_KEYWORD for parameter in parameters)
+
+
+def measure_path_finder(path_finder, grid_map, pairs, expected):
+    """
+    Run the queries twice: timed, then with the expansions and the memory counted.
+
+    Returns
+    -------
+    (float, float | None, float, float, int)
+        Mean seconds, mean expanded nodes, None if the path finder does not
+        count them, mean peak KiB, length ratio and number of invalid paths.
+    """
+    paths = []
+    start_time = time.perf_counter()
+    for start, goal in pairs:
+        paths.append(path_finder(grid_map, start, goal))
+    seconds = (time.perf_counter() - start_time) / len(pairs)
+
+    stats = SearchStats() if reports_expansions(path_finder) else None
+    peaks = []
+    tracemalloc.start()
+    for start, goal in pairs:
+        tracemalloc.reset_peak()
+        before = tracemalloc.get_traced_memory()[0]
+        if stats is None:
+            path_finder(grid_map, start, goal)
+        else:
+            path_finder(grid_map, start, goal, stats=stats)
+        peaks.append(tracemalloc.get_traced_memory()[1] - before)
+    tracemalloc.stop()
+
+    invalid = sum(not is_valid_path(grid_map, start, goal, path) for (start, goal), path in zip(pairs, paths))
+    lengths = [len(path) for path in paths]
+    expansions = None if stats is None else stats.expansions / len(pairs)
+    return seconds, expansions, float(np.mean(peaks)) / 1024, _length_ratio(lengths, expected), invalid
+
+
+def run_benchmark(sizes=SIZES, pairs_count=10, wall_density=0.2, seed=0, reference_max_size=200):
+    """
+    Measure every path finder and the reference A* on generated maps.
+
+    The reference A* is slow on large maps, it only runs up to `reference_max_size`.
+
+    Returns
+    -------
+    list
+        BenchmarkRow per map size and path finder.
+    """
+    rng = np.random.default_rng(seed)
+    rows = []
+    for size in sizes:
+        grid_map = generate_monotanks_map(rng, size, wall_density=wall_density)
+        pairs = get_query_pairs(rng, grid_map, pairs_count)
+        expected = reference_lengths(grid_map, pairs)
+
+        path_finders = dict(PATH_FINDERS)
+        if size <= reference_max_size:
+            path_finders = {"reference": lambda grid_map: reference_a_star, **path_finders}
+        for name, prepare in path_finders.items():
+            start_time = time.perf_counter()
+            path_finder = prepare(grid_map)
+            setup = time.perf_counter() - start_time
+            rows.append(BenchmarkRow(size, name, setup, *measure_path_finder(path_finder, grid_map, pairs, expected)))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(SIZES))
+    parser.add_argument("--pairs", type=int, default=10)
+    parser.add_argument("--walls", type=float, default=0.2)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--reference-max-size", type=int, default=200)
+    args = parser.parse_args()
+
+    rows = run_benchmark(args.sizes, args.pairs, args.walls, args.seed, args.reference_max_size)
+    print(f"{'size':>6} {'path finder':<12} {'setup ms':>10} {'ms/path':>10} {'expanded':>10} "
+          f"{'peak KiB':>10} {'length':>8} {'invalid':>8}")
+    for row in rows:
+        expansions = "N/A" if row.expansions is None else f"{row.expansions:.0f}"
+        print(f"{row.size:>6} {row.name:<12} {row.setup * 1e3:>10.1f} {row.seconds * 1e3:>10.3f} "
+              f"{expansions:>10} {row.peak_kib:>10.1f} {row.length_ratio:>8.3f} {row.invalid:>8}")
+
+
+if __name__ == "__main__":
+    main()
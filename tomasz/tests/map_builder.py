@@ -0,0 +1,173 @@
+"""Helpers building game states for the tomasz tests from ASCII drawings.
+
+Each line of the drawing is a row of the map (y), each character a tile (x):
+    # - wall
+    . - empty visible tile
+    ? - empty tile outside of the field of view
+    A - agent tank (facing `agent_direction`)
+    T - enemy tank (facing and aiming `enemy_direction`)
+    M - mine
+    I - item
+    ^ > v < - bullets flying up, right, down and left
+"""
+
+import numpy as np
+
+from hackathon_bot.enums import BulletType, Direction, ItemType, ZoneStatus
+from hackathon_bot.models import (
+    AgentTankModel,
+    BulletModel,
+    GameStateModel,
+    ItemModel,
+    MapModel,
+    MineModel,
+    PlayerModel,
+    TankModel,
+    TileModel,
+    TurretModel,
+    WallModel,
+    ZoneModel,
+)
+
+AGENT_ID = "agent"
+ENEMY_ID = "enemy"
+
+BULLET_DIRECTIONS = {
+    "^": Direction.UP,
+    ">": Direction.RIGHT,
+    "v": Direction.DOWN,
+    "<": Direction.LEFT,
+}
+
+
+def make_zone(x, y, width, height, index=ord("A")):
+    """Creates a neutral zone model."""
+    return ZoneModel(x, y, width, height, index, ZoneStatus.NEUTRAL)
+
+
+def _tile_entities(char, agent_direction, enemy_direction, bullet_speed):
+    if char == "#":
+        return [WallModel()]
+    if char == "A":
+        turret = TurretModel(agent_direction, bullet_count=3)
+        return [AgentTankModel(AGENT_ID, agent_direction, turret, 100)]
+    if char == "T":
+        return [TankModel(ENEMY_ID, enemy_direction, TurretModel(enemy_direction))]
+    if char == "M":
+        return [MineModel(1, None)]
+    if char == "I":
+        return [ItemModel(ItemType.DOUBLE_BULLET)]
+    if char in BULLET_DIRECTIONS:
+        return [BulletModel(1, bullet_speed, BULLET_DIRECTIONS[char], BulletType.BASIC)]
+    return []
+
+
+def build_game_state(
+    drawing,
+    zones=(),
+    tick=0,
+    agent_direction=Direction.UP,
+    enemy_direction=Direction.UP,
+    bullet_speed=2.0,
+):
+    """Creates a game state model from an ASCII drawing of the map."""
+    rows = [line.strip() for line in drawing.strip().splitlines()]
+
+    tiles = []
+    for y, row in enumerate(rows):
+        tile_row = []
+        for x, char in enumerate(row):
+            zone = next(
+                (z for z in zones if z.x <= x < z.x + z.width and z.y <= y < z.y + z.height),
+                None,
+            )
+            entities = _tile_entities(char, agent_direction, enemy_direction, bullet_speed)
+            tile_row.append(TileModel(entities, zone, char != "?"))
+        tiles.append(tuple(tile_row))
+
+    visibility = tuple("".join("0" if c == "?" else "1" for c in row) for row in rows)
+    agent = PlayerModel(AGENT_ID, "agent", 0)
+    return GameStateModel(
+        id="game_state_id",
+        tick=tick,
+        my_agent=agent,
+        players=(agent, PlayerModel(ENEMY_ID, "enemy", 1)),
+        map=MapModel(tuple(tiles), tuple(zones), visibility),
+    )
+
+
+class GridMap:
+    """Bare map with only the grids the path finders read, for large generated maps."""
+
+    def __init__(self, walls_arr, danger=None):
+        self.walls_arr = walls_arr
+        self.size = walls_arr.shape
+        self.danger = np.zeros(self.size, dtype=float) if danger is None else danger
+
+
+def random_grid_map(rng, size, wall_density=0.25, danger_density=0.0):
+    """Generate a GridMap with random walls and random danger, rng is a np.random.Generator."""
+    walls_arr = (rng.random((size, size)) < wall_density).astype(int)
+    danger = np.where(rng.random((size, size)) < danger_density, rng.random((size, size)), 0.0)
+    return GridMap(walls_arr, danger)
+
+
+def generate_monotanks_map(rng, size, wall_density=0.2, zone_count=2, mine_count=None, ray_count=None):
+    """
+    Generate a GridMap resembling a MonoTanks map, rng is a np.random.Generator.
+
+    Walls are straight segments, zones are square areas free of walls and
+    danger comes from mines on single tiles and from rays that decay along a
+    row or a column until a wall, like bullets and turrets. The zone tiles
+    are kept in `zones`, {zone_idx: [(x, y), ...]}.
+    """
+    walls_arr = np.zeros((size, size), dtype=int)
+    while walls_arr.mean() < wall_density:
+        length = int(rng.integers(2, max(3, size // 4)))
+        x, y = int(rng.integers(size)), int(rng.integers(size))
+        if rng.random() < 0.5:
+            walls_arr[x:x + length, y] = 1
+        else:
+            walls_arr[x, y:y + length] = 1
+
+    zones = {}
+    side = max(2, size // 10)
+    for k in range(zone_count):
+        x, y = int(rng.integers(size - side + 1)), int(rng.integers(size - side + 1))
+        walls_arr[x:x + side, y:y + side] = 0
+        zones[chr(ord("A") + k)] = [(x + i, y + j) for i in range(side) for j in range(side)]
+
+    survival = np.ones((size, size), dtype=float)
+    free = np.argwhere(walls_arr == 0)
+    mine_count = size // 4 if mine_count is None else mine_count
+    ray_count = size // 4 if ray_count is None else ray_count
+    for x, y in free[rng.integers(len(free), size=mine_count)]:
+        survival[x, y] = 0
+    for x, y in free[rng.integers(len(free), size=ray_count)]:
+        dx, dy = ((1, 0), (-1, 0), (0, 1), (0, -1))[rng.integers(4)]
+        value = 0.7
+        while 0 <= x < size and 0 <= y < size and walls_arr[x, y] == 0:
+            survival[x, y] *= 1 - value
+            x, y, value = x + dx, y + dy, value * 0.7
+
+    grid_map = GridMap(walls_arr, 1 - survival)
+    grid_map.zones = zones
+    return grid_map
+
+
+def grid_map_drawing(grid_map, agent=None):
+    """Draw a generated GridMap for `build_game_state`, tiles with danger 1 become mines."""
+    rows = []
+    for y in range(grid_map.size[1]):
+        row = ""
+        for x in range(grid_map.size[0]):
+            if (x, y) == agent:
+                row += "A"
+            elif grid_map.walls_arr[x, y]:
+                row += "#"
+            elif grid_map.danger[x, y] >= 1:
+                row += "M"
+            else:
+                row += "."
+        rows.append(row)
+    return "\n".join(rows)
@@ -0,0 +1,125 @@
+"""Tests for the a_star module."""
+
+import numpy as np
+import pytest
+
+from tomasz.a_star import a_star, get_movements_4n, euclidean_distance, is_walkable
+from tomasz.map import TomaszMap, TomaszMapWithHistory
+from tomasz.tests.map_builder import GridMap, build_game_state, random_grid_map
+
+# pylint: disable=invalid-name
+
+
+def reference_a_star(tomasz_map, start, goal, ignore_danger=False, heuristic=euclidean_distance):
+    """A* picking the best tile with min() over the open set, the way a_star did before the heap."""
+    danger_threshold = 100.0 if ignore_danger else 0.2
+    open_set = {start}
+    closed_set = set()
+    came_from = {}
+    g_score = {start: 0.0}
+    f_score = {start: heuristic(start, goal)}
+
+    while open_set:
+        current = min(open_set, key=lambda x: f_score[x])
+        if current == goal:
+            path = [current]
+            while current in came_from:
+                current = came_from[current]
+                path.append(current)
+            return path[:-1][::-1]
+
+        open_set.remove(current)
+        closed_set.add(current)
+        for dx, dy, _ in get_movements_4n():
+            neighbor = current[0] + dx, current[1] + dy
+            if not is_walkable(tomasz_map, neighbor, danger_threshold):
+                continue
+            tentative_g_score = g_score[current] + 1
+            if neighbor in closed_set and tentative_g_score >= g_score.get(neighbor, 0):
+                continue
+            if neighbor not in open_set or tentative_g_score < g_score.get(neighbor, 0):
+                came_from[neighbor] = current
+                g_score[neighbor] = tentative_g_score
+                f_score[neighbor] = g_score[neighbor] + heuristic(neighbor, goal)
+                open_set.add(neighbor)
+
+    return []
+
+
+def random_free_tile(rng, grid_map):
+    free = np.argwhere(grid_map.walls_arr == 0)
+    return tuple(int(v) for v in free[rng.integers(len(free))])
+
+
+def assert_path_valid(grid_map, start, goal, path, danger_threshold=0.2):
+    assert path[-1] == goal
+    for previous, current in zip([start, *path], path):
+        assert abs(previous[0] - current[0]) + abs(previous[1] - current[1]) == 1
+        assert grid_map.walls_arr[current] == 0
+        assert grid_map.danger[current] <= danger_threshold
+
+
+@pytest.mark.parametrize("seed", range(5))
+@pytest.mark.parametrize("ignore_danger", [False, True])
+def test_a_star__same_length_as_reference(seed, ignore_danger):
+    """Test that the heap based search finds paths as short as the reference one."""
+
+    rng = np.random.default_rng(seed)
+    grid_map = random_grid_map(rng, 24, wall_density=0.25, danger_density=0.1)
+
+    for _ in range(10):
+        start, goal = random_free_tile(rng, grid_map), random_free_tile(rng, grid_map)
+        path = a_star(grid_map, start, goal, ignore_danger)
+        expected = reference_a_star(grid_map, start, goal, ignore_danger)
+
+        assert len(path) == len(expected)
+        if path:
+            assert_path_valid(grid_map, start, goal, path, 100.0 if ignore_danger else 0.2)
+
+
+def test_a_star__no_wrap_around():
+    """Test that the flat index never steps across the edge of the map."""
+
+    grid_map = GridMap(np.zeros((4, 4), dtype=int))
+
+    # (0, 3) and (1, 0) are next to each other in the flat buffer only
+    path = a_star(grid_map, (0, 3), (1, 0))
+
+    assert len(path) == 4
+    assert_path_valid(grid_map, (0, 3), (1, 0), path)
+
+
+def test_a_star__start_is_goal():
+    """Test that reaching the start needs no steps."""
+
+    grid_map = GridMap(np.zeros((3, 3), dtype=int))
+
+    assert a_star(grid_map, (1, 1), (1, 1)) == []
+
+
+def test_a_star__walkable_mask_follows_danger():
+    """Test that the cached walkability is rebuilt when the danger map changes."""
+
+    drawing = """
+        .....
+        .....
+        .....
+        .....
+        .....
+    """
+    history = TomaszMapWithHistory(build_game_state(drawing))
+    history.update(TomaszMap(build_game_state(drawing)))
+    assert len(a_star(history, (0, 2), (4, 2))) == 4
+
+    with_mine = """
+        .....
+        .....
+        ..M..
+        .....
+        .....
+    """
+    history.update(TomaszMap(build_game_state(with_mine)))
+    path = a_star(history, (0, 2), (4, 2))
+
+    assert len(path) == 6
+    assert (2, 2) not in path
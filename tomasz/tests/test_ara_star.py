@@ -0,0 +1,89 @@
+"""Tests for the ara_star module."""
+
+import time
+
+import numpy as np
+import pytest
+
+from tomasz.a_star import a_star
+from tomasz.pathfinding.ara_star import ara_star
+from tomasz.pathfinding.danger_weighted_a_star import danger_weighted_a_star
+from tomasz.tests.map_builder import GridMap, random_grid_map
+from tomasz.tests.test_hpa_star import assert_valid_path
+from tomasz.tests.test_movement import DRAWING, make_movement
+
+# pylint: disable=invalid-name
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_ara_star__without_deadline_paths_are_shortest(seed):
+    rng = np.random.default_rng(seed)
+    grid_map = random_grid_map(rng, 30, wall_density=0.25, danger_density=0.05)
+    free = [tuple(int(v) for v in pos) for pos in np.argwhere(grid_map.walls_arr == 0)]
+
+    for _ in range(10):
+        start, goal = free[rng.integers(len(free))], free[rng.integers(len(free))]
+        result = ara_star(grid_map, start, goal, time_budget=None)
+        expected = a_star(grid_map, start, goal)
+
+        assert len(result.path) == len(expected)
+        if expected:
+            assert_valid_path(grid_map, start, goal, result.path)
+            assert result.bound == 1.0
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_ara_star__first_path_respects_its_bound(seed):
+    """Test that the path of a single inflated search is within the reported bound."""
+
+    rng = np.random.default_rng(seed)
+    grid_map = random_grid_map(rng, 30, wall_density=0.3)
+    free = [tuple(int(v) for v in pos) for pos in np.argwhere(grid_map.walls_arr == 0)]
+
+    for _ in range(10):
+        start, goal = free[rng.integers(len(free))], free[rng.integers(len(free))]
+        result = ara_star(grid_map, start, goal, time_budget=None, epsilons=(3.0,))
+        expected = a_star(grid_map, start, goal)
+
+        if expected:
+            assert 1.0 <= result.bound <= 3.0
+            assert len(result.path) <= result.bound * len(expected)
+
+
+def test_ara_star__stops_at_the_deadline():
+    """Test that a walled off goal on a large map does not take longer than the budget."""
+
+    walls_arr = np.zeros((200, 200), dtype=int)
+    walls_arr[150, 140:160] = walls_arr[160, 140:160] = 1
+    walls_arr[150:161, 140] = walls_arr[150:161, 159] = 1
+    grid_map = GridMap(walls_arr)
+
+    start_time = time.perf_counter()
+    result = ara_star(grid_map, (0, 0), (155, 150), time_budget=0.005)
+
+    assert result.path == []
+    assert result.bound == float('inf')
+    assert time.perf_counter() - start_time < 0.05
+
+
+def test_ara_star__with_danger_penalty_matches_danger_weighted_a_star():
+    rng = np.random.default_rng(0)
+    grid_map = random_grid_map(rng, 15, wall_density=0.2, danger_density=0.3)
+    free = [tuple(int(v) for v in pos) for pos in np.argwhere(grid_map.walls_arr == 0)]
+
+    for _ in range(10):
+        start, goal = free[rng.integers(len(free))], free[rng.integers(len(free))]
+        path = ara_star(grid_map, start, goal, time_budget=None, danger_penalty=10.0).path
+        expected = danger_weighted_a_star(grid_map, start, goal, danger_penalty=10.0)
+        cost = sum(1 + 10.0 * grid_map.danger[pos] for pos in path)
+        assert cost == pytest.approx(sum(1 + 10.0 * grid_map.danger[pos] for pos in expected))
+
+
+def test_MovementSystem__reports_the_bound_of_the_path():
+    """Test that a target cut off by danger is searched with the time budget."""
+
+    blocked = DRAWING.replace(".......\n    .......\n    .......\n", ".......\n    .......\n    MMMMMMM\n", 1)
+    _, movement = make_movement(blocked)
+
+    assert movement.path[-1] == (0, 6)
+    assert movement.path_bound == 1.0
@@ -0,0 +1,106 @@
+"""Tests for the d_star_lite module."""
+
+import numpy as np
+import pytest
+
+from tomasz.a_star import get_walkable_mask
+from tomasz.map import TomaszMap, TomaszMapWithHistory
+from tomasz.movement import MovementSystem
+from tomasz.pathfinding.d_star_lite import DStarLite
+from tomasz.pathfinding.oriented_a_star import DIRECTIONS, get_plan_positions, oriented_a_star
+from tomasz.tests.map_builder import GridMap, build_game_state, random_grid_map
+
+# pylint: disable=invalid-name
+
+
+def plan_length(d_star):
+    d_star.compute_shortest_path()
+    return len(d_star.get_plan())
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_DStarLite__repairs_match_a_fresh_search(seed):
+    """Test that after moving and danger changes the repaired plan is as short as a new one."""
+
+    rng = np.random.default_rng(seed)
+    grid_map = random_grid_map(rng, 14, wall_density=0.2, danger_density=0.1)
+    free = [tuple(int(v) for v in pos) for pos in np.argwhere(grid_map.walls_arr == 0)]
+    start, goal = free[rng.integers(len(free))], free[rng.integers(len(free))]
+    direction = DIRECTIONS[rng.integers(4)]
+
+    d_star = DStarLite(get_walkable_mask(grid_map), grid_map.size, start, direction, goal)
+    assert plan_length(d_star) == len(oriented_a_star(grid_map, start, direction, goal))
+
+    for _ in range(6):
+        plan = d_star.get_plan()
+        if plan:
+            step = plan[min(2, len(plan) - 1)]
+            start, direction = step.position, step.direction
+            d_star.update_start(start, direction)
+        appearing = rng.random(grid_map.size) < 0.05
+        lasting = rng.random(grid_map.size) < 0.9
+        grid_map.danger = np.where(appearing, 1.0, grid_map.danger * lasting)
+        d_star.update_walkable(get_walkable_mask(grid_map))
+
+        assert plan_length(d_star) == len(oriented_a_star(grid_map, start, direction, goal))
+
+
+def test_DStarLite__repair_expands_less():
+    """Test that blocking one tile of the plan costs less than the first search."""
+
+    grid_map = GridMap(np.zeros((20, 20), dtype=int))
+    d_star = DStarLite(get_walkable_mask(grid_map), grid_map.size, (0, 0), DIRECTIONS[1], (19, 19))
+    d_star.compute_shortest_path()
+    first_search = d_star.expansions
+    blocked = d_star.get_plan()[5].position
+
+    grid_map.danger[blocked] = 1
+    assert d_star.update_walkable(get_walkable_mask(grid_map)) == 1
+    expansions = d_star.expansions
+    d_star.compute_shortest_path()
+    plan = d_star.get_plan()
+
+    assert blocked not in [step.position for step in plan]
+    assert len(plan) == len(oriented_a_star(grid_map, (0, 0), DIRECTIONS[1], (19, 19)))
+    assert d_star.expansions - expansions < first_search / 4
+
+
+def test_DStarLite__unreachable():
+    """Test that a walled off goal gives an empty plan."""
+
+    walls_arr = np.zeros((5, 5), dtype=int)
+    walls_arr[3, :] = 1
+    grid_map = GridMap(walls_arr)
+    d_star = DStarLite(get_walkable_mask(grid_map), grid_map.size, (0, 0), DIRECTIONS[0], (4, 4))
+
+    assert plan_length(d_star) == 0
+
+
+def test_movement_system__reuses_the_search():
+    """Test that replanning to the same target repairs the previous search."""
+
+    drawing = """
+        A......
+        .......
+        .......
+        .......
+        .......
+        .......
+        .......
+    """
+    history = TomaszMapWithHistory(build_game_state(drawing))
+    history.update(TomaszMap(build_game_state(drawing)))
+    movement = MovementSystem(history)
+    movement.target = (6, 6)
+    movement.get_action(history.agent)
+    d_star = movement._d_star
+
+    # a mine on the way down the first column
+    with_mine = drawing.replace(".......\n        .......\n        .......\n", ".......\n        .......\n        M......\n", 1)
+    history.update(TomaszMap(build_game_state(with_mine)))
+    movement.update_map(history)
+    expected = oriented_a_star(history, history.agent.position, history.agent.entity.direction, (6, 6))
+
+    assert movement._d_star is d_star
+    assert (0, 3) not in movement.path
+    assert len(movement.path) == len(get_plan_positions(expected))
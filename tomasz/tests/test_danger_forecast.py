@@ -0,0 +1,90 @@
+"""Tests for the danger_forecast module."""
+
+import numpy as np
+
+from tomasz.map import TomaszMap, TomaszMapWithHistory
+from tomasz.map.danger_forecast import get_arrival_danger, get_danger_forecast, get_tile_danger
+from tomasz.tests.map_builder import build_game_state
+
+# pylint: disable=invalid-name
+
+
+def forecast_cells(forecast, t):
+    return sorted((int(x), int(y)) for x, y in zip(*np.nonzero(forecast[t])))
+
+
+def test_get_danger_forecast__bullet_speed():
+    """Test that a bullet sweeps `speed` tiles per tick until the wall."""
+
+    tomasz_map = TomaszMap(
+        build_game_state(
+            """
+            >.....#.
+            ........
+            ........
+            ........
+            ........
+            ........
+            ........
+            ........
+            """,
+            bullet_speed=2.0,
+        )
+    )
+
+    forecast = get_danger_forecast(tomasz_map, horizon=5)
+
+    assert forecast.shape == (5, 8, 8)
+    assert forecast_cells(forecast, 0) == [(0, 0)]
+    assert forecast_cells(forecast, 1) == [(1, 0), (2, 0)]
+    assert forecast_cells(forecast, 2) == [(3, 0), (4, 0)]
+    assert forecast_cells(forecast, 3) == [(5, 0)]
+    assert forecast_cells(forecast, 4) == []
+
+
+def test_get_danger_forecast__slow_bullets_and_directions():
+    """Test slow bullets flying in every direction."""
+
+    tomasz_map = TomaszMap(
+        build_game_state(
+            """
+            ....
+            .^..
+            ...<
+            v...
+            """,
+            bullet_speed=1.0,
+        )
+    )
+
+    forecast = get_danger_forecast(tomasz_map, horizon=4)
+
+    assert forecast_cells(forecast, 0) == [(0, 3), (1, 1), (3, 2)]
+    assert forecast_cells(forecast, 1) == [(1, 0), (2, 2)]
+    assert forecast_cells(forecast, 2) == [(1, 2)]
+    assert forecast_cells(forecast, 3) == [(0, 2)]
+
+
+def test_get_arrival_danger():
+    """Test danger of a path at the arrival time on each tile."""
+
+    history = TomaszMapWithHistory(build_game_state("....\n>...\n....\n....", bullet_speed=1.0))
+    forecast = history.danger_forecast(horizon=4)
+
+    assert history.danger_forecast(horizon=4) is forecast
+    # the bullet is on (2, 1) at tick 2 and on (3, 1) at tick 3
+    assert get_arrival_danger(forecast, [(2, 0), (2, 1)]) == 1
+    assert get_arrival_danger(forecast, [(2, 0), (3, 0), (3, 1)]) == 1
+    # the bullet leaves (1, 1) during tick 2, as the space-time planner sees it that is too close
+    assert get_arrival_danger(forecast, [(1, 0), (1, 1)]) == 1
+    assert get_arrival_danger(forecast, [(0, 0), (0, 1)]) == 0
+
+
+def test_get_tile_danger__matches_space_time_planner():
+    """Test that a tile is dangerous at t when a bullet is on it at t or t - 1."""
+
+    history = TomaszMapWithHistory(build_game_state("....\n>...\n....\n....", bullet_speed=1.0))
+    forecast = history.danger_forecast(horizon=4)
+
+    assert [get_tile_danger(forecast, 1, 1, t) for t in range(5)] == [0, 1, 1, 0, 0]
+    assert get_tile_danger(forecast, 0, 1, 0) == 1
@@ -0,0 +1,109 @@
+"""Tests for the danger_layer module."""
+
+import random
+
+import numpy as np
+import pytest
+
+from hackathon_bot.enums import Direction
+from tomasz.map import TomaszMap, TomaszMapWithHistory
+from tomasz.map.danger_forecast import get_danger_forecast
+from tomasz.map.danger_layer import DangerLayer
+from tomasz.map.danger_map import get_danger
+from tomasz.tests.map_builder import build_game_state
+from tomasz.tests.test_danger_map import random_drawing
+
+# pylint: disable=invalid-name
+
+
+def test_DangerLayer_matches_get_danger():
+    """Test that the layer gives the same danger as get_danger."""
+
+    tomasz_map = TomaszMap(
+        build_game_state(
+            """
+            .....#
+            .A.T..
+            ..M...
+            ......
+            .>.#..
+            ......
+            """,
+            enemy_direction=Direction.DOWN,
+        )
+    )
+    layer = DangerLayer.for_map(tomasz_map)
+
+    assert layer.update_from_map(tomasz_map)
+    assert np.allclose(layer.grid, get_danger(tomasz_map))
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_DangerLayer_incremental_matches_rebuild(seed):
+    """Test that adding and removing sources gives the same map as a fresh layer."""
+
+    rng = random.Random(seed)
+    size = 9
+    walls = {(rng.randrange(size), rng.randrange(size)) for _ in range(size * 2)}
+
+    history = TomaszMapWithHistory(build_game_state(random_drawing(rng, size, walls)))
+    for _ in range(8):
+        history.update(TomaszMap(build_game_state(random_drawing(rng, size, walls))))
+
+        fresh = DangerLayer.for_map(history)
+        fresh.update_from_map(history)
+
+        assert np.allclose(history.danger, fresh.grid)
+        assert history.danger is history.danger_layer.grid
+
+
+def test_DangerLayer_version():
+    """Test that the version only changes with the danger map."""
+
+    drawing = """
+        ....
+        .A..
+        ..T.
+        ....
+    """
+    history = TomaszMapWithHistory(build_game_state(drawing))
+
+    history.update(TomaszMap(build_game_state(drawing)))
+    version = history.danger_version
+    history.update(TomaszMap(build_game_state(drawing)))
+
+    assert version == 1
+    assert history.danger_version == version
+    assert history.last_danger_map_change == 1
+
+    threatened = sorted(zip(*np.nonzero(history.danger)))
+    history.update(TomaszMap(build_game_state(drawing.replace("T", "."))))
+
+    assert history.danger_version == version + 1
+    assert history.last_danger_map_change == 0
+    assert history.danger.sum() == 0
+    assert sorted(zip(*history.danger_layer.changed_cells)) == threatened
+
+
+@pytest.mark.parametrize("bullet", ["^", "v"])
+def test_DangerLayer_vertical_bullet_matches_forecast(bullet):
+    """Test that the danger layer and the forecast send a vertical bullet along the same column."""
+
+    drawing = """
+        ......
+        ......
+        ..X...
+        ......
+        ......
+        ......
+    """.replace("X", bullet)
+    history = TomaszMapWithHistory(build_game_state(drawing, bullet_speed=1.0))
+    history.update(TomaszMap(build_game_state(drawing, bullet_speed=1.0)))
+
+    forecast = get_danger_forecast(history, horizon=6)
+
+    layer_cells = set(zip(*np.nonzero(history.danger)))
+    # the layer leaves the tile of the bullet itself out
+    forecast_cells = set(zip(*np.nonzero(forecast.any(axis=0)))) - {(2, 2)}
+    assert layer_cells == forecast_cells
+    assert {int(x) for x, _ in layer_cells} == {2}
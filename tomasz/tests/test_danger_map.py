@@ -0,0 +1,109 @@
+"""Tests for the danger_map module."""
+
+import random
+
+import numpy as np
+import pytest
+
+from hackathon_bot.enums import Direction, Orientation
+from tomasz.map import TomaszMap, TomaszMapWithHistory
+from tomasz.map.danger_map import get_danger
+from tomasz.tests.map_builder import build_game_state
+from tomasz.utils import direction_to_delta, oridentation_to_delta, out_of_bounds, propagate
+
+# pylint: disable=invalid-name
+
+
+def reference_propagate(grid, tomasz_map, start_pos, dir, decay=1, start_pos_not_included=False):
+    """Walk a ray tile by tile, the way propagate did before the ray table."""
+    if isinstance(dir, Direction):
+        deltas = [direction_to_delta[dir]]
+    elif isinstance(dir, Orientation):
+        deltas = oridentation_to_delta[dir]
+    elif dir == "ALL":
+        deltas = direction_to_delta.values()
+    else:
+        deltas = [dir]
+
+    for delta_x, delta_y in deltas:
+        x, y = start_pos
+        value = 1
+        for _ in range(tomasz_map.size[0]):
+            x += delta_x
+            y += delta_y
+            if out_of_bounds(x, y, tomasz_map.size) or tomasz_map.walls_arr[x, y]:
+                break
+            grid[x, y] = 1 - (1 - grid[x, y]) * (1 - value)
+            value *= decay
+        grid[start_pos] = 0 if start_pos_not_included else 1
+
+
+def reference_danger(tomasz_map):
+    """The per-cell danger computation the vectorized one has to match."""
+    danger_map = np.zeros(tomasz_map.size, dtype=float)
+    for i in range(tomasz_map.size[0]):
+        for j in range(tomasz_map.size[1]):
+            for entity in tomasz_map.entities_grid[i, j]:
+                if entity.type == "mine":
+                    danger_map[i, j] = 1
+                elif entity.type == "bullet":
+                    reference_propagate(danger_map, tomasz_map, (i, j), entity.dir, decay=0.9, start_pos_not_included=True)
+                elif entity.type == "laser":
+                    reference_propagate(danger_map, tomasz_map, (i, j), entity.ori, decay=1)
+                elif entity.type == "tank" and not entity.agent:
+                    reference_propagate(danger_map, tomasz_map, (i, j), entity.turret_dir, decay=0.7)
+    return danger_map
+
+
+def random_drawing(rng, size, walls):
+    rows = []
+    agent = (rng.randrange(size), rng.randrange(size))
+    for y in range(size):
+        row = ""
+        for x in range(size):
+            if (x, y) in walls:
+                row += "#"
+            elif (x, y) == agent:
+                row += "A"
+            else:
+                row += rng.choice("." * 20 + "?" * 4 + "TMI^>v<")
+        rows.append(row)
+    return "\n".join(rows)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_propagate__matches_reference(seed):
+    """Test that ray table lookups give the same rays as walking tile by tile."""
+
+    rng = random.Random(seed)
+    size = rng.choice([5, 8, 13])
+    walls = {(rng.randrange(size), rng.randrange(size)) for _ in range(size * 2)}
+    tomasz_map = TomaszMap(build_game_state(random_drawing(rng, size, walls)))
+
+    for start_pos in [(rng.randrange(size), rng.randrange(size)) for _ in range(10)]:
+        for dir, decay in [(Direction.LEFT, 0.9), (Orientation.VERTICAL, 1), ("ALL", 0.7), ((0, 1), 0.5)]:
+            grid = np.zeros(tomasz_map.size)
+            expected = np.zeros(tomasz_map.size)
+            propagate(grid, tomasz_map, start_pos, dir, decay)
+            reference_propagate(expected, tomasz_map, start_pos, dir, decay)
+
+            assert np.allclose(grid, expected)
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_get_danger__matches_reference(seed):
+    """Test that the vectorized danger map matches the per-cell one."""
+
+    rng = random.Random(seed)
+    size = rng.choice([5, 8, 13])
+    walls = {(rng.randrange(size), rng.randrange(size)) for _ in range(size * 2)}
+    enemy_direction = rng.choice(list(Direction))
+
+    history = TomaszMapWithHistory(build_game_state(random_drawing(rng, size, walls)))
+    for _ in range(5):
+        game_state = build_game_state(random_drawing(rng, size, walls), enemy_direction=enemy_direction)
+        tomasz_map = TomaszMap(game_state)
+        history.update(tomasz_map)
+
+        assert np.allclose(get_danger(tomasz_map), reference_danger(tomasz_map))
+        assert np.allclose(get_danger(history), reference_danger(history))
@@ -0,0 +1,69 @@
+"""Tests for the danger_weighted_a_star module."""
+
+import heapq
+import math
+
+import numpy as np
+import pytest
+
+from tomasz.a_star import a_star
+from tomasz.pathfinding.danger_weighted_a_star import danger_weighted_a_star, get_step_costs
+from tomasz.tests.map_builder import GridMap, random_grid_map
+
+# pylint: disable=invalid-name
+
+
+def reference_cost(grid_map, start, goal, danger_penalty):
+    """Plain Dijkstra over the step costs."""
+    costs = np.array(get_step_costs(grid_map, danger_penalty)).reshape(grid_map.size)
+    best = {start: 0.0}
+    heap = [(0.0, start)]
+    while heap:
+        cost, (x, y) = heapq.heappop(heap)
+        if (x, y) == goal:
+            return cost
+        if cost > best[(x, y)]:
+            continue
+        for nx, ny in ((x + 1, y), (x - 1, y), (x, y + 1), (x, y - 1)):
+            if 0 <= nx < grid_map.size[0] and 0 <= ny < grid_map.size[1]:
+                new_cost = cost + costs[nx, ny]
+                if new_cost < best.get((nx, ny), math.inf):
+                    best[(nx, ny)] = new_cost
+                    heapq.heappush(heap, (new_cost, (nx, ny)))
+    return math.inf
+
+
+def path_cost(grid_map, path, danger_penalty):
+    return sum(1 + danger_penalty * grid_map.danger[pos] for pos in path)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_danger_weighted_a_star__finds_the_cheapest_path(seed):
+    rng = np.random.default_rng(seed)
+    grid_map = random_grid_map(rng, 15, wall_density=0.2, danger_density=0.3)
+    free = [tuple(int(v) for v in pos) for pos in np.argwhere(grid_map.walls_arr == 0)]
+
+    for _ in range(10):
+        start, goal = free[rng.integers(len(free))], free[rng.integers(len(free))]
+        path = danger_weighted_a_star(grid_map, start, goal, danger_penalty=10.0)
+        expected = reference_cost(grid_map, start, goal, 10.0)
+
+        if start == goal or expected == math.inf:
+            assert path == []
+        else:
+            assert path[-1] == goal
+            assert path_cost(grid_map, path, 10.0) == pytest.approx(expected)
+
+
+def test_danger_weighted_a_star__trades_length_for_risk():
+    """Test that a short dangerous way is taken only when the detour costs more than the risk."""
+
+    walls_arr = np.zeros((5, 5), dtype=int)
+    walls_arr[1:4, 1:4] = 1
+    grid_map = GridMap(walls_arr)
+    # the direct way along y = 0 is 4 steps, the detour along the other sides 12
+    grid_map.danger[2, 0] = 0.5
+
+    assert (2, 0) in danger_weighted_a_star(grid_map, (0, 0), (4, 0), danger_penalty=10.0)
+    assert len(danger_weighted_a_star(grid_map, (0, 0), (4, 0), danger_penalty=20.0)) == 12
+    assert len(a_star(grid_map, (0, 0), (4, 0))) == 12
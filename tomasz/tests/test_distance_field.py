@@ -0,0 +1,107 @@
+"""Tests for the distance_field module."""
+
+from collections import deque
+
+import numpy as np
+import pytest
+
+from tomasz.map import TomaszMap, TomaszMapWithHistory
+from tomasz.map.distance_field import UNREACHABLE, DistanceField
+from tomasz.modes.zone_capture_mode import get_closest_tile_at_zone, get_closest_zone
+from tomasz.tests.map_builder import build_game_state, make_zone
+
+# pylint: disable=invalid-name
+
+
+def reference_distances(walkable, origin):
+    """Plain queue based BFS."""
+    distances = np.full(walkable.shape, UNREACHABLE)
+    distances[origin] = 0
+    queue = deque([origin])
+    while queue:
+        x, y = queue.popleft()
+        for dx, dy in ((1, 0), (0, 1), (-1, 0), (0, -1)):
+            nx, ny = x + dx, y + dy
+            if 0 <= nx < walkable.shape[0] and 0 <= ny < walkable.shape[1] and walkable[nx, ny] \
+                    and distances[nx, ny] == UNREACHABLE:
+                distances[nx, ny] = distances[x, y] + 1
+                queue.append((nx, ny))
+    return distances
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_distance_field__matches_reference_bfs(seed):
+    """Test that the layered BFS gives the distances and valid shortest paths."""
+
+    rng = np.random.default_rng(seed)
+    walkable = rng.random((17, 17)) > 0.3
+    origin = (int(rng.integers(17)), int(rng.integers(17)))
+
+    field = DistanceField(walkable, origin)
+
+    np.testing.assert_array_equal(field.distances, reference_distances(walkable, origin))
+    for pos in map(tuple, np.argwhere(walkable)):
+        path = field.path_to(pos)
+        if not field.is_reachable(pos):
+            assert path == [] and field.distance(pos) == float("inf")
+            continue
+        assert len(path) == field.distance(pos)
+        for previous, current in zip([origin, *path], path):
+            assert abs(previous[0] - current[0]) + abs(previous[1] - current[1]) == 1
+            assert walkable[current]
+
+
+DRAWING = """
+    ..#....
+    ..#....
+    A.#....
+    ..#....
+    ###....
+    .......
+    .......
+"""
+
+
+def make_map(drawing, zones=()):
+    history = TomaszMapWithHistory(build_game_state(drawing, zones))
+    history.update(TomaszMap(build_game_state(drawing, zones)))
+    return history
+
+
+def test_distance_field__cached_on_map():
+    """Test that the map gives the same field until the next update."""
+
+    history = make_map(DRAWING)
+
+    field = history.distance_field()
+
+    assert field is history.distance_field()
+    assert field.origin == history.agent.position
+    assert field.distance((3, 2)) == float("inf")
+    assert field.closest([(3, 2), (1, 0)]) == (1, 0)
+
+    history.update(TomaszMap(build_game_state(DRAWING)))
+    assert field is not history.distance_field()
+
+
+def test_zone_capture__ranks_zones_by_walking_distance():
+    """Test that the zone behind the wall loses to a farther reachable one."""
+
+    drawing = """
+        ..#....
+        ..#....
+        A.#....
+        ..#....
+        ..#....
+        .......
+        .......
+    """
+    behind_wall = make_zone(3, 1, 2, 2, index=ord("A"))
+    around = make_zone(4, 5, 2, 2, index=ord("B"))
+    history = make_map(drawing, (behind_wall, around))
+
+    zone = get_closest_zone(history)
+    _, tile = get_closest_tile_at_zone(history, zone)
+
+    assert chr(zone.index) == "B"
+    assert tile == (4, 5)
@@ -0,0 +1,88 @@
+"""Tests for the distance_table module."""
+
+import numpy as np
+import pytest
+
+from tomasz.a_star import a_star
+from tomasz.map.distance_field import UNREACHABLE
+from tomasz.map.distance_table import (
+    MAX_TABLE_CELLS,
+    UNREACHABLE_DISTANCE,
+    DistanceTable,
+    compute_distance_table,
+    get_distance_table,
+    load_distance_table,
+    start_distance_table,
+)
+from tomasz.map.static_layer import TomaszStaticLayer
+from tomasz.tests.map_builder import random_grid_map
+from tomasz.tests.test_distance_field import reference_distances
+
+# pylint: disable=invalid-name
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_compute_distance_table__matches_reference_bfs(seed):
+    rng = np.random.default_rng(seed)
+    walls_arr = (rng.random((13, 11)) < 0.3).astype(int)
+    cells = [divmod(int(index), 11) for index in np.flatnonzero(walls_arr.ravel() == 0)]
+
+    table = compute_distance_table(walls_arr)
+
+    for row, pos in enumerate(cells):
+        expected = reference_distances(walls_arr == 0, pos)
+        expected = [expected[cell] for cell in cells]
+        expected = [UNREACHABLE_DISTANCE if d == UNREACHABLE else d for d in expected]
+        assert table[row].tolist() == expected
+
+
+def test_DistanceTable__distance_and_heuristic():
+    walls_arr = np.zeros((5, 5), dtype=int)
+    walls_arr[2, :4] = 1
+    walls_arr[4, 0] = 1
+    table = DistanceTable(walls_arr, compute_distance_table(walls_arr))
+
+    assert table.distance((0, 0), (4, 1)) == 4 + 4 + 3
+    assert table.distance((0, 0), (2, 0)) == float('inf')
+    assert table.distance((0, 0), (9, 9)) == float('inf')
+    assert table.heuristic_to((4, 1))((0, 0), (4, 1)) == 11
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_DistanceTable__heuristic_keeps_a_star_paths_shortest(seed):
+    """Test that the table is an admissible heuristic when danger blocks tiles."""
+
+    rng = np.random.default_rng(seed)
+    grid_map = random_grid_map(rng, 20, wall_density=0.25, danger_density=0.1)
+    table = DistanceTable(grid_map.walls_arr, compute_distance_table(grid_map.walls_arr))
+    free = [tuple(int(v) for v in pos) for pos in np.argwhere(grid_map.walls_arr == 0)]
+
+    for _ in range(10):
+        start, goal = free[rng.integers(len(free))], free[rng.integers(len(free))]
+        path = a_star(grid_map, start, goal, heuristic=table.heuristic_to(goal))
+        assert len(path) == len(a_star(grid_map, start, goal))
+
+
+def test_load_distance_table__memory_mapped_cache(tmp_path):
+    walls_arr = np.zeros((6, 6), dtype=int)
+    walls_arr[3, 1:] = 1
+
+    built = load_distance_table(walls_arr, str(tmp_path))
+    loaded = load_distance_table(walls_arr, str(tmp_path))
+
+    assert isinstance(loaded.table, np.memmap)
+    assert np.array_equal(loaded.table, built.table)
+    assert loaded.distance((0, 5), (5, 5)) == 5 + 5 + 5
+    assert load_distance_table(np.zeros((MAX_TABLE_CELLS + 1, 1), dtype=int)) is None
+
+
+def test_start_distance_table__builds_in_the_background():
+    walls_arr = np.zeros((7, 9), dtype=int)
+    walls_arr[3, 2:] = 1
+    static = TomaszStaticLayer(walls_arr, {})
+
+    assert start_distance_table(walls_arr) is not None
+    assert start_distance_table(walls_arr) is None
+
+    table = get_distance_table(static, wait=True)
+    assert table.distance((0, 8), (6, 8)) == 2 + 6 + 2 * 6
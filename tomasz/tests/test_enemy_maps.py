@@ -0,0 +1,95 @@
+"""Tests for the enemy_maps module."""
+
+import numpy as np
+import pytest
+
+from tomasz.map import TomaszMap, TomaszMapWithHistory
+from tomasz.map.danger_map import get_sight
+from tomasz.map.enemy_maps import compute_enemy_maps, compute_lines_of_fire
+from tomasz.map.ray_table import RAY_DELTAS, RayTable, compute_ray_lengths
+from tomasz.tests.map_builder import build_game_state
+
+# pylint: disable=invalid-name
+
+# one enemy below the agent aiming at it, one to its right aiming up
+DRAWING = """
+    A.....T
+    .......
+    .......
+    ...#...
+    T..#...
+    .......
+    .......
+"""
+
+
+def make_map(drawing):
+    history = TomaszMapWithHistory(build_game_state(drawing))
+    history.update(TomaszMap(build_game_state(drawing)))
+    return history
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_compute_lines_of_fire__matches_sight_masks(seed):
+    """Test that every position gets its sight mask with the ray of every tile."""
+
+    rng = np.random.default_rng(seed)
+    walls = (rng.random((11, 9)) < 0.3).astype(int)
+    rays = RayTable(compute_ray_lengths(walls))
+    positions = np.argwhere(walls == 0)[rng.choice(int((walls == 0).sum()), 4, replace=False)]
+
+    lines = compute_lines_of_fire(rays.lengths, positions)
+
+    assert lines.shape == (4, 11, 9)
+    for k, pos in enumerate(map(tuple, positions)):
+        expected = rays.sight_mask(pos)
+        expected[pos] = False
+        np.testing.assert_array_equal(lines[k] >= 0, expected)
+        for x, y in np.argwhere(lines[k] >= 0):
+            dx, dy = RAY_DELTAS[lines[k, x, y]]
+            assert (np.sign(x - pos[0]), np.sign(y - pos[1])) == (dx, dy)
+
+
+def test_compute_enemy_maps__scores_every_enemy():
+    """Test the threat, firing ticks and best target of two enemies."""
+
+    history = make_map(DRAWING)
+
+    enemy_maps = compute_enemy_maps(history)
+
+    assert [tank.pos for tank in enemy_maps.tanks] == [(0, 4), (6, 0)]
+    assert list(enemy_maps.exposed) == [True, False]
+    assert list(enemy_maps.threat_turns[:, 0, 0]) == [0, 1]
+    # turning the turret down takes two ticks, right one
+    assert list(enemy_maps.ticks_to_fire) == [2, 1]
+    assert list(enemy_maps.distances) == [4, 6]
+    assert enemy_maps.best_target() == 1
+    # the wall shields the tiles behind it from the enemy on the left
+    assert enemy_maps.threat[2, 4] and not enemy_maps.threat[4, 4]
+    assert not enemy_maps.opportunity[3, 3]
+
+
+def test_compute_enemy_maps__no_enemies():
+    """Test that a map without enemies gives empty maps."""
+
+    history = make_map(DRAWING.replace("T", "."))
+
+    enemy_maps = compute_enemy_maps(history)
+
+    assert enemy_maps.rays.shape == (0, 7, 7)
+    assert enemy_maps.best_target() is None
+    assert not enemy_maps.threat.any()
+
+
+def test_get_sight__union_of_sight_masks():
+    """Test that the sight map covers the tanks and their lines of fire."""
+
+    history = make_map(DRAWING)
+    rays = RayTable(compute_ray_lengths(history.walls_arr))
+
+    sight = get_sight(history)
+
+    expected = np.zeros(history.size, dtype=bool)
+    for tank in history.tanks:
+        expected |= rays.sight_mask(tank.pos)
+    np.testing.assert_array_equal(sight == 1, expected)
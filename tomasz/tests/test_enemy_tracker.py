@@ -0,0 +1,185 @@
+"""Tests for the enemy_tracker module."""
+
+import numpy as np
+import pytest
+
+from hackathon_bot import Direction
+from tomasz.alignment import AlignmentSystem
+from tomasz.map import TomaszMap, TomaszMapWithHistory
+from tomasz.map.enemy_tracker import MAX_TRACK_AGE, EnemyTracker
+from tomasz.map.entities import TomaszTank
+from tomasz.map.ray_table import RayTable, compute_ray_lengths, get_ray_table
+from tomasz.movement import MovementSystem
+from tomasz.pathfinding.firing_position import BULLET_SPEED, find_interception
+from tomasz.tests.map_builder import build_game_state
+from tomasz.utils import direction_to_delta
+
+# pylint: disable=invalid-name
+
+# a 7 x 7 map with a wall at (6, 0)
+RAYS = RayTable(compute_ray_lengths(np.pad(np.ones((1, 1), dtype=int), ((6, 0), (0, 6)))))
+
+# the enemy drives down the column 4 towards the row of the agent
+DRAWINGS = [
+    """
+    ....T..
+    .......
+    .......
+    A......
+    .......
+    .......
+    .......
+    """,
+    """
+    .......
+    ....T..
+    .......
+    A......
+    .......
+    .......
+    .......
+    """,
+]
+
+
+def enemy(pos, direction, owner_id="enemy"):
+    return TomaszTank(pos, False, direction, direction, owner_id)
+
+
+def test_EnemyTrack_predict__keeps_speed_until_the_wall():
+    """Test that a tank driving right is predicted to stop in front of the wall."""
+
+    tracker = EnemyTracker()
+    for tick, x in enumerate([1, 2, 3]):
+        tracker.update(tick, [enemy((x, 0), Direction.RIGHT)])
+
+    track = tracker.get(enemy((3, 0), Direction.RIGHT))
+
+    assert track.velocity == (1.0, 0.0)
+    assert track.predict(RAYS, tick=2, horizon=4) == [(3, 0), (4, 0), (5, 0), (5, 0), (5, 0)]
+    # seen one tick ago, the prediction starts a tile further
+    assert track.predict(RAYS, tick=3, horizon=1) == [(4, 0), (5, 0)]
+
+
+def test_EnemyTrack_predict__reversing_and_turning():
+    """Test that a reversing tank keeps reversing and a turned one stands still."""
+
+    tracker = EnemyTracker()
+    tracker.update(0, [enemy((3, 3), Direction.LEFT)])
+    tracker.update(1, [enemy((4, 3), Direction.LEFT)])
+    track = tracker.get(enemy((4, 3), Direction.LEFT))
+
+    assert track.hull_speed() == -1.0
+    assert track.predict(RAYS, tick=1, horizon=2) == [(4, 3), (5, 3), (6, 3)]
+
+    tracker.update(2, [enemy((4, 3), Direction.UP)])
+
+    assert track.predict(RAYS, tick=2, horizon=2) == [(4, 3)] * 3
+
+
+def test_EnemyTracker_update__drops_old_tracks():
+    """Test that tanks are tracked by owner and forgotten when not seen for long."""
+
+    tracker = EnemyTracker()
+    tracker.update(0, [enemy((1, 1), Direction.UP, "a"), enemy((5, 5), Direction.UP, "b")])
+    tracker.update(MAX_TRACK_AGE + 1, [enemy((1, 2), Direction.UP, "a")])
+
+    assert list(tracker.tracks) == ["a"]
+    assert tracker.tracks["a"].observations[-1] == (MAX_TRACK_AGE + 1, (1, 2))
+
+
+def make_map(drawings):
+    def state(drawing):
+        return build_game_state(drawing, agent_direction=Direction.RIGHT, enemy_direction=Direction.DOWN)
+
+    history = TomaszMapWithHistory(state(drawings[0]))
+    for drawing in drawings[1:]:
+        history.update(TomaszMap(state(drawing)))
+    return history
+
+
+def test_find_interception__leads_the_enemy():
+    """Test that the agent aims at where the enemy will be when the bullet arrives."""
+
+    history = make_map(DRAWINGS)
+    track = history.enemy_tracker.get(history.tanks[-1])
+    predicted = track.predict(get_ray_table(history.static), history.tick)
+
+    interception = find_interception(history, predicted, Direction.RIGHT)
+
+    assert predicted[:3] == [(4, 1), (4, 2), (4, 3)]
+    # the enemy is in the row of the agent in two ticks, as is a bullet fired now
+    assert interception.target == (4, 3)
+    assert interception.firing_position.position == (0, 3)
+    assert interception.slack == 0
+
+    alignment = AlignmentSystem(history, MovementSystem(history))
+    assert alignment.get_aim_point(history.tanks[-1]) == (4, 3)
+
+
+def draw(agent, enemy, size=7):
+    return "\n".join(
+        "".join("A" if (x, y) == agent else "T" if (x, y) == enemy else "." for x in range(size))
+        for y in range(size)
+    )
+
+
+def simulate_shot(firing_position, fire_tick, predicted):
+    """Get the tick a bullet fired at `fire_tick` meets the enemy following `predicted`, None if it misses."""
+    dx, dy = direction_to_delta[firing_position.turret_direction]
+    x, y = firing_position.position
+    for tick in range(fire_tick + 1, len(predicted)):
+        swept = [(x + dx * step, y + dy * step) for step in range(1, int(BULLET_SPEED) + 1)]
+        if predicted[tick] in swept:
+            return tick
+        x, y = swept[-1]
+    return None
+
+
+@pytest.mark.parametrize("agent, column", [((0, 3), 4), ((0, 3), 1), ((0, 5), 5), ((1, 4), 4)])
+def test_find_interception__bullet_meets_the_enemy(agent, column):
+    """Test that a bullet fired after holding fire for the slack meets the enemy on its way."""
+
+    history = make_map([draw(agent, (column, 0)), draw(agent, (column, 1))])
+    tank = next(tank for tank in history.tanks if not tank.agent)
+    predicted = history.enemy_tracker.get(tank).predict(get_ray_table(history.static), history.tick)
+
+    interception = find_interception(history, predicted, Direction.RIGHT)
+
+    assert interception.slack >= 0
+    fire_tick = interception.firing_position.ticks + interception.slack
+    assert simulate_shot(interception.firing_position, fire_tick, predicted) == interception.tick
+    if interception.slack > 0:
+        # fired without waiting, the bullet passes in front of the enemy
+        assert simulate_shot(interception.firing_position, fire_tick - interception.slack, predicted) is None
+
+
+def test_find_interception__least_slack_first():
+    """Test that a later prediction needing less waiting wins over the first one in time."""
+
+    history = make_map(DRAWINGS)
+    # the enemy in the row of the agent, a tile in front of it at tick 3
+    predicted = [(6, 3), (6, 3), (6, 3), (1, 3), (6, 3), (6, 3)]
+
+    interception = find_interception(history, predicted, Direction.RIGHT)
+
+    assert (interception.tick, interception.target, interception.slack) == (4, (6, 3), 1)
+
+
+def test_AlignmentSystem_is_holding_fire__until_the_slack_is_used_up():
+    """Test that the agent in the firing position waits for the enemy to drive into the line of fire."""
+
+    history = make_map([draw((0, 3), (1, 0)), draw((0, 3), (1, 1))])
+    alignment = AlignmentSystem(history, MovementSystem(history))
+
+    assert alignment.get_aim_point(history.tanks[-1]) == (1, 3)
+    assert alignment.interception.slack == 1
+    assert alignment.is_holding_fire()
+
+    history.update(TomaszMap(build_game_state(
+        draw((0, 3), (1, 2)), agent_direction=Direction.RIGHT, enemy_direction=Direction.DOWN
+    )))
+
+    assert alignment.get_aim_point(history.tanks[-1]) == (1, 3)
+    assert alignment.interception.slack == 0
+    assert not alignment.is_holding_fire()
@@ -0,0 +1,132 @@
+"""Tests for the firing_position module."""
+
+import numpy as np
+import pytest
+
+from hackathon_bot import Direction
+from tomasz.alignment import AlignmentSystem
+from tomasz.map import TomaszMap, TomaszMapWithHistory
+from tomasz.map.ray_table import get_ray_table
+from tomasz.movement import MovementSystem
+from tomasz.pathfinding.firing_position import find_firing_position
+from tomasz.tests.map_builder import build_game_state
+
+# pylint: disable=invalid-name
+
+# the target (5, 1) is seen from the row 1 right of the wall and from the column 5
+DRAWING = """
+    A.#....
+    ..#....
+    ..#....
+    ..#....
+    .......
+    .......
+    .......
+"""
+TARGET = (5, 1)
+
+
+def make_map(drawing, agent_direction=Direction.UP):
+    history = TomaszMapWithHistory(build_game_state(drawing, agent_direction=agent_direction))
+    history.update(TomaszMap(build_game_state(drawing, agent_direction=agent_direction)))
+    return history
+
+
+def reference_firing_ticks(history, target):
+    """Fewest moves and turret rotations over every tile of the sight mask."""
+    field = history.distance_field()
+    current = history.agent.entity.turret.direction
+    order = (Direction.UP, Direction.RIGHT, Direction.DOWN, Direction.LEFT)
+    best = None
+    for pos in map(tuple, np.argwhere(get_ray_table(history.static).sight_mask(target))):
+        if pos == target or not field.is_reachable(pos):
+            continue
+        dx, dy = np.sign(target[0] - pos[0]), np.sign(target[1] - pos[1])
+        needed = {(0, -1): Direction.UP, (1, 0): Direction.RIGHT, (0, 1): Direction.DOWN, (-1, 0): Direction.LEFT}[
+            (dx, dy)]
+        turns = (order.index(needed) - order.index(current)) % 4
+        ticks = field.distances[pos] + min(turns, 4 - turns)
+        best = ticks if best is None else min(best, ticks)
+    return best
+
+
+def test_find_firing_position__walks_around_the_wall():
+    """Test that the tile closest on foot wins over the one closest in a straight line."""
+
+    history = make_map(DRAWING)
+
+    firing_position = find_firing_position(history, TARGET, Direction.UP)
+
+    # (3, 1) is 4 tiles away in a straight line, 10 on foot
+    assert firing_position.position == (5, 4)
+    assert firing_position.turret_direction == Direction.UP
+    assert firing_position.ticks == 9
+
+
+@pytest.mark.parametrize("turret_direction, position, ticks", [
+    (Direction.UP, (0, 2), 3),
+    (Direction.LEFT, (2, 0), 3),
+])
+def test_find_firing_position__counts_turret_rotations(turret_direction, position, ticks):
+    """Test that of two tiles as far away the one needing fewer rotations wins."""
+
+    drawing = """
+        A....
+        .....
+        .....
+        .....
+        .....
+    """
+    history = make_map(drawing, agent_direction=turret_direction)
+
+    firing_position = find_firing_position(history, (2, 2), turret_direction)
+
+    assert firing_position.position == position
+    assert firing_position.ticks == ticks
+
+
+def test_find_firing_position__none_when_walled_off():
+    """Test that no position is found when no tile in sight can be reached."""
+
+    drawing = """
+        A.#.
+        ..#.
+        ..#.
+        ..#.
+    """
+    history = make_map(drawing)
+
+    assert find_firing_position(history, (3, 1), Direction.UP) is None
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_find_firing_position__matches_sight_mask_search(seed):
+    """Test that the ticks are the fewest over all reachable tiles in sight."""
+
+    rng = np.random.default_rng(seed)
+    rows = [["#" if rng.random() < 0.25 else "." for _ in range(12)] for _ in range(12)]
+    rows[0][0] = "A"
+    history = make_map("\n".join("".join(row) for row in rows))
+    free = np.argwhere(history.walls_arr == 0)
+    target = tuple(int(v) for v in free[rng.integers(len(free))])
+
+    firing_position = find_firing_position(history, target, history.agent.entity.turret.direction)
+
+    expected = reference_firing_ticks(history, target)
+    if expected is None:
+        assert firing_position is None
+    else:
+        assert firing_position.ticks == expected
+        assert get_ray_table(history.static).line_of_sight(firing_position.position, target)
+
+
+def test_alignment__moves_towards_firing_position():
+    """Test that the alignment sends the movement to the firing position."""
+
+    history = make_map(DRAWING)
+    movement = MovementSystem(history)
+    alignment = AlignmentSystem(history, movement)
+    alignment.set_target(TARGET)
+
+    assert alignment.get_action() is not None
+    assert movement.target == (5, 4)
@@ -0,0 +1,123 @@
+"""Tests for the hpa_star module."""
+
+import numpy as np
+import pytest
+
+from tomasz.a_star import SearchStats, a_star, get_walkable_mask
+from tomasz.map.static_layer import TomaszStaticLayer
+from tomasz.movement import LARGE_MAP_SIZE, get_planner
+from tomasz.pathfinding.hpa_star import HPAGraph, get_hpa_graph, hpa_star
+from tomasz.tests.map_builder import GridMap, random_grid_map
+
+# pylint: disable=invalid-name
+
+
+def assert_valid_path(grid_map, start, goal, path):
+    walkable = np.array(get_walkable_mask(grid_map)).reshape(grid_map.size)
+    previous = start
+    for pos in path:
+        assert abs(pos[0] - previous[0]) + abs(pos[1] - previous[1]) == 1
+        assert walkable[pos]
+        previous = pos
+    assert previous == goal
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_hpa_star__paths_are_valid_and_near_optimal(seed):
+    """Test that hpa_star finds a path when a_star does, at most a bit longer."""
+
+    rng = np.random.default_rng(seed)
+    grid_map = random_grid_map(rng, 40, wall_density=0.2, danger_density=0.05)
+    graph = HPAGraph(grid_map.walls_arr)
+    free = [tuple(int(v) for v in pos) for pos in np.argwhere(grid_map.walls_arr == 0)]
+
+    for _ in range(10):
+        start, goal = free[rng.integers(len(free))], free[rng.integers(len(free))]
+        expected = a_star(grid_map, start, goal)
+        path = hpa_star(grid_map, start, goal, graph=graph)
+
+        assert bool(path) == bool(expected)
+        if path:
+            assert_valid_path(grid_map, start, goal, path)
+            assert len(path) <= 1.5 * len(expected)
+
+
+def test_hpa_star__counts_its_expansions():
+    """Test that the abstract and local searches are counted, fewer than the tiles a_star expands."""
+
+    grid_map = GridMap(np.zeros((40, 40), dtype=int))
+    graph = HPAGraph(grid_map.walls_arr)
+    hpa_stats, a_star_stats = SearchStats(), SearchStats()
+
+    path = hpa_star(grid_map, (1, 1), (38, 30), graph=graph, stats=hpa_stats)
+    expected = a_star(grid_map, (1, 1), (38, 30), stats=a_star_stats)
+
+    assert len(path) == len(expected)
+    assert 0 < hpa_stats.expansions < a_star_stats.expansions
+
+
+def test_hpa_star__avoids_danger_missing_from_the_graph():
+    """Test that danger blocking the entrance of a cluster is avoided in refinement."""
+
+    walls_arr = np.zeros((16, 16), dtype=int)
+    walls_arr[8, :] = 1
+    walls_arr[8, 3] = 0
+    walls_arr[8, 12] = 0
+    grid_map = GridMap(walls_arr)
+    graph = HPAGraph(walls_arr)
+    grid_map.danger[8, 3] = 1
+
+    path = hpa_star(grid_map, (2, 3), (13, 3), graph=graph)
+
+    assert_valid_path(grid_map, (2, 3), (13, 3), path)
+    assert (8, 12) in path
+    assert len(path) == len(a_star(grid_map, (2, 3), (13, 3)))
+
+
+def test_hpa_star__goal_cut_off_from_the_nodes_of_its_cluster():
+    """Test that danger cutting the goal off inside its cluster, but not from the next one, is walked around."""
+
+    walls_arr = np.zeros((16, 16), dtype=int)
+    grid_map = GridMap(walls_arr)
+    graph = HPAGraph(walls_arr)
+    # the goal is only reachable from the cluster on its right, no node is in danger
+    for pos in ((7, 2), (7, 4), (6, 3)):
+        grid_map.danger[pos] = 1
+
+    for start, goal in (((2, 3), (7, 3)), ((7, 3), (2, 3))):
+        path = hpa_star(grid_map, start, goal, graph=graph)
+
+        assert_valid_path(grid_map, start, goal, path)
+        assert len(path) == len(a_star(grid_map, start, goal))
+
+
+def test_hpa_star__unreachable_goal():
+    """Test that a walled off goal gives an empty path, and so does the start."""
+
+    walls_arr = np.zeros((20, 20), dtype=int)
+    walls_arr[15, 14:17] = 1
+    walls_arr[17, 14:17] = 1
+    walls_arr[16, 14] = 1
+    walls_arr[16, 16] = 1
+    grid_map = GridMap(walls_arr)
+
+    assert hpa_star(grid_map, (0, 0), (16, 15)) == []
+    assert hpa_star(grid_map, (0, 0), (0, 0)) == []
+
+
+def test_get_hpa_graph__is_built_once_per_static_layer():
+    """Test that the graph is kept by the static layer."""
+
+    static = TomaszStaticLayer(np.zeros((16, 16), dtype=int), {})
+    grid_map = GridMap(static.walls_arr)
+    grid_map.static = static
+
+    graph = get_hpa_graph(grid_map)
+
+    assert get_hpa_graph(grid_map) is graph
+    assert len(hpa_star(grid_map, (0, 0), (15, 15))) == 30
+
+
+def test_get_planner__hpa_star_is_opt_in():
+    assert get_planner(GridMap(np.zeros((LARGE_MAP_SIZE, LARGE_MAP_SIZE), dtype=int)), "hpa_star") is hpa_star
+    assert get_planner(GridMap(np.zeros((LARGE_MAP_SIZE, LARGE_MAP_SIZE), dtype=int))) is a_star
@@ -0,0 +1,46 @@
+"""Tests for the jps module."""
+
+import numpy as np
+import pytest
+
+from tomasz.a_star import a_star
+from tomasz.movement import get_planner
+from tomasz.pathfinding.jps import jps
+from tomasz.tests.map_builder import GridMap, random_grid_map
+from tomasz.tests.test_hpa_star import assert_valid_path
+
+# pylint: disable=invalid-name
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_jps__same_lengths_as_a_star(seed):
+    """Test that jps finds valid paths exactly as short as the ones of a_star."""
+
+    rng = np.random.default_rng(seed)
+    grid_map = random_grid_map(rng, 25, wall_density=0.1 + 0.03 * seed, danger_density=0.05)
+    free = [tuple(int(v) for v in pos) for pos in np.argwhere(grid_map.walls_arr == 0)]
+
+    for _ in range(20):
+        start, goal = free[rng.integers(len(free))], free[rng.integers(len(free))]
+        expected = a_star(grid_map, start, goal)
+        path = jps(grid_map, start, goal)
+
+        assert len(path) == len(expected)
+        if path:
+            assert_valid_path(grid_map, start, goal, path)
+
+
+def test_jps__ignores_danger_on_request():
+    walls_arr = np.zeros((5, 5), dtype=int)
+    grid_map = GridMap(walls_arr)
+    grid_map.danger[2, :] = 1
+
+    assert jps(grid_map, (0, 0), (4, 4)) == []
+    assert len(jps(grid_map, (0, 0), (4, 4), ignore_danger=True)) == 8
+
+
+def test_get_planner__selects_by_name():
+    grid_map = GridMap(np.zeros((10, 10), dtype=int))
+
+    assert get_planner(grid_map, "jps") is jps
+    assert get_planner(grid_map) is a_star
@@ -0,0 +1,103 @@
+"""Tests for the map_parser and map_with_history modules."""
+
+from hackathon_bot.enums import Direction, ItemType
+from tomasz.map import TomaszMap, TomaszMapWithHistory
+from tomasz.map.entities import TomaszBullet, TomaszItem, TomaszTank
+from tomasz.tests.map_builder import build_game_state
+
+# pylint: disable=invalid-name
+
+DRAWING = """
+    #....
+    .A.T.
+    ..M>.
+    I....
+    .....
+"""
+
+HIDDEN_DRAWING = """
+    #....
+    .A.T.
+    ..M..
+    ?....
+    .....
+"""
+
+
+def test_TomaszMap_entity_records():
+    """Test that every parsed entity becomes a slotted record of its kind."""
+
+    tomasz_map = TomaszMap(build_game_state(DRAWING))
+
+    assert tomasz_map.walls_arr[0, 0] == 1
+    assert [tank.pos for tank in tomasz_map.tanks] == [(1, 1), (3, 1)]
+    assert [tank.agent for tank in tomasz_map.tanks] == [True, False]
+    assert isinstance(tomasz_map.bullets[0], TomaszBullet)
+    assert tomasz_map.bullets[0].dir == Direction.RIGHT
+    assert tomasz_map.bullets[0].double is False
+    assert isinstance(tomasz_map.items[0], TomaszItem)
+    assert tomasz_map.items[0].item_type == ItemType.DOUBLE_BULLET
+    assert tomasz_map.mines[0].pos == (2, 2)
+    assert tomasz_map.entities_grid[3, 1] == [tomasz_map.tanks[1]]
+
+    for entity in [*tomasz_map.walls, *tomasz_map.iter_entities()]:
+        assert not hasattr(entity, "__dict__")
+
+
+def test_TomaszEntity_to_dict():
+    """Test the dict form used by TomaszMap.to_json."""
+
+    tank = TomaszTank((1, 2), False, Direction.LEFT, Direction.UP)
+
+    assert tank.to_dict() == {
+        "type": "tank",
+        "pos": (1, 2),
+        "ticks_since_seen": 0,
+        "agent": False,
+        "dir": Direction.LEFT,
+        "turret_dir": Direction.UP,
+        "owner_id": None,
+    }
+
+
+def test_TomaszMapWithHistory_updates_records_in_place():
+    """Test that remembered records are kept and aged instead of copied."""
+
+    tomasz_map = TomaszMapWithHistory(build_game_state(DRAWING))
+    tomasz_map.update(TomaszMap(build_game_state(HIDDEN_DRAWING)))
+    tomasz_map.update(TomaszMap(build_game_state(HIDDEN_DRAWING)))
+
+    item = tomasz_map.items[0]
+    ticks_since_seen = item.ticks_since_seen
+    tomasz_map.update(TomaszMap(build_game_state(HIDDEN_DRAWING)))
+
+    assert tomasz_map.items == [item]
+    assert tomasz_map.items[0] is item
+    assert item.ticks_since_seen == ticks_since_seen + 1
+    assert tomasz_map.bullets == []
+
+
+def test_TomaszMapWithHistory_expires_transient_entities():
+    """Test that bullets and our old position are forgotten once out of sight."""
+
+    tomasz_map = TomaszMapWithHistory(build_game_state(DRAWING))
+    tomasz_map.update(
+        TomaszMap(
+            build_game_state(
+                """
+                #....
+                .?.T.
+                ..M?.
+                I....
+                ...A.
+                """
+            )
+        )
+    )
+
+    assert set(tomasz_map.remembered) == {(3, 1), (2, 2), (0, 3), (3, 4)}
+    assert tomasz_map.transient == {(3, 4)}
+    assert tomasz_map.entities_grid[1, 1] == []
+    assert tomasz_map.entities_grid[3, 2] == []
+    assert tomasz_map.ticks_since_seen[1, 1] == 1
+    assert tomasz_map.ticks_since_seen[3, 4] == 0
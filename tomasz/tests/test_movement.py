@@ -0,0 +1,165 @@
+"""Tests for the movement module."""
+
+from hackathon_bot import Direction, Movement, MovementDirection
+from tomasz.map import TomaszMap, TomaszMapWithHistory
+from tomasz.movement import MovementSystem
+from tomasz.map.danger_forecast import get_tile_danger
+from tomasz.tests.map_builder import build_game_state
+
+# pylint: disable=invalid-name
+
+DRAWING = """
+    A......
+    .......
+    .......
+    .......
+    .......
+    .......
+    .......
+"""
+
+
+def make_movement(drawing=DRAWING, target=(0, 6)):
+    history = TomaszMapWithHistory(build_game_state(drawing))
+    history.update(TomaszMap(build_game_state(drawing)))
+    movement = MovementSystem(history)
+    movement.target = target
+    movement.get_action(history.agent)
+    return history, movement
+
+
+def update(history, movement, drawing):
+    history.update(TomaszMap(build_game_state(drawing)))
+    assert movement.is_outdated(history)
+    movement.update_map(history)
+
+
+def test_update_map__keeps_path_away_from_danger():
+    """Test that danger off the path does not trigger a replan."""
+
+    history, movement = make_movement()
+    path = list(movement.path)
+
+    update(history, movement, DRAWING.replace(".......\n    .......\n", ".......\n    ....M..\n", 1))
+
+    assert movement.path == path
+    assert movement.replans == 0
+    assert movement.replans_avoided == 1
+
+
+def test_update_map__replans_when_path_is_blocked():
+    """Test that danger on the path triggers a replan around it."""
+
+    history, movement = make_movement()
+    assert (0, 3) in movement.path
+
+    update(history, movement, DRAWING.replace(".......\n    .......\n    .......\n", ".......\n    .......\n    M......\n", 1))
+
+    assert (0, 3) not in movement.path
+    assert movement.path[-1] == (0, 6)
+    assert movement.replans == 1
+    assert movement.replans_avoided == 0
+
+
+def test_update_map__replans_when_off_the_path():
+    """Test that a path not starting next to the agent is replaced, e.g. after a respawn."""
+
+    history, movement = make_movement()
+    # the agent is somewhere else and a mine changes the danger map
+    moved = """
+        .......
+        .......
+        ......A
+        .......
+        ....M..
+        .......
+        .......
+    """
+
+    update(history, movement, moved)
+
+    assert movement.replans == 1
+    assert movement.path[-1] == (0, 6)
+    assert abs(movement.path[0][0] - 6) + abs(movement.path[0][1] - 2) == 1
+
+
+def test_get_action__takes_the_least_dangerous_path_at_once():
+    """Test that a target cut off by danger gets a path in the first search."""
+
+    blocked = DRAWING.replace(".......\n    .......\n    .......\n", ".......\n    .......\n    MMMMMMM\n", 1)
+    history, movement = make_movement(blocked)
+
+    path = [movement._next_position] + movement.path
+    assert not movement.path_finding_failed
+    assert path[-1] == (0, 6)
+    assert len(path) == 6
+    assert sum(history.danger[pos] > 0 for pos in path) == 1
+
+
+def test_get_action__recompiles_when_the_tank_did_not_move():
+    """Test that a move without effect is compiled again from the observed pose."""
+
+    history, movement = make_movement()
+
+    # the first move was blocked, the tank is still at the start
+    action = movement.get_action(history.agent)
+
+    assert action == Movement(MovementDirection.BACKWARD)
+    assert movement.recompiles == 1
+    assert movement.replans == 0
+    assert [movement._next_position] + movement.path == [(0, y) for y in range(1, 7)]
+
+
+def test_get_action__chosen_planner_is_used():
+    """Test that a planner chosen by name answers the query instead of the distance field."""
+
+    history = TomaszMapWithHistory(build_game_state(DRAWING))
+    history.update(TomaszMap(build_game_state(DRAWING)))
+    movement = MovementSystem(history)
+    movement.planner = "hpa_star"
+    movement.plan_rotations = False
+    movement.target = (6, 6)
+
+    assert movement.get_action(history.agent) is not None
+    assert "hpa_graph" in history.static.objects
+    # the first action turns the tank, the whole path is still ahead
+    assert len(movement.path) == 12 and movement.path[-1] == (6, 6)
+
+
+def test_update_map__timed_path_checked_at_the_ticks_of_the_actions():
+    """Test that a bullet meeting the tank after its rotation makes the path dodging bullets replanned."""
+
+    def state(bullets):
+        drawing = """
+            >......
+            .......
+            .......
+            .......
+            ..A....
+            .......
+            .......
+        """
+        rows = [list(line.strip()) for line in drawing.strip().splitlines()]
+        for x, y in bullets:
+            rows[y][x] = "v"
+        return build_game_state("\n".join("".join(row) for row in rows), bullet_speed=1.0,
+                                agent_direction=Direction.UP)
+
+    history = TomaszMapWithHistory(state([]))
+    history.update(TomaszMap(state([])))
+    movement = MovementSystem(history)
+    movement.target = (4, 4)
+    movement.get_action(history.agent)
+    # the bullet far away makes it a path dodging bullets, the tank turned right first
+    assert movement._timed_path
+    assert movement._next_position is None and [step.position for step in movement._actions] == [(3, 4), (4, 4)]
+
+    # a bullet that would miss a tank moving at once, but meets it on (3, 4) after the rotation
+    history.update(TomaszMap(state([(3, 2)])))
+    movement.update_map(history)
+
+    assert movement.replans == 1
+    forecast = history.danger_forecast()
+    for t, step in enumerate(movement._actions, start=1):
+        assert get_tile_danger(forecast, *step.position, t) == 0
+    assert movement._actions[-1].position == (4, 4)
@@ -0,0 +1,149 @@
+"""Tests for the oriented_a_star module."""
+
+import numpy as np
+import pytest
+
+from hackathon_bot import Direction, Movement, MovementDirection, Rotation, RotationDirection
+from tomasz.a_star import a_star
+from tomasz.map import TomaszMap, TomaszMapWithHistory
+from tomasz.movement import MovementSystem
+from tomasz.pathfinding.oriented_a_star import (
+    DIRECTION_DELTAS,
+    DIRECTION_INDEX,
+    DIRECTIONS,
+    compile_path,
+    get_plan_positions,
+    oriented_a_star,
+)
+from tomasz.tests.map_builder import GridMap, build_game_state, random_grid_map
+
+# pylint: disable=invalid-name
+
+
+def simulate(grid_map, position, direction, actions):
+    """Execute the actions the way the game does and return the visited states."""
+    states = []
+    d = DIRECTION_INDEX[direction]
+    for action in actions:
+        if isinstance(action, Rotation):
+            d = (d + (1 if action.tank_rotation_direction == RotationDirection.RIGHT else -1)) % 4
+        else:
+            sign = 1 if action.movement_direction == MovementDirection.FORWARD else -1
+            dx, dy = DIRECTION_DELTAS[d]
+            position = position[0] + sign * dx, position[1] + sign * dy
+            assert grid_map.walls_arr[position] == 0
+        states.append((position, DIRECTIONS[d]))
+    return states
+
+
+def ticks_following_path(position, direction, path):
+    """Ticks needed to follow a tile path moving forward only, rotating before every turn."""
+    ticks = 0
+    d = DIRECTION_INDEX[direction]
+    for tile in path:
+        delta = tile[0] - position[0], tile[1] - position[1]
+        target = DIRECTION_DELTAS.index(delta)
+        ticks += min((target - d) % 4, (d - target) % 4) + 1
+        position, d = tile, target
+    return ticks
+
+
+def test_oriented_a_star__straight_run():
+    """Test that the plan turns once instead of zig-zagging."""
+
+    grid_map = GridMap(np.zeros((6, 6), dtype=int))
+
+    plan = oriented_a_star(grid_map, (0, 0), Direction.RIGHT, (3, 3), allow_backwards=False)
+    rotations = [step for step in plan if isinstance(step.action, Rotation)]
+
+    assert len(plan) == 7
+    assert len(rotations) == 1
+    assert plan[-1].position == (3, 3)
+
+
+def test_oriented_a_star__moves_backwards():
+    """Test that a goal behind the tank is reached without rotating."""
+
+    grid_map = GridMap(np.zeros((5, 5), dtype=int))
+
+    plan = oriented_a_star(grid_map, (2, 1), Direction.UP, (2, 4))
+
+    assert [step.action for step in plan] == [Movement(MovementDirection.BACKWARD)] * 3
+    assert get_plan_positions(plan) == [(2, 2), (2, 3), (2, 4)]
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_oriented_a_star__not_slower_than_a_star(seed):
+    """Test that the plan is executable and takes no more ticks than following the a_star path."""
+
+    rng = np.random.default_rng(seed)
+    grid_map = random_grid_map(rng, 16, wall_density=0.2)
+    free = [tuple(int(v) for v in pos) for pos in np.argwhere(grid_map.walls_arr == 0)]
+
+    for _ in range(10):
+        start, goal = free[rng.integers(len(free))], free[rng.integers(len(free))]
+        direction = DIRECTIONS[rng.integers(4)]
+        path = a_star(grid_map, start, goal)
+        plan = oriented_a_star(grid_map, start, direction, goal, allow_backwards=False)
+
+        assert bool(plan) == bool(path)
+        if not plan:
+            continue
+        states = simulate(grid_map, start, direction, [step.action for step in plan])
+        assert states == [(step.position, step.direction) for step in plan]
+        assert states[-1][0] == goal
+        assert len(plan) <= ticks_following_path(start, direction, path)
+
+
+def test_movement_system__uses_planned_actions():
+    """Test that the movement system executes the oriented plan."""
+
+    drawing = """
+        .....
+        .....
+        ..A..
+        .....
+        .....
+    """
+    history = TomaszMapWithHistory(build_game_state(drawing))
+    history.update(TomaszMap(build_game_state(drawing)))
+    movement = MovementSystem(history)
+    movement.target = (2, 4)
+
+    action = movement.get_action(history.agent)
+
+    assert action == Movement(MovementDirection.BACKWARD)
+    assert movement.path == [(2, 4)]
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_compile_path__executes_the_path(seed):
+    """Test that the compiled actions visit the tiles of the path in the ticks of following it."""
+
+    rng = np.random.default_rng(seed)
+    grid_map = random_grid_map(rng, 16, wall_density=0.2)
+    free = [tuple(int(v) for v in pos) for pos in np.argwhere(grid_map.walls_arr == 0)]
+
+    for _ in range(10):
+        start, goal = free[rng.integers(len(free))], free[rng.integers(len(free))]
+        direction = DIRECTIONS[rng.integers(4)]
+        path = a_star(grid_map, start, goal)
+
+        steps = compile_path(start, direction, path)
+        states = simulate(grid_map, start, direction, [step.action for step in steps])
+
+        assert states == [(step.position, step.direction) for step in steps]
+        assert get_plan_positions(steps) == path
+        assert len(steps) == ticks_following_path(start, direction, path)
+
+
+def test_compile_path__waits_and_moves_backwards():
+    steps = compile_path((2, 2), Direction.UP, [(2, 2), (2, 3), (1, 3)], allow_backwards=True)
+
+    assert [step.action for step in steps] == [
+        None,
+        Movement(MovementDirection.BACKWARD),
+        Rotation(RotationDirection.LEFT, None),
+        Movement(MovementDirection.FORWARD),
+    ]
+    assert (steps[-1].position, steps[-1].direction) == ((1, 3), Direction.LEFT)
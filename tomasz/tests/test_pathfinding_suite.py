@@ -0,0 +1,152 @@
+"""Correctness suite of the path finders on generated MonoTanks-like maps.
+
+Every path finder is checked against a reference BFS on the same maps, so a
+faster planner can not change which paths the bot takes without a failure.
+"""
+
+import numpy as np
+import pytest
+
+from hackathon_bot import MovementDirection, Rotation, RotationDirection
+from tomasz.a_star import a_star
+from tomasz.map import TomaszMap, TomaszMapWithHistory
+from tomasz.map.distance_field import DistanceField
+from tomasz.movement import MovementSystem
+from tomasz.pathfinding.ara_star import ara_star
+from tomasz.pathfinding.hpa_star import hpa_star
+from tomasz.pathfinding.jps import jps
+from tomasz.pathfinding.oriented_a_star import DIRECTION_DELTAS, DIRECTION_INDEX, DIRECTIONS
+from tomasz.tests.bench_pathfinding import (
+    get_query_pairs,
+    is_valid_path,
+    reference_lengths,
+    run_benchmark,
+)
+from tomasz.tests.map_builder import GridMap, build_game_state, generate_monotanks_map, grid_map_drawing
+from tomasz.tests.test_oriented_a_star import ticks_following_path
+
+# pylint: disable=invalid-name
+
+MAPS = [(size, seed) for size in (16, 32, 64) for seed in range(2)]
+
+# path finders that must return the shortest paths
+EXACT_PATH_FINDERS = {
+    "a_star": a_star,
+    "jps": jps,
+    "ara_star": lambda *args: ara_star(*args, time_budget=None).path,
+    "distance_field": lambda grid_map, start, goal, ignore_danger=False: DistanceField(
+        (grid_map.walls_arr == 0) & (grid_map.danger <= (100.0 if ignore_danger else 0.2)), start
+    ).path_to(goal),
+}
+
+
+def generate_queries(size, seed, count=20):
+    rng = np.random.default_rng(seed)
+    grid_map = generate_monotanks_map(rng, size)
+    pairs = get_query_pairs(rng, grid_map, count)
+    return grid_map, pairs, reference_lengths(grid_map, pairs)
+
+
+@pytest.mark.parametrize("name", EXACT_PATH_FINDERS)
+@pytest.mark.parametrize("size,seed", MAPS)
+def test_exact_path_finders__match_reference_bfs(size, seed, name):
+    grid_map, pairs, expected = generate_queries(size, seed)
+    path_finder = EXACT_PATH_FINDERS[name]
+
+    for (start, goal), length in zip(pairs, expected):
+        path = path_finder(grid_map, start, goal)
+        assert is_valid_path(grid_map, start, goal, path)
+        assert len(path) == length
+
+
+@pytest.mark.parametrize("size,seed", MAPS)
+def test_hpa_star__close_to_reference_bfs(size, seed):
+    grid_map, pairs, expected = generate_queries(size, seed)
+
+    for (start, goal), length in zip(pairs, expected):
+        path = hpa_star(grid_map, start, goal)
+        assert is_valid_path(grid_map, start, goal, path)
+        assert bool(path) == bool(length)
+        assert len(path) <= 1.5 * length
+
+
+@pytest.mark.parametrize("name", [*EXACT_PATH_FINDERS, "hpa_star"])
+def test_path_finders__danger_threshold(name):
+    """Test that danger up to 0.2 is walked through, above it only when danger is ignored."""
+
+    path_finder = hpa_star if name == "hpa_star" else EXACT_PATH_FINDERS[name]
+    walls_arr = np.zeros((5, 5), dtype=int)
+    walls_arr[2, 1:] = 1
+    grid_map = GridMap(walls_arr)
+
+    grid_map.danger[2, 0] = 0.2
+    assert len(path_finder(grid_map, (0, 2), (4, 2))) == 8
+    grid_map.danger[2, 0] = 0.21
+    assert path_finder(grid_map, (0, 2), (4, 2)) == []
+    assert len(path_finder(grid_map, (0, 2), (4, 2), True)) == 8
+
+
+def test_run_benchmark__exact_path_finders_keep_the_lengths():
+    rows = run_benchmark(sizes=(12,), pairs_count=6, reference_max_size=12)
+
+    assert {row.name for row in rows} >= {"reference", "a_star", "jps", "hpa_star", "ara_star"}
+    for row in rows:
+        assert row.invalid == 0
+        assert row.seconds > 0 and row.peak_kib >= 0
+        # the reference search does not count its expansions
+        assert (row.expansions is None) == (row.name == "reference")
+        if row.expansions is not None:
+            assert row.expansions > 0
+        if row.name != "hpa_star":
+            assert row.length_ratio == 1.0
+
+
+def execute(position, direction, action):
+    """Apply an action to the tank pose the way the game does."""
+    d = DIRECTION_INDEX[direction]
+    if isinstance(action, Rotation):
+        d = (d + (1 if action.tank_rotation_direction == RotationDirection.RIGHT else -1)) % 4
+    elif action is not None:
+        sign = 1 if action.movement_direction == MovementDirection.FORWARD else -1
+        dx, dy = DIRECTION_DELTAS[d]
+        position = position[0] + sign * dx, position[1] + sign * dy
+    return position, DIRECTIONS[d]
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_MovementSystem__reaches_a_zone_in_the_fewest_ticks(seed):
+    """Test the movement system tick by tick against the ticks of following the shortest path."""
+
+    rng = np.random.default_rng(seed)
+    grid_map = generate_monotanks_map(rng, 16, mine_count=6, ray_count=0)
+    (position, target), = get_query_pairs(rng, grid_map, 2)[1:]
+    direction = DIRECTIONS[rng.integers(4)]
+
+    def observe():
+        drawing = grid_map_drawing(grid_map, agent=position)
+        return TomaszMap(build_game_state(drawing, agent_direction=direction))
+
+    history = TomaszMapWithHistory(build_game_state(grid_map_drawing(grid_map, agent=position),
+                                                    agent_direction=direction))
+    history.update(observe())
+    shortest = a_star(history, position, target)
+    if not shortest:
+        pytest.skip("the zone is walled off")
+    movement = MovementSystem(history)
+    movement.target = target
+
+    start, start_direction = position, direction
+    ticks = 0
+    while not movement.target_reached and ticks < 100:
+        action = movement.get_action(history.agent)
+        if movement.target_reached:
+            break
+        position, direction = execute(position, direction, action)
+        assert grid_map.walls_arr[position] == 0 and grid_map.danger[position] < 1
+        ticks += 1
+        history.update(observe())
+        if movement.is_outdated(history):
+            movement.update_map(history)
+
+    assert position == target
+    assert ticks <= ticks_following_path(start, start_direction, shortest)
@@ -0,0 +1,98 @@
+"""Tests for the ray_table module."""
+
+import numpy as np
+
+from tomasz.map.ray_table import RayTable, SightMaskCache, compute_ray_lengths
+
+# pylint: disable=invalid-name
+
+WALLS = np.array(
+    [
+        [0, 0, 0, 0],
+        [0, 1, 0, 0],
+        [0, 0, 0, 0],
+        [0, 0, 1, 0],
+    ]
+)
+
+
+def test_compute_ray_lengths():
+    """Test free run lengths on a small map."""
+
+    lengths = compute_ray_lengths(WALLS)
+
+    assert lengths.shape == (4, 4, 4)
+    assert list(lengths[0, 0]) == [0, 3, 0, 3]
+    assert list(lengths[0, 1]) == [0, 0, 1, 2]
+    assert list(lengths[2, 1]) == [0, 1, 1, 2]
+    assert list(lengths[1, 0]) == [1, 2, 0, 0]
+    # rays starting on a wall still count the free tiles next to it
+    assert list(lengths[1, 1]) == [1, 2, 1, 2]
+
+
+def test_RayTable_ray_cells():
+    """Test that ray cells stop before walls and respect max_steps."""
+
+    rays = RayTable(compute_ray_lengths(WALLS))
+
+    xs, ys = rays.ray_cells((0, 1), (0, 1))
+    assert list(zip(xs, ys)) == [(0, 2), (0, 3)]
+
+    xs, ys = rays.ray_cells((3, 3), (0, -1))
+    assert list(zip(xs, ys)) == []
+
+    xs, ys = rays.ray_cells((0, 0), (1, 0), max_steps=2)
+    assert list(zip(xs, ys)) == [(1, 0), (2, 0)]
+
+
+def test_RayTable_view():
+    """Test that writes to a ray view go to the grid."""
+
+    rays = RayTable(compute_ray_lengths(WALLS))
+    grid = np.zeros(WALLS.shape)
+
+    rays.view(grid, (3, 1), (-1, 0))[:] = 1
+    rays.view(grid, (0, 3), (1, 0))[:] = [1, 2, 3]
+
+    assert list(grid[:, 1]) == [0, 0, 1, 0]
+    assert list(grid[:, 3]) == [0, 1, 2, 3]
+
+
+def test_RayTable_line_of_sight():
+    """Test line of sight between tiles."""
+
+    rays = RayTable(compute_ray_lengths(WALLS))
+
+    assert rays.line_of_sight((0, 0), (0, 3))
+    assert rays.line_of_sight((2, 2), (2, 2))
+    assert not rays.line_of_sight((0, 1), (2, 1))
+    assert not rays.line_of_sight((3, 0), (3, 3))
+    assert rays.line_of_sight((2, 3), (2, 0))
+    assert not rays.line_of_sight((0, 0), (1, 2))
+
+
+def test_RayTable_sight_mask():
+    """Test the tiles that see a tile."""
+
+    rays = RayTable(compute_ray_lengths(WALLS))
+
+    mask = rays.sight_mask((0, 1))
+
+    assert sorted(zip(*np.nonzero(mask))) == [(0, 0), (0, 1), (0, 2), (0, 3)]
+
+
+def test_SightMaskCache_evicts_least_recently_used():
+    """Test that masks are computed once and the least recently used one is dropped."""
+
+    rays = RayTable(compute_ray_lengths(WALLS))
+    cache = SightMaskCache(rays, max_size=2)
+
+    first = cache.get((0, 1))
+    cache.get((2, 2))
+    assert cache.get((0, 1)) is first
+    cache.get((3, 3))
+
+    assert list(cache.masks) == [(0, 1), (3, 3)]
+    assert (cache.hits, cache.misses) == (1, 3)
+    np.testing.assert_array_equal(first, rays.sight_mask((0, 1)))
+    assert not first.flags.writeable
@@ -0,0 +1,160 @@
+"""Tests for the space_time_a_star module."""
+
+from hackathon_bot import Direction, Rotation
+from tomasz.a_star import a_star
+from tomasz.map import TomaszMap, TomaszMapWithHistory
+from tomasz.map.danger_forecast import get_tile_danger
+from tomasz.pathfinding.oriented_a_star import DIRECTION_DELTAS, DIRECTION_INDEX
+from tomasz.pathfinding.space_time_a_star import oriented_space_time_a_star, space_time_a_star
+from tomasz.tests.map_builder import build_game_state
+
+# pylint: disable=invalid-name
+
+CROSSING = """
+    ..v..
+    .....
+    .....
+    .....
+    .....
+"""
+
+
+# the tank has to turn right before moving towards the column of the bullet
+TURN_INTO_BULLET = """
+    .......
+    .......
+    ...v...
+    .......
+    ..A....
+    .......
+    .......
+"""
+
+
+def make_map(drawing, bullet_speed=1.0, agent_direction=Direction.UP):
+    def state():
+        return build_game_state(drawing, bullet_speed=bullet_speed, agent_direction=agent_direction)
+
+    history = TomaszMapWithHistory(state())
+    history.update(TomaszMap(state()))
+    return history
+
+
+def assert_path_valid(start, path):
+    for previous, current in zip([start, *path], path):
+        assert abs(previous[0] - current[0]) + abs(previous[1] - current[1]) <= 1
+
+
+def assert_dodges(forecast, path):
+    for t, pos in enumerate(path, start=1):
+        if t < len(forecast):
+            assert forecast[t][pos] == 0 and forecast[t - 1][pos] == 0, (t, pos)
+
+
+def test_space_time_a_star__no_bullets():
+    """Test that without bullets the path is a shortest path."""
+
+    tomasz_map = make_map(CROSSING.replace("v", "."))
+
+    path = space_time_a_star(tomasz_map, (0, 2), (4, 2))
+
+    assert len(path) == 4
+    assert path[-1] == (4, 2)
+    assert_path_valid((0, 2), path)
+
+
+def test_space_time_a_star__dodges_bullet():
+    """Test that the path avoids the tiles at the ticks the bullet crosses them."""
+
+    tomasz_map = make_map(CROSSING)
+    forecast = tomasz_map.danger_forecast()
+
+    path = space_time_a_star(tomasz_map, (0, 2), (4, 2), forecast)
+
+    assert path[-1] == (4, 2)
+    assert_path_valid((0, 2), path)
+    assert_dodges(forecast, path)
+    # the straight line would meet the bullet on (2, 2) at tick 2, the dodge costs two ticks
+    assert forecast[2][2, 2] == 1
+    assert len(path) == 6
+
+
+def test_space_time_a_star__waits_in_corridor():
+    """Test that the tank waits in place when the only way is crossed by a bullet."""
+
+    drawing = """
+        #v###
+        .....
+        #.###
+        #.###
+        #####
+    """
+    tomasz_map = make_map(drawing)
+    forecast = tomasz_map.danger_forecast()
+
+    path = space_time_a_star(tomasz_map, (0, 1), (4, 1), forecast)
+
+    assert path[-1] == (4, 1)
+    assert_path_valid((0, 1), path)
+    assert_dodges(forecast, path)
+    assert len(path) > 4
+    assert any(a == b for a, b in zip(path, path[1:]))
+
+
+def test_space_time_a_star__unreachable():
+    """Test that an unreachable goal gives an empty path."""
+
+    drawing = """
+        .#...
+        ##...
+        .....
+        .....
+        .....
+    """
+    tomasz_map = make_map(drawing)
+
+    assert space_time_a_star(tomasz_map, (3, 3), (0, 0)) == []
+    assert a_star(tomasz_map, (3, 3), (0, 0)) == []
+
+
+def assert_plan_dodges(forecast, start, start_direction, plan):
+    position, d = start, DIRECTION_INDEX[start_direction]
+    for t, step in enumerate(plan, start=1):
+        if isinstance(step.action, Rotation):
+            assert step.position == position
+            assert abs(DIRECTION_INDEX[step.direction] - d) in (1, 3)
+        else:
+            assert abs(step.position[0] - position[0]) + abs(step.position[1] - position[1]) <= 1
+            if step.position != position:
+                assert step.position in [(position[0] + sign * dx, position[1] + sign * dy)
+                                         for dx, dy in [DIRECTION_DELTAS[d]] for sign in (1, -1)]
+        position, d = step.position, DIRECTION_INDEX[step.direction]
+        assert get_tile_danger(forecast, *position, t) == 0, (t, step)
+
+
+def test_oriented_space_time_a_star__rotations_take_a_tick():
+    """Test that the tile entered after a rotation is dodged at the tick the tank gets there."""
+
+    tomasz_map = make_map(TURN_INTO_BULLET)
+    forecast = tomasz_map.danger_forecast()
+
+    plan = oriented_space_time_a_star(tomasz_map, (2, 4), Direction.UP, (4, 4), forecast)
+
+    # turning right and moving enters (3, 4) at tick 2, with the bullet
+    assert forecast[2][3, 4] == 1
+    assert space_time_a_star(tomasz_map, (2, 4), (4, 4), forecast) == [(3, 4), (4, 4)]
+    assert plan[-1].position == (4, 4)
+    assert_plan_dodges(forecast, (2, 4), Direction.UP, plan)
+    assert len(plan) > 3
+
+
+def test_oriented_space_time_a_star__no_bullets():
+    """Test that without bullets the plan is as short as the one of oriented_a_star."""
+
+    tomasz_map = make_map(TURN_INTO_BULLET.replace("v", "."))
+
+    plan = oriented_space_time_a_star(tomasz_map, (2, 4), Direction.UP, (4, 4))
+
+    # a rotation, then two moves forward or backward
+    assert len(plan) == 3
+    assert [step.position for step in plan] == [(2, 4), (3, 4), (4, 4)]
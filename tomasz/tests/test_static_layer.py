@@ -0,0 +1,95 @@
+"""Tests for the static_layer module."""
+
+import numpy as np
+
+from tomasz.map import TomaszMap, TomaszMapWithHistory
+from tomasz.map.static_layer import TomaszStaticLayer, get_static_layer, save_static_layer
+from tomasz.tests.map_builder import build_game_state, make_zone
+
+# pylint: disable=invalid-name
+
+DRAWING = """
+    #...
+    .A#.
+    ....
+    ..T.
+"""
+
+OTHER_DRAWING = """
+    ....
+    .A..
+    ..#.
+    ..T.
+"""
+
+ZONES = (make_zone(2, 2, 2, 2),)
+
+
+def test_TomaszStaticLayer_from_game_state():
+    """Test that walls and zone geometry are extracted once."""
+
+    layer = TomaszStaticLayer.from_game_state(build_game_state(DRAWING, ZONES), seed=1)
+
+    assert layer.size == (4, 4)
+    assert layer.walls_arr[0, 0] == 1
+    assert layer.walls_arr[2, 1] == 1
+    assert layer.walls_arr.sum() == 2
+    assert [wall.pos for wall in layer.walls] == [(0, 0), (2, 1)]
+    assert layer.zone_tiles == {"A": [(2, 2), (3, 2), (2, 3), (3, 3)]}
+    assert layer.zone_masks["A"].sum() == 4
+    assert layer.zone_masks["A"][3, 3]
+
+
+def test_TomaszMap_with_static_layer():
+    """Test that maps built with a static layer share its walls and zones."""
+
+    game_state = build_game_state(DRAWING, ZONES)
+    layer = TomaszStaticLayer.from_game_state(game_state)
+
+    tomasz_map = TomaszMap(game_state, layer)
+    history = TomaszMapWithHistory(game_state, layer)
+    history.update(TomaszMap(game_state, history.static))
+
+    assert tomasz_map.walls_arr is layer.walls_arr
+    assert tomasz_map.walls is layer.walls
+    assert tomasz_map.zones["A"].pos is layer.zone_tiles["A"]
+    assert history.static is layer
+    assert history.walls_arr is layer.walls_arr
+
+
+def test_TomaszMap_without_static_layer():
+    """Test that a map parsed on its own builds an equivalent static layer."""
+
+    game_state = build_game_state(DRAWING, ZONES)
+    tomasz_map = TomaszMap(game_state)
+    layer = TomaszStaticLayer.from_game_state(game_state)
+
+    assert np.array_equal(tomasz_map.walls_arr, layer.walls_arr)
+    assert tomasz_map.static.wall_hash == layer.wall_hash
+    assert tomasz_map.static.zone_tiles == layer.zone_tiles
+
+
+def test_get_static_layer__cached_by_seed():
+    """Test that layers are shared by all the maps of the same match."""
+
+    layer = get_static_layer(build_game_state(DRAWING), seed=101)
+
+    assert get_static_layer(build_game_state(DRAWING), seed=101) is layer
+    assert get_static_layer(build_game_state(DRAWING), seed=102) is not layer
+    assert get_static_layer(build_game_state(DRAWING)) is not layer
+
+
+def test_get_static_layer__tables_saved_to_disk(tmp_path):
+    """Test that derived tables are restored from disk for the same walls only."""
+
+    layer = get_static_layer(build_game_state(DRAWING), seed=201)
+    layer.get_table("answer", lambda static: np.full(static.size, 42))
+    save_static_layer(layer, str(tmp_path))
+
+    same_walls = TomaszStaticLayer.from_game_state(build_game_state(DRAWING), seed=201)
+    other_walls = TomaszStaticLayer.from_game_state(build_game_state(OTHER_DRAWING), seed=201)
+
+    assert same_walls.load_tables(str(tmp_path / "static_layer_201.npz"))
+    assert np.array_equal(same_walls.get_table("answer", None), np.full((4, 4), 42))
+    assert not other_walls.load_tables(str(tmp_path / "static_layer_201.npz"))
+    assert other_walls.tables == {}
@@ -0,0 +1,133 @@
+"""Tests for the zone_fields module."""
+
+import numpy as np
+
+from tomasz.map import TomaszMap, TomaszMapWithHistory
+from tomasz.map.distance_field import UNREACHABLE
+from tomasz.map.static_layer import TomaszStaticLayer
+from tomasz.map.zone_fields import ZoneFields
+from tomasz.tests.map_builder import build_game_state, make_zone
+from tomasz.tests.test_distance_field import reference_distances
+
+# pylint: disable=invalid-name
+
+DRAWING = """
+    .......
+    .####..
+    .#.....
+    .#.#...
+    .#.#...
+    .......
+    .......
+"""
+
+ZONES = (make_zone(4, 0, 3, 2, index=ord("A")), make_zone(2, 3, 1, 2, index=ord("B")))
+
+
+def reference_zone_distances(walkable, tiles):
+    distances = np.stack([reference_distances(walkable, pos) for pos in tiles if walkable[pos]])
+    distances = np.where(distances == UNREACHABLE, np.iinfo(np.int32).max, distances).min(axis=0)
+    return np.where(distances == np.iinfo(np.int32).max, UNREACHABLE, distances)
+
+
+def test_ZoneFields__static_fields():
+    """Test that the fields over the walls give the distance to the closest zone tile."""
+
+    layer = TomaszStaticLayer.from_game_state(build_game_state(DRAWING, ZONES))
+    fields = ZoneFields(layer)
+    walkable = layer.walls_arr == 0
+
+    for zone_idx, tiles in layer.zone_tiles.items():
+        field = fields.get(zone_idx)
+        np.testing.assert_array_equal(field.distances, reference_zone_distances(walkable, tiles))
+
+        path = field.path_from((0, 6))
+        assert len(path) == field.distance((0, 6))
+        assert path[-1] in tiles
+    assert "zone_fields" in layer.tables
+
+
+def test_ZoneFields__refreshed_on_danger():
+    """Test that blocked tiles reroute the field and the same blocked tiles reuse it."""
+
+    layer = TomaszStaticLayer.from_game_state(build_game_state(DRAWING, ZONES))
+    fields = ZoneFields(layer)
+    danger = np.zeros(layer.size)
+    # block the way into the pocket of zone B from below
+    danger[2, 5] = 1
+
+    field = fields.get("B", danger)
+
+    assert fields.get("B").distance((2, 6)) == 2
+    assert field.distance((2, 6)) == 9
+    assert (2, 5) not in field.path_from((2, 6))
+    assert fields.get("B", danger.copy()) is field
+    assert fields.get("B", np.zeros(layer.size)) is fields.get("B")
+    # the open tile is entered even if dangerous
+    assert fields.get("B", danger, open_tile=(2, 5)).distance((2, 6)) == 2
+
+
+def test_ZoneFields__rebuilt_only_when_danger_touches_the_path():
+    """Test that danger off the path of the open tile keeps the fields."""
+
+    layer = TomaszStaticLayer.from_game_state(build_game_state(DRAWING, ZONES))
+    fields = ZoneFields(layer)
+    danger = np.zeros(layer.size)
+    # a danger ray in the pocket of zone B, away from the way to it from (2, 6)
+    danger[2, 2] = danger[3, 2] = 1
+
+    assert fields.get("B", danger, open_tile=(2, 6)) is fields.get("B")
+    assert fields.rebuilds == 0
+
+    # the ray moves onto the way in, the field goes around it
+    danger[:] = 0
+    danger[2, 5] = 1
+    field = fields.get("B", danger, open_tile=(2, 6))
+    assert field.distance((2, 6)) == 9
+    assert fields.rebuilds == 1
+
+    # danger appearing off the detour keeps the field around the blocked tile
+    danger[6, 6] = 1
+    assert fields.get("B", danger, open_tile=(2, 6)) is field
+    assert fields.rebuilds == 1
+
+    # the way in is free again, the field over the walls is back
+    danger[2, 5] = 0
+    assert fields.get("B", danger, open_tile=(2, 6)) is fields.get("B")
+    assert fields.rebuilds == 1
+
+
+def test_ZoneFields__exact_for_the_open_tile_while_danger_moves():
+    """Test that the reused fields give the distance of a fresh BFS from the open tile."""
+
+    layer = TomaszStaticLayer.from_game_state(build_game_state(DRAWING, ZONES))
+    fields = ZoneFields(layer)
+    rng = np.random.default_rng(0)
+    free = [tuple(pos) for pos in np.argwhere(layer.walls_arr == 0)]
+
+    for _ in range(40):
+        danger = (rng.random(layer.size) < 0.1).astype(float)
+        open_tile = free[rng.integers(len(free))]
+        walkable = (layer.walls_arr == 0) & (danger <= 0.2)
+        walkable[open_tile] = True
+        for zone_idx, tiles in layer.zone_tiles.items():
+            if not any(walkable[pos] for pos in tiles):
+                expected = UNREACHABLE
+            else:
+                expected = reference_zone_distances(walkable, tiles)[open_tile]
+            assert fields.get(zone_idx, danger, open_tile=open_tile).distances[open_tile] == expected
+
+
+def test_TomaszMapWithHistory_zone_field():
+    """Test that the map reads the zone fields with its own danger."""
+
+    drawing = DRAWING.replace(".......\n    .......\n", "..M....\n    A......\n", 1)
+    history = TomaszMapWithHistory(build_game_state(drawing, ZONES))
+    history.update(TomaszMap(build_game_state(drawing, ZONES)))
+
+    field = history.zone_field("B")
+
+    assert history.danger[2, 5] == 1
+    assert history.zone_field("B") is field
+    assert field.distance(history.agent.position) == 11
+    assert (2, 5) not in field.path_from(history.agent.position)
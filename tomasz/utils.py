@@ -1,6 +1,7 @@
 import numpy as np
 from typing import Tuple
 from tomasz.map import TomaszMap
+from tomasz.map.ray_table import get_ray_table
 
 from hackathon_bot import *
 
@@ -21,16 +22,17 @@ def out_of_bounds(x, y, size):
     return x < 0 or x >= size[0] or y < 0 or y >= size[1]
 
 
+# deltas in tile coordinates (x, y), maps are indexed [x, y]
 direction_to_delta = {
-    Direction.UP: (-1, 0),
-    Direction.DOWN: (1, 0),
-    Direction.LEFT: (0, -1),
-    Direction.RIGHT: (0, 1)
+    Direction.UP: (0, -1),
+    Direction.DOWN: (0, 1),
+    Direction.LEFT: (-1, 0),
+    Direction.RIGHT: (1, 0)
 }
 
 oridentation_to_delta = {
-    Orientation.HORIZONTAL: ((0, 1), (0, -1)),
-    Orientation.VERTICAL: ((1, 0), (-1, 0)),
+    Orientation.HORIZONTAL: ((1, 0), (-1, 0)),
+    Orientation.VERTICAL: ((0, 1), (0, -1)),
 }
 
 def propagate(
@@ -43,6 +45,7 @@ def propagate(
     ):
     """
     Propagate a value from a start position in a direction until a wall is hit.
+    The ray is looked up in the ray table of the static layer.
 
     Args:
         grid: The grid to propagate the value on
@@ -64,17 +67,9 @@ def propagate(
             propagate(grid, map, start_pos, delta, decay, start_pos_not_included)
         return
 
-    x, y = start_pos
-    delta_x, delta_y = dir
-
-    value = 1
-    for _ in range(map.size[0]):
-        x += delta_x
-        y += delta_y
-        if out_of_bounds(x, y, map.size) or map.walls_arr[x, y]:
-            break
-        grid[x, y] = 1 - (1 - grid[x, y]) * (1 - value)
-        value *= decay
+    ray = get_ray_table(map.static).view(grid, start_pos, dir, max_steps=map.size[0])
+    values = decay ** np.arange(len(ray), dtype=float)
+    ray[:] = 1 - (1 - ray) * (1 - values)
 
     if start_pos_not_included:
         grid[start_pos] = 0